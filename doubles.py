@@ -6,40 +6,58 @@ Created on Fri 13 Jan 2023 01∶14∶59 PM EST
 @author: shane
 https://trueskill.org/
 """
-import math
 import os
 import sys
 import time
 from datetime import datetime
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
 import trueskill  # pylint: disable=import-error
 from tabulate import tabulate
 
 from pong import DOUBLES
+from pong.checkpoint import StreamingCheckpoint
 from pong.core import (
+    DownloadInterrupted,
+    SheetPoller,
     add_club,
-    build_csv_reader,
     cache_ratings_csv_file,
     filter_players,
     get_or_create_player_by_name,
+    load_games,
     print_title,
+    watch,
 )
+from pong.env import N_WORKERS, RATE_PER_SET, RETAIN_GAMES, WATCH_INTERVAL
 from pong.models import Club, DoublesGames, Player
-from pong.tsutils import win_probability
+from pong.pairings import (
+    count_doubles_matchups,
+    search_doubles_matchups,
+    search_doubles_matchups_parallel,
+)
+from pong.store import GameStore
+from pong.tsutils import rate_2v2
+
+# A checkpoint built with different options can't be resumed
+CHECKPOINT_OPTIONS = {"rate_per_set": RATE_PER_SET, "retain_games": RETAIN_GAMES}
 
 
+# pylint: disable=too-many-arguments
 def do_games(
     player1: Player,
     player2: Player,
     player3: Player,
     player4: Player,
     games: DoublesGames,
+    alternate: bool = True,
 ) -> None:
     """
     Updates ratings.
     NOTE: team1 = wins, team2 = loses
           team1 = (player1, player2), team2 = (player3, player4)
+    :param alternate: Rate game by game (won games first, then alternate), otherwise
+        rate the whole set in a single update
     """
 
     def _update_rating(
@@ -48,34 +66,70 @@ def do_games(
         """Updates ratings."""
 
         # Calculate new ratings
-        _new_team1_ratings, _new_team2_ratings = trueskill.rate(
-            [
-                (_player1.rating_doubles, _player2.rating_doubles),
-                (_player3.rating_doubles, _player4.rating_doubles),
-            ]
+        _ratings = [x.rating_doubles for x in [_player1, _player2, _player3, _player4]]
+        _new_mu, _new_sigma = rate_2v2(
+            np.array([x.mu for x in _ratings]),
+            np.array([x.sigma for x in _ratings]),
         )
+        _new_ratings = [
+            trueskill.Rating(mu=float(mu), sigma=float(sigma))
+            for mu, sigma in zip(_new_mu, _new_sigma)
+        ]
 
         # Push to list of ratings
-        _player1.ratings[DOUBLES].append(_new_team1_ratings[0])
-        _player2.ratings[DOUBLES].append(_new_team1_ratings[1])
-        _player1.partner_rating_doubles.append(_player2.rating_doubles)
-        _player2.partner_rating_doubles.append(_player1.rating_doubles)
+        _player1.push_rating(DOUBLES, _new_ratings[0])
+        _player2.push_rating(DOUBLES, _new_ratings[1])
+        _player1.record(DOUBLES).add_partners(_player2.rating_doubles.mu)
+        _player2.record(DOUBLES).add_partners(_player1.rating_doubles.mu)
 
-        _player3.ratings[DOUBLES].append(_new_team2_ratings[0])
-        _player4.ratings[DOUBLES].append(_new_team2_ratings[1])
-        _player3.partner_rating_doubles.append(_player4.rating_doubles)
-        _player4.partner_rating_doubles.append(_player3.rating_doubles)
+        _player3.push_rating(DOUBLES, _new_ratings[2])
+        _player4.push_rating(DOUBLES, _new_ratings[3])
+        _player3.record(DOUBLES).add_partners(_player4.rating_doubles.mu)
+        _player4.record(DOUBLES).add_partners(_player3.rating_doubles.mu)
 
         # Update list of opponent ratings (track e.g. worst defeat & biggest upset)
         for _player in [_player1, _player2]:
-            _player.opponent_ratings[DOUBLES]["wins"].append(
+            _player.record(DOUBLES).add_wins(
                 (_player3.rating_doubles.mu + _player4.rating_doubles.mu) / 2
             )
         for _player in [_player3, _player4]:
-            _player.opponent_ratings[DOUBLES]["losses"].append(
+            _player.record(DOUBLES).add_losses(
                 (_player1.rating_doubles.mu + _player2.rating_doubles.mu) / 2
             )
 
+    def _update_rating_set(wins: int, losses: int) -> None:
+        """
+        Updates ratings, once for the whole set.
+        NOTE: TrueSkill has no multi-game update, so the games are still chained in
+          the same order, but on arrays (and only the final ratings are pushed).
+          Partners & opponents are tallied per game, as they'd be game by game.
+        """
+        _players = [player1, player2, player3, player4]
+        _mu = np.array([x.rating_doubles.mu for x in _players])
+        _sigma = np.array([x.rating_doubles.sigma for x in _players])
+        _records = [x.record(DOUBLES) for x in _players]
+
+        # Column order for team1 winning, and team2 winning
+        _won, _lost = [0, 1, 2, 3], [3, 2, 1, 0]
+        for _order in [_won] * (wins - losses) + [_lost, _won] * losses:
+            _mu[_order], _sigma[_order] = rate_2v2(_mu[_order], _sigma[_order])
+
+            # Tally partner & opponent ratings as of each game (same as game by game)
+            _w1, _w2, _l1, _l2 = _order
+            _m = _mu.tolist()
+            for _i, _j in [(_w1, _w2), (_w2, _w1), (_l1, _l2), (_l2, _l1)]:
+                _records[_i].add_partners(_m[_j])
+            for _i in [_w1, _w2]:
+                _records[_i].add_wins((_m[_l1] + _m[_l2]) / 2, own_mu=_m[_i])
+            for _i in [_l1, _l2]:
+                _records[_i].add_losses((_m[_w1] + _m[_w2]) / 2)
+
+        # Push to list of ratings
+        for _i, _player in enumerate(_players):
+            _player.push_rating(
+                DOUBLES, trueskill.Rating(mu=float(_mu[_i]), sigma=float(_sigma[_i]))
+            )
+
     # Disallow scores like 2-5
     if games.winner_score() < games.loser_score():
         raise ValueError(
@@ -83,55 +137,112 @@ def do_games(
             f"{games.winner_score()}-{games.loser_score()}"
         )
 
-    # Do the rating updates for won games, then alternate
-    for _ in range(games.winner_score() - games.loser_score()):
-        _update_rating(player1, player2, player3, player4)
+    if alternate:
+        # Do the rating updates for won games, then alternate
+        for _ in range(games.winner_score() - games.loser_score()):
+            _update_rating(player1, player2, player3, player4)
 
-    for _ in range(games.loser_score()):
-        _update_rating(player4, player3, player2, player1)
-        _update_rating(player1, player2, player3, player4)
+        for _ in range(games.loser_score()):
+            _update_rating(player4, player3, player2, player1)
+            _update_rating(player1, player2, player3, player4)
+    else:
+        _update_rating_set(games.winner_score(), games.loser_score())
 
     # Push to list of club locations
-    add_club(player1, club=games.location.name, mode=DOUBLES)
-    add_club(player2, club=games.location.name, mode=DOUBLES)
-    add_club(player3, club=games.location.name, mode=DOUBLES)
-    add_club(player4, club=games.location.name, mode=DOUBLES)
+    add_club(player1, club=games.location.club_id, mode=DOUBLES)
+    add_club(player2, club=games.location.club_id, mode=DOUBLES)
+    add_club(player3, club=games.location.club_id, mode=DOUBLES)
+    add_club(player4, club=games.location.club_id, mode=DOUBLES)
 
 
-def build_ratings() -> Tuple[List[Player], List[DoublesGames], Set[Club]]:
+def build_ratings(
+    rows: Optional[Iterable[Dict[str, str]]] = None,
+    resume: Optional[Tuple[Dict[str, Player], int]] = None,
+) -> Tuple[List[Player], List[DoublesGames], Set[Club]]:
     """
     Main method which calculates doubles ratings
+
+    :param rows: CSV rows, streamed from the sheet if not given (and rated as they
+        arrive, while the rest is still downloading)
+    :param resume: (players, n_rows_applied) already in memory, e.g. in watch mode.
+        Otherwise resumed from the checkpoint (if still valid).
+
+    NOTE: if the download drops part way, the half rated players are dropped (nothing
+      was saved yet), and rating starts over with a fresh checkpoint, from the cached
+      CSV file (or the games store)
     """
+    # pylint: disable=duplicate-code
+    try:
+        return _build_ratings(rows, resume=resume)
+    except DownloadInterrupted:
+        return _build_ratings(rows, resume=None, offline=True)
+
+
+def _build_ratings(
+    rows: Optional[Iterable[Dict[str, str]]] = None,
+    resume: Optional[Tuple[Dict[str, Player], int]] = None,
+    offline: bool = False,
+) -> Tuple[List[Player], List[DoublesGames], Set[Club]]:
+    """Builds the ratings, see: build_ratings()"""
+
+    # Prepare the inputs, the games store if the sheet is unchanged (cold start).
+    # Otherwise the CSV rows (fetch Google Sheet and save to disk)
+    store, _streamed = None, rows is None
+    if rows is None:
+        store, rows = load_games(mode=DOUBLES, offline=offline)
 
-    # Prepare the CSV inputs (fetch Google Sheet and save to disk)
-    reader = build_csv_reader(mode=DOUBLES)
+    # Resume from the last checkpoint, only new rows need to be replayed
+    checkpoint = StreamingCheckpoint(DOUBLES, options=CHECKPOINT_OPTIONS, resume=resume)
 
     # pylint: disable=duplicate-code
-    sets = []
-    players: Dict[str, Player] = {}
+    sets: List[DoublesGames] = []
     clubs = set()
 
     t_start = time.time()
 
-    # Process the CSV
-    for row in reader:
+    def _rate(_sets: List[DoublesGames], _players: Dict[str, Player]) -> None:
+        for games in _sets:
+            # Check if players are already tracked, create if not
+            _winner_player1 = get_or_create_player_by_name(_players, games.username1)
+            _winner_player2 = get_or_create_player_by_name(_players, games.username2)
+            _loser_player3 = get_or_create_player_by_name(_players, games.username3)
+            _loser_player4 = get_or_create_player_by_name(_players, games.username4)
+
+            # Run the algorithm and update ratings
+            do_games(
+                _winner_player1,
+                _winner_player2,
+                _loser_player3,
+                _loser_player4,
+                games,
+                alternate=not RATE_PER_SET,
+            )
+
+    # Already parsed (and hashed) in the store
+    if store is not None:
+        sets = list(store.games(DoublesGames))
+        clubs = {x.location for x in sets}
+        _skip = checkpoint.skip(len(store), store.digest, store.prefix_digest)
+        _rate(sets[_skip], checkpoint.players)
+
+    # Process the CSV (as it's streamed in)
+    for row in rows:
         # Add game to list
         games = DoublesGames(row)
         sets.append(games)
+        clubs.add(games.location)
 
-        # Check if players are already tracked, create if not
-        _winner_player1 = get_or_create_player_by_name(players, games.username1)
-        _winner_player2 = get_or_create_player_by_name(players, games.username2)
-        _loser_player3 = get_or_create_player_by_name(players, games.username3)
-        _loser_player4 = get_or_create_player_by_name(players, games.username4)
+        # Rate it, unless already accounted for in the checkpointed ratings
+        _rate(sets[checkpoint.push(row)], checkpoint.players)
 
-        # Run the algorithm and update ratings
-        do_games(
-            _winner_player1, _winner_player2, _loser_player3, _loser_player4, games
-        )
+    _rate(sets[checkpoint.finish()], checkpoint.players)
+    checkpoint.save()
+    players, n_rows_applied = checkpoint.players, checkpoint.n_rows_applied
 
-        # Push to list of club locations
-        clubs.add(games.location)
+    if _streamed and store is None:
+        GameStore.from_games(
+            DOUBLES, sets, digest=checkpoint.digest, prefix=checkpoint.prefix_digests
+        ).save()
 
     n_games = sum(sum(y for y in x.score) for x in sets)
 
@@ -151,13 +262,9 @@ def build_ratings() -> Tuple[List[Player], List[DoublesGames], Set[Club]]:
                 p.username,
                 p.str_rating(mode=DOUBLES),
                 p.str_win_losses(mode=DOUBLES),
-                round(max(x.mu for x in p.ratings[DOUBLES]), 1),
+                round(max(p.peek_record(DOUBLES).history_mu), 1),
                 p.avg_opponent(mode=DOUBLES),
-                round(
-                    sum(x.mu for x in p.partner_rating_doubles)
-                    / len(p.partner_rating_doubles),
-                    1,
-                ),
+                p.avg_partner(mode=DOUBLES),
                 p.home_club(mode=DOUBLES),
             )
             for p in sorted_players
@@ -171,8 +278,8 @@ def build_ratings() -> Tuple[List[Player], List[DoublesGames], Set[Club]]:
     t_delta = time.time() - t_start
     print()
     print(
-        f"Analyzed {len(sets)} CSV lines in {round(1000 * t_delta, 1)} ms "
-        f"({round(len(sets) / t_delta)}/s)"
+        f"Analyzed {len(sets)} CSV lines ({len(sets) - n_rows_applied} new) "
+        f"in {round(1000 * t_delta, 1)} ms ({round(len(sets) / t_delta)}/s)"
     )
 
     # Used to build pairings / ideal matches
@@ -183,130 +290,75 @@ def print_doubles_matchups(
     players: List[Player],
     delta_mu_threshold: float = 3.0,
     two_rd_threshold: float = 9.5,
+    n_top: int = 100,
 ) -> List[Tuple[str, str, str, str, float, int, float, float]]:
     """
     Prints out the fairest possible games, matching up nearly equal opponents for
     interesting play.
+    Returns the top n_top match ups (best first).
     """
 
     t_start = time.time()
-    n_players = len(players)
-    matchups = []
-    n_skipped_matchups = 0
 
-    _n_top = 100
     # TODO: resolve ValueError with len(players) < 2, allow to just do the pair ups for
     #   that one person with everyone else, or that club, or something specific
-    _n_choose_2_teams = math.comb(len(players), 2) * math.comb(len(players) - 2, 2) // 2
-    _avg_cmp_per_second = 30000
+    _n_choose_2_teams = count_doubles_matchups(len(players))
+    _avg_cmp_per_second = 500000 * max(N_WORKERS, 1)
 
-    # Evaluate all possible match ups
-    # pylint: disable=invalid-name
+    # Evaluate all possible match ups (in blocks, with NumPy)
     print(
         os.linesep + f"Calculating {_n_choose_2_teams} match ups, "
         f"should take ~{round(_n_choose_2_teams / _avg_cmp_per_second, 2)}s"
     )
-    for i1 in range(n_players):
-        player1 = players[i1]
-        for i2 in range(i1 + 1, n_players):
-            player2 = players[i2]
-
-            # Second team
-            for i3 in range(i1 + 1, n_players):
-                # Can't play yourself
-                if i3 == i2:
-                    continue
-                player3 = players[i3]
-                for i4 in range(i3 + 1, n_players):
-                    # Can't play yourself
-                    if i4 in {i3, i2}:
-                        continue
-                    player4 = players[i4]
-
-                    # Compute rating difference and average RD
-                    _delta_rating = float(
-                        round(
-                            (
-                                player1.rating_doubles.mu
-                                + player2.rating_doubles.mu
-                                - player3.rating_doubles.mu
-                                - player4.rating_doubles.mu
-                            )
-                            / 2,
-                            1,
-                        )
-                    )
-
-                    _2_rd_avg = round(
-                        1.96
-                        * math.sqrt(
-                            sum(
-                                x.rating_doubles.sigma**2
-                                for x in [player1, player2, player3, player4]
-                            )
-                            / 4
-                        )
-                    )
-                    # Short list only match ups with small delta mu and small sigma
-                    if (
-                        _delta_rating > delta_mu_threshold
-                        or _2_rd_avg > two_rd_threshold
-                    ):
-                        n_skipped_matchups += 1
-                        continue
-
-                    # Compute quality metrics, and add to list
-                    # NOTE: relatively slow to calculate
-                    _quality_of_match = float(
-                        round(
-                            trueskill.quality(
-                                [
-                                    (player1.rating_doubles, player2.rating_doubles),
-                                    (player3.rating_doubles, player4.rating_doubles),
-                                ]
-                            ),
-                            2,
-                        )
-                    )
-                    _win_probability = round(
-                        win_probability(
-                            (player1.rating_doubles, player2.rating_doubles),
-                            (player3.rating_doubles, player4.rating_doubles),
-                        ),
-                        2,
-                    )
-
-                    # Add to list
-                    matchups.append(
-                        (
-                            player1.username,
-                            player2.username,
-                            player3.username,
-                            player4.username,
-                            _delta_rating,
-                            _2_rd_avg,
-                            _quality_of_match,
-                            _win_probability,
-                        )
-                    )
-
-    # Print title and sort
+    _mu = np.array([x.rating_doubles.mu for x in players])
+    _sigma = np.array([x.rating_doubles.sigma for x in players])
+    if N_WORKERS > 1:
+        _matchups, n_shortlisted, n_skipped_matchups = search_doubles_matchups_parallel(
+            _mu,
+            _sigma,
+            delta_mu_threshold=delta_mu_threshold,
+            two_rd_threshold=two_rd_threshold,
+            n_top=n_top,
+            n_workers=N_WORKERS,
+        )
+    else:
+        _matchups, n_shortlisted, n_skipped_matchups = search_doubles_matchups(
+            _mu,
+            _sigma,
+            delta_mu_threshold=delta_mu_threshold,
+            two_rd_threshold=two_rd_threshold,
+            n_top=n_top,
+        )
+
+    # Print title
     print_title(
-        f"Pair ups [top {min(_n_top, _n_choose_2_teams)}, "
+        f"Pair ups [top {min(n_top, _n_choose_2_teams)}, "
         f"({len(players)}C2*{len(players) - 2}C2)/2={_n_choose_2_teams} possible]"
     )
-    matchups.sort(key=lambda x: x[-2], reverse=True)
 
     # Verify things
-    if len(matchups) + n_skipped_matchups != _n_choose_2_teams:
+    if n_shortlisted + n_skipped_matchups != _n_choose_2_teams:
         sys.exit(
             f"Missed some match ups? "
-            f"{len(matchups)} + {n_skipped_matchups} != {_n_choose_2_teams}"
+            f"{n_shortlisted} + {n_skipped_matchups} != {_n_choose_2_teams}"
         )
 
     # Print off best matches
+    _top_matchups = [
+        (
+            players[x[0]].username,
+            players[x[1]].username,
+            players[x[2]].username,
+            players[x[3]].username,
+            x[4],
+            x[5],
+            x[6],
+            x[7],
+        )
+        for x in _matchups
+    ]
     _table = tabulate(
-        matchups[:_n_top],
+        _top_matchups,
         headers=["Team 1", "Team 1", "Team 2", "Team 2", "Δμ", "2σ", "Q", "P(w)"],
     )
     print(_table)
@@ -320,7 +372,7 @@ def print_doubles_matchups(
         f"skipped {n_skipped_matchups}"
     )
 
-    return matchups
+    return _top_matchups
 
 
 def print_progresses(_players: List[Player]) -> None:
@@ -329,24 +381,41 @@ def print_progresses(_players: List[Player]) -> None:
     for _player in _players:
         print(
             f"{_player.username} [{_player.str_rating(mode=DOUBLES)}], "
-            f"peak {round(max(x.mu for x in _player.ratings[DOUBLES]), 1)}, "
-            f"best win {_player.best_win(mode=DOUBLES)}"
+            f"peak {round(max(_player.peek_record(DOUBLES).history_mu), 1)}, "
+            f"best win {_player.best_win(mode=DOUBLES)}, "
+            f"biggest upset {_player.biggest_upset(mode=DOUBLES)}, "
+            f"worst loss {_player.worst_loss(mode=DOUBLES)}"
         )
         _player.graph_ratings()
         print()
 
 
-if __name__ == "__main__":
-    print("DOUBLES")
+def main(
+    rows: Optional[List[Dict[str, str]]] = None,
+    resume: Optional[Tuple[Dict[str, Player], int]] = None,
+) -> Dict[str, Player]:
+    """Rates, prints and saves everything, returns all the players (for resuming)"""
+    # pylint: disable=duplicate-code
     print(f"Last updated: {datetime.utcnow()}")
 
-    _sorted_players, _games, _clubs = build_ratings()
+    _sorted_players, _games, _clubs = build_ratings(rows, resume=resume)
+    players = {x.username: x for x in _sorted_players}
 
     # TODO: make use of _clubs and _games now. Filter uncertain ratings here?
     _sorted_players = filter_players(_sorted_players)
     cache_ratings_csv_file(_sorted_players, mode=DOUBLES)
 
     # TODO: filter, or match based on club, or create greedy pairing algorithm
-    #  this has O(n^4) complexity and won't scale
+    #  this still has O(n^4) complexity (but vectorized)
     print_doubles_matchups(_sorted_players)
     print_progresses(_sorted_players)
+    return players
+
+
+if __name__ == "__main__":
+    print("DOUBLES")
+
+    if "--watch" in sys.argv[1:]:
+        watch(SheetPoller(DOUBLES), main, interval=WATCH_INTERVAL)
+    else:
+        main()
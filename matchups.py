@@ -5,6 +5,7 @@ Created on Wed Jan 25 13:38:55 2023
 
 @author: shane
 """
+import math
 import os
 import shlex
 import sys
@@ -12,18 +13,20 @@ from typing import Dict, List, Tuple
 
 from doubles import print_doubles_matchups
 from pong.env import MODE_SINGLES
+from pong.glickoutils import SinglesMatrix
 from pong.matchups import (
     build_players,
     detailed_match_ups_doubles,
     detailed_match_ups_singles,
 )
 from pong.models import Player
-from singles import print_singles_matchups
+from singles import print_singles_matchups, singles_matrix
 
 
 def print_singles_details(
     matchups: List[Tuple[str, str, int, int, float, float]],
     players: Dict[str, Player],
+    matrix: SinglesMatrix,
 ) -> None:
     """Prints the details for each requested match-ups"""
     for pairing in matchups:
@@ -31,6 +34,7 @@ def print_singles_details(
             pairing[0],
             pairing[1],
             players,
+            matrix=matrix,
         )
 
 
@@ -57,7 +61,6 @@ if __name__ == "__main__":
     _players = sys.argv[1:] or shlex.split(os.environ.get("PONG_PLAYERS") or str())
     N_PLAYERS = len(_players)
 
-    # TODO: set _n_top to be arbitrarily large?
     if N_PLAYERS == 0:
         pass
         # TODO: Only pair up by clubs by default? For detailed statistics?
@@ -72,16 +75,24 @@ if __name__ == "__main__":
     # NOTE: convoluted way to sort players in order of descending strength...
     #   iterating over single_players first, which IS sorted already
     if MODE_SINGLES:
+        _singles_players = sorted(
+            # TODO: where should this be filtered or decided?
+            [singles_players[name] for name in _players],
+            # singles_players.values(),
+            key=lambda p: p.rating_singles.mu,
+            reverse=True,
+        )
+        # Computed once (or loaded, if the same ladder was requested last time)
+        _matrix = singles_matrix(_singles_players)
         singles_matchups = print_singles_matchups(
-            players=sorted(
-                # TODO: where should this be filtered or decided?
-                [singles_players[name] for name in _players],
-                # singles_players.values(),
-                key=lambda p: p.rating_singles.mu,
-                reverse=True,
-            )
+            players=_singles_players,
+            # Keep all of them, for the detailed view
+            n_top=math.comb(N_PLAYERS, 2),
+            matrix=_matrix,
+        )
+        print_singles_details(
+            matchups=singles_matchups, players=singles_players, matrix=_matrix
         )
-        print_singles_details(matchups=singles_matchups, players=singles_players)
     else:
         doubles_matchups = print_doubles_matchups(
             players=sorted(
@@ -4,10 +4,15 @@ Created on Tue 10 Jan 2023 12∶39∶06 PM EST
 
 @author: shane
 """
+import importlib.util
 import math
 import os
-
-from pong.env import PONG_SHEET_GID_DOUBLES, PONG_SHEET_GID_SINGLES, PONG_SHEET_KEY
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from types import ModuleType
+from typing import IO, Any, Iterator
 
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 
@@ -19,22 +24,48 @@ DOUBLES = "doubles"
 DRAW_PROB_DOUBLES = math.comb(20, 10) * (1 / 2) ** 20
 
 
-def _url(gid: int) -> str:
-    """Hard-coded URL values pointing to our sheet"""
+def lazy_import(name: str) -> ModuleType:
+    """
+    Imports a (heavy or optional) module on first attribute access, not right away.
+    Keeps the start up fast for commands which never touch it, e.g. requests.
+    https://docs.python.org/3/library/importlib.html#implementing-lazy-imports
+    """
+    if name in sys.modules:
+        return sys.modules[name]
 
-    return (
-        "https://docs.google.com/spreadsheet/ccc"
-        f"?key={PONG_SHEET_KEY}"
-        f"&gid={gid}"
-        "&output=csv"
-    )
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
 
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+@contextmanager
+def atomic_write(file_path: str, mode: str = "w") -> Iterator[IO[Any]]:
+    """
+    Writes to a temporary file alongside, then renames it over the target.
+    Readers (e.g. matchups.py, during watch mode) never see a half written file.
+    """
+    _fd, _tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(file_path), prefix=".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(_fd, mode, encoding=None if "b" in mode else "utf-8") as _f:
+            yield _f
+        if os.path.isfile(file_path):
+            shutil.copymode(file_path, _tmp_path)
+        else:
+            os.chmod(_tmp_path, 0o644)
+        os.replace(_tmp_path, file_path)
+    finally:
+        if os.path.exists(_tmp_path):
+            os.remove(_tmp_path)
 
-# URLs to google sheets for singles & doubles CSVs
-CSV_GAMES_URLS = {
-    SINGLES: _url(PONG_SHEET_GID_SINGLES),
-    DOUBLES: _url(PONG_SHEET_GID_DOUBLES),
-}
 
 # Fall back (cached CSV files, if sheets.google.com is unreachable)
 CSV_GAMES_FILE_PATHS = {
@@ -42,8 +73,29 @@ CSV_GAMES_FILE_PATHS = {
     DOUBLES: os.path.join(PROJECT_ROOT, "data", "games_doubles.csv"),
 }
 
+# Columnar (binary) copies of the cached CSV files, memory mapped on cold starts
+GAMES_STORE_FILE_PATHS = {
+    SINGLES: os.path.join(PROJECT_ROOT, "data", "games_singles.bin"),
+    DOUBLES: os.path.join(PROJECT_ROOT, "data", "games_doubles.bin"),
+}
+
+# ETag & Last-Modified of the cached CSV files, to revalidate rather than re-download
+CSV_GAMES_VALIDATORS_FILE_PATHS = {
+    SINGLES: os.path.join(PROJECT_ROOT, "data", "validators_singles.json"),
+    DOUBLES: os.path.join(PROJECT_ROOT, "data", "validators_doubles.json"),
+}
+
 # Persist ratings after main script for auxiliary calculations
 CSV_RATINGS_FILE_PATHS = {
     SINGLES: os.path.join(PROJECT_ROOT, "data", "ratings_singles.csv"),
     DOUBLES: os.path.join(PROJECT_ROOT, "data", "ratings_doubles.csv"),
 }
+
+# Saved P(win), Δμ and pooled RD matrices, for the last requested singles ladder
+MATRIX_FILE_PATH = os.path.join(PROJECT_ROOT, "data", "matrix_singles.npz")
+
+# Checkpointed ratings state, so a run only replays newly appended CSV rows
+CHECKPOINT_FILE_PATHS = {
+    SINGLES: os.path.join(PROJECT_ROOT, "data", "checkpoint_singles.json"),
+    DOUBLES: os.path.join(PROJECT_ROOT, "data", "checkpoint_doubles.json"),
+}
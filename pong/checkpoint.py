@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 09∶12∶40 AM EDT
+
+@author: shane
+Persists the ratings state after each run, along with a hash of the CSV rows it
+was built from. The next run only replays rows appended since the checkpoint.
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pong import CHECKPOINT_FILE_PATHS, atomic_write
+from pong.models import Player
+
+# Bump this whenever the rating algorithm changes, to force a full replay
+CHECKPOINT_VERSION = 6
+
+
+def _update_hash(_hash: "hashlib._Hash", row: Dict[str, str]) -> None:
+    """Hashes one (parsed) CSV row into the running hash"""
+    _hash.update(json.dumps(list(row.values())).encode())
+    _hash.update(b"\n")
+
+
+def hash_rows(rows: Iterable[Dict[str, str]]) -> str:
+    """Hashes the (parsed) CSV rows, so edits to old rows invalidate a checkpoint"""
+    _hash = hashlib.sha256()
+
+    for row in rows:
+        _update_hash(_hash, row)
+
+    return _hash.hexdigest()
+
+
+def read_checkpoint(
+    mode: str, options: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Player], int, Optional[str]]:
+    """
+    Reads the last checkpoint, without checking the rows it was built from.
+    Returns the players, the number of rows applied to them, and the rows' hash.
+    Empty if there is none, or if it was built by different code or options.
+    """
+    _file_path = CHECKPOINT_FILE_PATHS[mode]
+
+    if not os.path.isfile(_file_path):
+        return {}, 0, None
+
+    with open(_file_path, encoding="utf-8") as _f:
+        checkpoint = json.load(_f)
+
+    if checkpoint["version"] != CHECKPOINT_VERSION or checkpoint["options"] != (
+        options or {}
+    ):
+        print(f"WARN: {mode} checkpoint is stale, replaying all games...")
+        return {}, 0, None
+
+    players = {x["username"]: Player.from_dict(x) for x in checkpoint["players"]}
+    return players, int(checkpoint["n_rows"]), checkpoint["hash"]
+
+
+def write_checkpoint(
+    players: Dict[str, Player],
+    n_rows: int,
+    digest: str,
+    mode: str,
+    options: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Persists the players, and the hash of the n_rows which built them"""
+    checkpoint = {
+        "version": CHECKPOINT_VERSION,
+        "options": options or {},
+        "n_rows": n_rows,
+        "hash": digest,
+        "players": [p.to_dict() for p in players.values()],
+    }
+
+    with atomic_write(CHECKPOINT_FILE_PATHS[mode]) as _f:
+        json.dump(checkpoint, _f)
+
+
+def load_checkpoint(
+    rows: List[Dict[str, str]], mode: str, options: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Player], int]:
+    """
+    Restores the players from the last checkpoint.
+    Returns the players, and the number of leading rows already applied to them.
+    Falls back to an empty state (full replay) if the old rows were edited, or if
+    the rating options (e.g. rate per set) differ from the checkpointed ones.
+    """
+    players, n_rows, digest = read_checkpoint(mode, options=options)
+
+    if n_rows > len(rows) or (digest and digest != hash_rows(rows[:n_rows])):
+        print(f"WARN: {mode} checkpoint is stale, replaying all games...")
+        return {}, 0
+
+    return players, n_rows
+
+
+def save_checkpoint(
+    players: Dict[str, Player],
+    rows: List[Dict[str, str]],
+    mode: str,
+    options: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Persists the players, and a hash of all the rows which built them"""
+    write_checkpoint(players, len(rows), hash_rows(rows), mode, options=options)
+
+
+class StreamingCheckpoint:
+    """
+    The checkpoint, for rows which are streamed in one at a time.
+    The checkpointed rows are hashed as they arrive (rather than all up front), so
+    each new row is ready to rate as soon as it's parsed.
+
+        checkpoint = StreamingCheckpoint(mode)
+        for row in rows:
+            sets.append(parse(row))
+            for games in sets[checkpoint.push(row)]:
+                rate(checkpoint.players, games)
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        options: Optional[Dict[str, Any]] = None,
+        resume: Optional[Tuple[Dict[str, Player], int]] = None,
+    ) -> None:
+        """
+        :param resume: (players, n_rows_applied) already in memory, e.g. in watch
+            mode, these are trusted. Otherwise read from the last checkpoint.
+        """
+        self.mode = mode
+        self.options = options
+
+        self._digest: Optional[str] = None
+        if resume:
+            self.players, self.n_rows_applied = resume
+        else:
+            self.players, self.n_rows_applied, self._digest = read_checkpoint(
+                mode, options=options
+            )
+
+        self.n_rows = 0
+        self._hash = hashlib.sha256()
+        self._skipped_digest: Optional[str] = None
+
+        # Hash of the rows up to (and including) each one, 32 bytes each, so the
+        # games store can tell which checkpoint it extends (see: skip)
+        self.prefix_digests = bytearray()
+
+    @property
+    def digest(self) -> str:
+        """Gets the hash of all the rows so far (see: hash_rows)"""
+        return self._skipped_digest or self._hash.hexdigest()
+
+    def _stale(self) -> slice:
+        """Starts over, all the rows so far need to be rated"""
+        print(f"WARN: {self.mode} checkpoint is stale, replaying all games...")
+        self.players, self.n_rows_applied = {}, 0
+        return slice(0, self.n_rows)
+
+    def push(self, row: Dict[str, str]) -> slice:
+        """
+        Hashes the next row, returns the rows (indices) which are now ready to rate.
+        None while inside the checkpointed rows, or all of them if they were edited.
+        """
+        _update_hash(self._hash, row)
+        self.prefix_digests += self._hash.copy().digest()
+        self.n_rows += 1
+
+        if self.n_rows < self.n_rows_applied:
+            return slice(0)
+        if self.n_rows == self.n_rows_applied:
+            if self._digest and self._digest != self._hash.hexdigest():
+                return self._stale()
+            return slice(0)
+        return slice(self.n_rows - 1, self.n_rows)
+
+    def skip(
+        self,
+        n_rows: int,
+        digest: str,
+        prefix_digest: Optional[Callable[[int], Optional[str]]] = None,
+    ) -> slice:
+        """
+        Skips over n_rows which were already hashed (e.g. by the games store), rather
+        than pushing them. Returns the rows which are ready to rate, as push() does.
+        NOTE: only in place of pushing the rows, not along with it
+
+        :param prefix_digest: Gets the hash of the first n rows (None if unknown), so
+            rows appended since the checkpoint are resumed rather than replayed
+        """
+        self.n_rows, self._skipped_digest = n_rows, digest
+
+        if not self.n_rows_applied:
+            return slice(0, n_rows)
+        if n_rows == self.n_rows_applied and self._digest in {None, digest}:
+            return slice(0)
+        if n_rows > self.n_rows_applied and (
+            not self._digest
+            or (prefix_digest and prefix_digest(self.n_rows_applied) == self._digest)
+        ):
+            return slice(self.n_rows_applied, n_rows)
+        return self._stale()
+
+    def finish(self) -> slice:
+        """Returns the rows left to rate, all of them if some were removed"""
+        if self.n_rows < self.n_rows_applied:
+            return self._stale()
+        return slice(0)
+
+    def save(self) -> None:
+        """Persists the players, and the hash of all the rows pushed"""
+        write_checkpoint(
+            self.players,
+            self.n_rows,
+            self.digest,
+            self.mode,
+            options=self.options,
+        )
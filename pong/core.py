@@ -5,79 +5,311 @@ Created on Fri 13 Jan 2023 01∶14∶59 PM EST
 @author: shane
 Shared utilities by both singles and doubles interface
 """
+import codecs
 import csv
+import hashlib
+import heapq
 import os
-import sys
 import time
 from io import StringIO
-from typing import Dict, List
-
-import requests
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from pong import (
     CSV_GAMES_FILE_PATHS,
-    CSV_GAMES_URLS,
     CSV_RATINGS_FILE_PATHS,
     DOUBLES,
     SINGLES,
+    atomic_write,
+    lazy_import,
 )
-from pong.env import PLAYERS_PRESENT
+from pong.env import PLAYERS_PRESENT, RETAIN_GAMES, sheet_config, sheet_url
+from pong.fetch import fetch_sheet, fetch_sheets, iter_file, open_sheet
 from pong.models import Player
+from pong.store import GameStore
+
+if TYPE_CHECKING:
+    import requests
+else:
+    requests = lazy_import("requests")
+
+T = TypeVar("T")
+
+
+class DownloadInterrupted(Exception):
+    """The sheet's download dropped part way through, its rows are incomplete"""
+
+
+def csv_games_url(mode: str) -> str:
+    """Hard-coded URL values pointing to our sheet (singles or doubles)"""
+    _override = sheet_url(mode)
+    if _override:
+        return _override
 
+    key, gid_singles, gid_doubles = sheet_config()
+    gid = gid_singles if mode == SINGLES else gid_doubles
 
-def get_google_sheet(url: str) -> bytes:
+    return (
+        "https://docs.google.com/spreadsheet/ccc"
+        f"?key={key}"
+        f"&gid={gid}"
+        "&output=csv"
+    )
+
+
+def read_csv_rows(csv_text: str) -> List[Dict[str, str]]:
+    """Parses the CSV text into rows, with lower case headers"""
+    return list(csv_reader(StringIO(csv_text)))
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
     """
-    Returns a byte array (string) of the Google Sheet in CSV format
+    Decodes the (UTF-8) chunks as they arrive, and yields whole lines.
+    NOTE: a character, or line, may be split across chunks. Line endings are kept,
+      and only split on "\n" (so a quoted field may still span several lines)
     """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    _partial = str()
 
-    response = requests.get(url, timeout=2)
-    if response.status_code != 200:
-        print(response.content.decode())
-        sys.exit(f"Wrong status code, {response.status_code}")
+    for chunk in chunks:
+        *_lines, _partial = (_partial + decoder.decode(chunk)).split("\n")
+        for _line in _lines:
+            yield _line + "\n"
 
-    return bytes(response.content)
+    _partial += decoder.decode(b"", final=True)
+    if _partial:
+        yield _partial
 
 
-def cache_csv_file(_csv_bytes_output: bytes, mode: str) -> None:
+def csv_reader(lines: Iterable[str]) -> csv.DictReader:
+    """Returns a csv.DictReader() object, with lower case headers"""
+    reader = csv.DictReader(lines)
+    reader.fieldnames = [field.strip().lower() for field in reader.fieldnames or []]
+    return reader
+
+
+def build_csv_readers(modes: List[str]) -> Dict[str, csv.DictReader]:
     """
-    Persists the CSV file into the git commit history.
-    Fall back calculation in case sheets.google.com is unreachable.
-    (Manually) verify no nefarious edits are made.
+    Fetches the sheets at once (see: pong.fetch), returns a csv.reader() for each.
+    Falls back to the cached CSV file for any which couldn't be fetched.
     """
-    csv_path = CSV_GAMES_FILE_PATHS[mode]
-    with open(csv_path, "wb") as _file:
-        _file.write(_csv_bytes_output)
+    t_start = time.time()
+    results = fetch_sheets({mode: csv_games_url(mode) for mode in modes})
 
+    readers = {}
+    for mode, result in results.items():
+        if isinstance(result, bytes):
+            readers[mode] = csv_reader(StringIO(result.decode()))
+            continue
 
-def build_csv_reader(mode: str) -> csv.DictReader:
-    """Returns a csv.reader() object"""
-    url = CSV_GAMES_URLS[mode]
-    t_start = time.time()
+        print(repr(result))
+        print()
+        print("WARN: failed to fetch Google sheet, falling back to cached CSV files...")
+        csv_path = CSV_GAMES_FILE_PATHS[mode]
 
-    try:
-        _csv_bytes_output = get_google_sheet(url)
-        _csv_file = StringIO(_csv_bytes_output.decode())
-        cache_csv_file(_csv_bytes_output, mode=mode)
+        with open(csv_path, encoding="utf-8") as _f:
+            readers[mode] = csv_reader(StringIO(_f.read()))
+
+    t_delta = time.time() - t_start
+    print(f"Cached {', '.join(modes)} CSV file in {round(t_delta * 1000, 1)} ms")
+    return readers
 
-        reader = csv.DictReader(_csv_file)
-        reader.fieldnames = [field.strip().lower() for field in reader.fieldnames or []]
 
-    except (
-        requests.exceptions.ConnectionError,
-        requests.exceptions.ReadTimeout,
-    ) as err:
+def open_csv_chunks(mode: str) -> Optional[Iterator[bytes]]:
+    """
+    Requests the sheet (see: pong.fetch), returns its chunks as they're downloaded.
+    None if it's unchanged, or if it couldn't be reached (the cached CSV file is used)
+    """
+    try:
+        return open_sheet(csv_games_url(mode), mode)
+    except requests.exceptions.RequestException as err:
         print(repr(err))
         print()
         print("WARN: failed to fetch Google sheet, falling back to cached CSV files...")
-        csv_path = CSV_GAMES_FILE_PATHS[mode]
+        return None
 
-        with open(csv_path, encoding="utf-8") as _f:
-            reader = csv.DictReader(_f)
-        reader.fieldnames = [field.strip().lower() for field in reader.fieldnames or []]
+
+def _stream_csv_chunks(
+    mode: str, chunks: Optional[Iterator[bytes]], t_start: float
+) -> Iterator[bytes]:
+    """
+    Passes the sheet's chunks through, or reads the cached CSV file if None.
+    NOTE: raises DownloadInterrupted if the connection drops, after some rows were
+      already yielded. The caller should start over, e.g. load_games(offline=True)
+    """
+    if chunks is None:
+        yield from iter_file(CSV_GAMES_FILE_PATHS[mode])
+    else:
+        try:
+            yield from chunks
+        except requests.exceptions.RequestException as err:
+            print(repr(err))
+            print()
+            print("WARN: download dropped, starting over from cached CSV files...")
+            raise DownloadInterrupted(mode) from err
 
     t_delta = time.time() - t_start
     print(f"Cached {mode} CSV file in {round(t_delta * 1000, 1)} ms")
-    return reader
+
+
+def build_csv_reader(mode: str) -> Iterator[Dict[str, str]]:
+    """
+    Returns a csv.reader() object, which parses rows as the sheet is streamed in.
+    So rating starts before the download finishes, and the sheet is never held in
+    memory whole.
+    """
+    t_start = time.time()
+    chunks = open_csv_chunks(mode)
+    return csv_reader(iter_lines(_stream_csv_chunks(mode, chunks, t_start)))
+
+
+def load_games(
+    mode: str, offline: bool = False
+) -> Tuple[Optional[GameStore], Iterator[Dict[str, str]]]:
+    """
+    Gets the games store (see: pong.store) if the sheet is unchanged since it was
+    written, or if it couldn't be reached. Otherwise the rows, as they're streamed in.
+    Returns (store, no rows) or (None, rows)
+    :param offline: Don't request the sheet, e.g. after a DownloadInterrupted
+    """
+    t_start = time.time()
+    chunks = None if offline else open_csv_chunks(mode)
+
+    if chunks is None:
+        store = GameStore.load(mode)
+        if store:
+            t_delta = time.time() - t_start
+            print(f"Loaded {mode} games store in {round(t_delta * 1000, 1)} ms")
+            return store, iter([])
+
+    return None, csv_reader(iter_lines(_stream_csv_chunks(mode, chunks, t_start)))
+
+
+class SheetPoller:  # pylint: disable=too-few-public-methods
+    """
+    Polls the sheet (or a stand-in URL) for watch mode.
+    Nothing is parsed if the content hash is unchanged, and rows appended to the
+    end are told apart from edits to older rows (which need a full replay).
+    """
+
+    def __init__(self, mode: str, url: Optional[str] = None) -> None:
+        self.mode = mode
+        self.url = url or csv_games_url(mode)
+        self.digest: Optional[str] = None
+        self.rows: List[Dict[str, str]] = []
+
+    def poll(self) -> Optional[Tuple[List[Dict[str, str]], int]]:
+        """
+        Fetches (or revalidates) the sheet, returns None if it's unchanged, or if
+        it's unreachable.
+        Otherwise (rows, n_rows_unchanged), the leading rows which were seen before.
+        """
+        try:
+            _csv_bytes_output = fetch_sheet(self.url, mode=self.mode)
+        except (requests.exceptions.RequestException, OSError) as err:
+            print(f"WARN: failed to fetch {self.mode} sheet, {repr(err)}")
+            return None
+
+        _digest = hashlib.sha256(_csv_bytes_output).hexdigest()
+        if _digest == self.digest:
+            return None
+
+        rows = read_csv_rows(_csv_bytes_output.decode())
+        n_rows_unchanged = len(self.rows)
+        if rows[:n_rows_unchanged] != self.rows:
+            n_rows_unchanged = 0
+
+        self.digest, self.rows = _digest, rows
+        return rows, n_rows_unchanged
+
+
+def watch(
+    poller: SheetPoller,
+    run: Callable[..., Dict[str, Player]],
+    interval: float,
+    n_polls: Optional[int] = None,
+) -> None:
+    """
+    Polls every interval seconds, and only re-runs when the sheet has changed.
+    Runs forever, unless n_polls is given.
+
+    :param run: Called as run(rows, resume=(players, n_rows_applied) or None),
+        returns all the players. Only the appended rows are left to rate.
+    """
+    players: Dict[str, Player] = {}
+
+    i_poll = 0
+    while n_polls is None or i_poll < n_polls:
+        if i_poll:
+            time.sleep(interval)
+        i_poll += 1
+
+        _update = poller.poll()
+        if _update is None:
+            continue
+
+        # NOTE: after an edit to older rows, the checkpoint is stale (full replay)
+        rows, n_rows_unchanged = _update
+        players = run(
+            rows, resume=(players, n_rows_unchanged) if n_rows_unchanged else None
+        )
+
+
+class TopK(Generic[T]):
+    """
+    Streaming top-K selector (a bounded min heap), so memory stays O(K).
+    Same result as sorted(items, key=key, reverse=True)[:k], ties are kept in the
+    order they were pushed. A K below 1 keeps nothing (same as slicing [:0]).
+    """
+
+    def __init__(self, k: int, key: Callable[[T], Any]) -> None:
+        self.k = k
+        self.key = key
+        self.n_pushed = 0
+        self._heap: List[Tuple[Any, int, T]] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def floor(self) -> Optional[Any]:
+        """Gets the smallest key kept, once full (anything not above it is dropped)"""
+        if not self._heap or len(self._heap) < self.k:
+            return None
+        return self._heap[0][0]
+
+    def push(self, item: T) -> None:
+        """Offers an item, keeping it if it's among the top K so far"""
+        # NOTE: negative count, so earlier items win ties (as with a stable sort)
+        _entry = (self.key(item), -self.n_pushed, item)
+        self.n_pushed += 1
+
+        if self.k < 1:
+            return
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, _entry)
+        elif _entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, _entry)
+
+    def extend(self, items: Iterable[T]) -> None:
+        """Offers several items"""
+        for item in items:
+            self.push(item)
+
+    def items(self) -> List[T]:
+        """Gets the top K items, best first"""
+        return [x[2] for x in sorted(self._heap, key=lambda x: x[:2], reverse=True)]
 
 
 def get_or_create_player_by_name(players: Dict[str, Player], username: str) -> Player:
@@ -85,7 +317,7 @@ def get_or_create_player_by_name(players: Dict[str, Player], username: str) -> P
     if username in players:
         return players[username]
 
-    _player = Player(username)
+    _player = Player(username, retain_games=RETAIN_GAMES)
     players[username] = _player
     return _player
 
@@ -123,14 +355,9 @@ def filter_players(_sorted_players: List[Player]) -> List[Player]:
     return _sorted_players
 
 
-def add_club(_player: Player, club: str, mode: str) -> None:
-    """Adds a club tally to the club appearances dictionary"""
-    _appearances = _player.club_appearances[mode]
-
-    if club in _appearances:
-        _appearances[club] += 1
-    else:
-        _appearances[club] = 1
+def add_club(_player: Player, club: int, mode: str) -> None:
+    """Adds a club tally (by club ID) to the club appearances"""
+    _player.record(mode).add_club(club)
 
 
 def cache_ratings_csv_file(sorted_players: List[Player], mode: str) -> None:
@@ -146,7 +373,7 @@ def cache_ratings_csv_file(sorted_players: List[Player], mode: str) -> None:
                 p.rating_singles.mu,
                 p.rating_singles.phi,
                 p.rating_singles.sigma,
-                " ".join(str(round(x.mu)) for x in p.ratings[SINGLES]),
+                " ".join(str(round(x)) for x in p.peek_record(SINGLES).history_mu),
                 "|".join(p.clubs()),
             )
             for p in sorted_players
@@ -158,14 +385,14 @@ def cache_ratings_csv_file(sorted_players: List[Player], mode: str) -> None:
                 p.username,
                 p.rating_doubles.mu,
                 p.rating_doubles.sigma,
-                " ".join(str(round(x.mu, 1)) for x in p.ratings[DOUBLES]),
+                " ".join(str(round(x, 1)) for x in p.peek_record(DOUBLES).history_mu),
                 "|".join(p.clubs()),
             )
             for p in sorted_players
         ]
 
     # Write the rows
-    with open(_file_path, "w", encoding="utf-8") as _f:
+    with atomic_write(_file_path) as _f:
         csv_writer = csv.writer(_f)
 
         csv_writer.writerow(headers)
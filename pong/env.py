@@ -6,6 +6,8 @@ Created on Mon Jan 16 17:14:19 2023
 Loads ENVIRONMENT VARIABLES from file: `.env`
 """
 import os
+import sys
+from typing import Optional, Tuple
 
 import dotenv
 
@@ -20,6 +22,59 @@ if os.environ.get("PONG_PLAYERS"):
 
 MODE_SINGLES = not int(os.environ.get("PONG_DOUBLES") or 0)
 
-PONG_SHEET_KEY = os.environ["PONG_SHEET_KEY"]
-PONG_SHEET_GID_SINGLES = int(os.environ["PONG_SHEET_GID_SINGLES"])
-PONG_SHEET_GID_DOUBLES = int(os.environ["PONG_SHEET_GID_DOUBLES"])
+# Rate each set (e.g. 2-1) in a single update, rather than game by game
+RATE_PER_SET = bool(int(os.environ.get("PONG_RATE_PER_SET") or 0))
+
+# Rate each window of N days as one Glicko-2 rating period (0 = rate game by game)
+RATING_PERIOD_DAYS = int(os.environ.get("PONG_RATING_PERIOD_DAYS") or 0)
+
+# Keep every game's opponent & partner ratings in memory (not just running totals)
+RETAIN_GAMES = bool(int(os.environ.get("PONG_RETAIN_GAMES") or 0))
+
+# Processes used for the doubles match up search (1 = search in this process)
+N_WORKERS = int(os.environ.get("PONG_WORKERS") or 1)
+
+# Session scheduler (doubles), tables available and rounds to play
+N_TABLES = int(os.environ.get("PONG_TABLES") or 4)
+N_ROUNDS = int(os.environ.get("PONG_ROUNDS") or 6)
+
+# Tournament simulator: format (elimination or round_robin), sims & match length
+TOURNAMENT_FORMAT = os.environ.get("PONG_FORMAT") or "elimination"
+N_SIMULATIONS = int(os.environ.get("PONG_SIMULATIONS") or 100000)
+BEST_OF = int(os.environ.get("PONG_BEST_OF") or 3)
+
+# Ratings service: listen on host:port, or on a Unix socket (if a path is set)
+SERVE_HOST = os.environ.get("PONG_HOST") or "127.0.0.1"
+SERVE_PORT = int(os.environ.get("PONG_PORT") or 8008)
+SERVE_SOCKET = os.environ.get("PONG_SOCKET")
+
+
+# Fetching the sheet: timeout (seconds) per attempt, and retries (with backoff)
+FETCH_TIMEOUT = float(os.environ.get("PONG_FETCH_TIMEOUT") or 5)
+FETCH_RETRIES = int(os.environ.get("PONG_FETCH_RETRIES") or 2)
+
+# Watch mode (--watch), seconds between polls of the sheet
+WATCH_INTERVAL = float(os.environ.get("PONG_WATCH_INTERVAL") or 60)
+
+
+def sheet_url(mode: str) -> Optional[str]:
+    """
+    Gets a URL to read the games from instead of the Google Sheet, if one is set.
+    E.g. PONG_SHEET_URL_SINGLES=file:///tmp/games.csv, or a local HTTP stand-in.
+    """
+    return os.environ.get(f"PONG_SHEET_URL_{mode.upper()}")
+
+
+def sheet_config() -> Tuple[str, int, int]:
+    """
+    Gets the Google Sheet (key, singles gid, doubles gid), e.g. from the .env file.
+    Only checked when fetching, so offline commands run without them.
+    """
+    try:
+        return (
+            os.environ["PONG_SHEET_KEY"],
+            int(os.environ["PONG_SHEET_GID_SINGLES"]),
+            int(os.environ["PONG_SHEET_GID_DOUBLES"]),
+        )
+    except KeyError as err:
+        sys.exit(f"Missing env var {err}, needed to fetch the sheet (see: .env)")
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 01∶07∶44 AM EDT
+
+@author: shane
+Fetch layer for the sheets. One shared requests.Session (pooled keep-alive
+connections), with retries & backoff, and conditional requests (ETag, or
+If-Modified-Since) revalidated against the cached CSV files.
+Most runs find the sheet unchanged, and get a 304 (no body) back.
+Otherwise the sheet is streamed in chunks, and tee'd into the cache on the way.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Union,
+)
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from pong import (
+    CSV_GAMES_FILE_PATHS,
+    CSV_GAMES_VALIDATORS_FILE_PATHS,
+    atomic_write,
+    lazy_import,
+)
+from pong.env import FETCH_RETRIES, FETCH_TIMEOUT
+
+if TYPE_CHECKING:
+    import requests
+else:
+    requests = lazy_import("requests")
+
+# Bytes per chunk, when streaming the sheet
+CHUNK_SIZE = 1 << 16
+
+# Retried (with backoff) as well as connection errors, e.g. rate limited
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@functools.lru_cache(maxsize=None)
+def session() -> requests.Session:
+    """Gets the shared session, its connections are kept alive between fetches"""
+    _retry = requests.adapters.Retry(
+        total=FETCH_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+    )
+    _adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=8, max_retries=_retry
+    )
+
+    _session = requests.Session()
+    _session.mount("https://", _adapter)
+    _session.mount("http://", _adapter)
+    return _session
+
+
+def iter_file(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Reads a file in chunks"""
+    with open(file_path, "rb") as _f:
+        yield from iter(functools.partial(_f.read, chunk_size), b"")
+
+
+def hash_file(file_path: str) -> Optional[str]:
+    """Gets the SHA-256 of a file (read in chunks), or None if it doesn't exist"""
+    if not os.path.isfile(file_path):
+        return None
+
+    _hash = hashlib.sha256()
+    for chunk in iter_file(file_path):
+        _hash.update(chunk)
+    return _hash.hexdigest()
+
+
+def tee_to_cache(chunks: Iterable[bytes], mode: str) -> Iterator[bytes]:
+    """
+    Passes the chunks through, while persisting the CSV file into the git commit
+    history. Fall back calculation in case sheets.google.com is unreachable.
+    (Manually) verify no nefarious edits are made.
+    NOTE: the cache is only replaced once the stream is finished (not if abandoned)
+    """
+    csv_path = CSV_GAMES_FILE_PATHS[mode]
+    with atomic_write(csv_path, "wb") as _file:
+        for chunk in chunks:
+            _file.write(chunk)
+            yield chunk
+
+
+def load_validators(url: str, mode: str) -> Dict[str, str]:
+    """
+    Gets the ETag & Last-Modified the cached CSV file was served with.
+    Only if they're for the same URL, and the cached file hasn't changed since.
+    """
+    _file_path = CSV_GAMES_VALIDATORS_FILE_PATHS[mode]
+    if not os.path.isfile(_file_path):
+        return {}
+
+    with open(_file_path, encoding="utf-8") as _f:
+        validators: Dict[str, str] = json.load(_f)
+
+    if validators.get("url") != url or validators.get("sha256") != hash_file(
+        CSV_GAMES_FILE_PATHS[mode]
+    ):
+        return {}
+    return validators
+
+
+def save_validators(
+    url: str, mode: str, digest: str, headers: Mapping[str, str]
+) -> None:
+    """Saves the response's ETag & Last-Modified, for the next conditional request"""
+    validators = {
+        "url": url,
+        "sha256": digest,
+        "etag": headers.get("ETag", str()),
+        "last_modified": headers.get("Last-Modified", str()),
+    }
+
+    with atomic_write(CSV_GAMES_VALIDATORS_FILE_PATHS[mode]) as _f:
+        json.dump(validators, _f)
+
+
+def open_sheet(
+    url: str, mode: str, chunk_size: int = CHUNK_SIZE
+) -> Optional[Iterator[bytes]]:
+    """
+    Requests the Google Sheet in CSV format, returns its chunks as they're downloaded
+    (and cached). Sends the saved validators, returns None if the sheet is unchanged
+    (the cached file is current). A file:// URL is read from disk (e.g. a stand-in)
+    """
+    if url.startswith("file://"):
+        _file_path = url2pathname(urlsplit(url).path)
+        return tee_to_cache(iter_file(_file_path, chunk_size), mode)
+
+    validators = load_validators(url, mode)
+
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = session().get(url, headers=headers, timeout=FETCH_TIMEOUT, stream=True)
+    if response.status_code == 304 and validators:
+        response.close()
+        return None
+    if response.status_code != 200:
+        # NOTE: raised (not exited), so callers can fall back on the cached file
+        with response:
+            response.raise_for_status()
+            raise requests.HTTPError(
+                f"Wrong status code, {response.status_code}", response=response
+            )
+
+    return _stream_response(response, url, mode, chunk_size)
+
+
+def _stream_response(
+    response: requests.Response, url: str, mode: str, chunk_size: int
+) -> Iterator[bytes]:
+    """Yields the body, caching it (and its validators, once finished)"""
+    with response:
+        _hash = hashlib.sha256()
+        for chunk in tee_to_cache(response.iter_content(chunk_size), mode):
+            _hash.update(chunk)
+            yield chunk
+
+    save_validators(url, mode, _hash.hexdigest(), response.headers)
+
+
+def stream_sheet(
+    url: str, mode: str, chunk_size: int = CHUNK_SIZE
+) -> Generator[bytes, None, None]:
+    """
+    Yields the Google Sheet in CSV format, chunk by chunk as it's downloaded, and
+    caches it. An unchanged sheet is read from the cache.
+    """
+    chunks = open_sheet(url, mode, chunk_size)
+    if chunks is None:
+        chunks = iter_file(CSV_GAMES_FILE_PATHS[mode], chunk_size)
+    yield from chunks
+
+
+def fetch_sheet(url: str, mode: str) -> bytes:
+    """Returns a byte array (string) of the Google Sheet in CSV format, and caches it"""
+    return b"".join(stream_sheet(url, mode))
+
+
+def fetch_sheets(urls: Dict[str, str]) -> Dict[str, Union[bytes, Exception]]:
+    """
+    Fetches several sheets at once (on threads, sharing the session's pool).
+    Returns the CSV bytes for each mode, or the error it failed with.
+    """
+    results: Dict[str, Union[bytes, Exception]] = {}
+
+    with ThreadPoolExecutor(max_workers=max(len(urls), 1)) as executor:
+        futures = {
+            mode: executor.submit(fetch_sheet, url, mode) for mode, url in urls.items()
+        }
+        for mode, future in futures.items():
+            try:
+                results[mode] = future.result()
+            except (requests.exceptions.RequestException, OSError) as err:
+                # NOTE: OSError for a file:// stand-in, e.g. a missing file
+                results[mode] = err
+
+    return results
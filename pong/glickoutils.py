@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 10∶03∶17 AM EDT
+
+@author: shane
+Helper functions for Glicko 2 algo.
+Batch (NumPy) engine, which rates all the players in a rating period at once.
+Matrices of P(win), Δμ and pooled RD for every pair of players, for match ups.
+http://www.glicko.net/glicko/glicko2.pdf
+"""
+import hashlib
+import math
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# pylint: disable=invalid-name
+
+# Conversion between the Glicko (1500 ± 350) and Glicko-2 (0 ± 2.01) scales
+RATIO = 173.7178
+
+
+class Glicko2Batch:
+    """
+    Vectorized Glicko-2, operating on arrays of (mu, phi, sigma), one per player.
+    Same defaults & steps as pong.glicko2, but one call rates a whole period.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        mu: float = 1500.0,
+        phi: float = 350.0,
+        sigma: float = 0.06,
+        tau: float = 1.0,
+        epsilon: float = 0.000001,
+    ) -> None:
+        self.mu = mu
+        self.phi = phi
+        self.sigma = sigma
+        self.tau = tau
+        self.epsilon = epsilon
+
+    @classmethod
+    def from_env(cls, env: Any) -> "Glicko2Batch":
+        """Copies the system constants from a (scalar) glicko2.Glicko2() engine"""
+        return cls(
+            mu=env.mu,
+            phi=env.phi,
+            sigma=env.sigma,
+            tau=env.tau,
+            epsilon=env.epsilon,
+        )
+
+    def determine_sigma(
+        self,
+        phi: np.ndarray,
+        sigma: np.ndarray,
+        difference: np.ndarray,
+        variance: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Step 5. Solves for the new volatility, sigma', with the Illinois algorithm.
+        All inputs are on the Glicko-2 scale, the iteration runs on every player
+        at once (converged players are masked out).
+        """
+        tau_2 = self.tau**2
+        difference_2 = difference**2
+        phi_2_variance = phi**2 + variance
+        alpha: np.ndarray = np.log(sigma**2)
+
+        def _f(x: np.ndarray, mask: Any = slice(None)) -> np.ndarray:
+            _exp_x = np.exp(x)
+            _tmp = phi_2_variance[mask] + _exp_x
+            return (  # type: ignore
+                _exp_x * (difference_2[mask] - _tmp) / (2 * _tmp**2)
+                - (x - alpha[mask]) / tau_2
+            )
+
+        # Set the initial values of the iterative algorithm
+        a: np.ndarray = alpha.copy()
+        b: np.ndarray = np.empty_like(a)
+        _large = difference_2 > phi_2_variance
+        b[_large] = np.log(difference_2[_large] - phi_2_variance[_large])
+
+        k: np.ndarray = np.ones_like(a)
+        _small = ~_large
+        _search = _small & (_f(alpha - math.sqrt(tau_2)) < 0)
+        while _search.any():
+            k[_search] += 1
+            _search[_search] = (
+                _f(alpha[_search] - k[_search] * math.sqrt(tau_2), _search) < 0
+            )
+        b[_small] = alpha[_small] - k[_small] * math.sqrt(tau_2)
+
+        # While |B-A| > e, carry out the iteration (only for unconverged players)
+        f_a, f_b = _f(a), _f(b)
+        _active = np.abs(b - a) > self.epsilon
+        while _active.any():
+            _a, _b, _f_a, _f_b = a[_active], b[_active], f_a[_active], f_b[_active]
+            _c = _a + (_a - _b) * _f_a / (_f_b - _f_a)
+            _f_c = _f(_c, _active)
+
+            _flip = _f_c * _f_b < 0
+            a[_active] = np.where(_flip, _b, _a)
+            f_a[_active] = np.where(_flip, _f_b, _f_a / 2)
+            b[_active], f_b[_active] = _c, _f_c
+
+            _active = np.abs(b - a) > self.epsilon
+
+        return np.exp(a / 2)
+
+    def rate_period(
+        self,
+        mu: np.ndarray,
+        phi: np.ndarray,
+        sigma: np.ndarray,
+        winners: np.ndarray,
+        losers: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Rates one rating period, returns the new (mu, phi, sigma) arrays.
+
+        :param mu: Ratings of all the players, e.g. 1500.0
+        :param phi: Rating deviations of all the players, e.g. 350.0
+        :param sigma: Volatilities of all the players, e.g. 0.06
+        :param winners: Index of the winning player, one entry per game
+        :param losers: Index of the losing player, one entry per game
+
+        Players without any games only have their deviation inflated (Step 6).
+        """
+        n_players = len(mu)
+
+        # Step 2. Convert onto the Glicko-2 scale
+        mu_s: np.ndarray = (mu - self.mu) / RATIO
+        phi_s: np.ndarray = phi / RATIO
+
+        # Each game is seen once from the winner's side, and once from the loser's
+        _player = np.concatenate((winners, losers))
+        _opponent = np.concatenate((losers, winners))
+        _score = np.concatenate((np.ones(len(winners)), np.zeros(len(losers))))
+
+        # Step 3 & 4. Compute the variance (v) and the improvement (difference)
+        impact = 1 / np.sqrt(1 + 3 * phi_s[_opponent] ** 2 / math.pi**2)
+        expected_score = 1 / (1 + np.exp(-impact * (mu_s[_player] - mu_s[_opponent])))
+        variance_inv = np.bincount(
+            _player,
+            weights=impact**2 * expected_score * (1 - expected_score),
+            minlength=n_players,
+        )
+        difference_sum = np.bincount(
+            _player,
+            weights=impact * (_score - expected_score),
+            minlength=n_players,
+        )
+
+        # Idle players, only do Step 6
+        new_mu_s: np.ndarray = mu_s.copy()
+        new_sigma: np.ndarray = sigma.copy()
+        new_phi_s: np.ndarray = np.sqrt(phi_s**2 + sigma**2)
+
+        _played = variance_inv > 0
+        if _played.any():
+            variance = 1 / variance_inv[_played]
+            difference = difference_sum[_played] * variance
+
+            # Step 5. Determine the new volatility
+            _sigma = self.determine_sigma(
+                phi_s[_played], sigma[_played], difference, variance
+            )
+
+            # Step 6 & 7. Update the rating deviation, then the rating
+            _phi_star = np.sqrt(phi_s[_played] ** 2 + _sigma**2)
+            _phi = 1 / np.sqrt(1 / _phi_star**2 + 1 / variance)
+
+            new_mu_s[_played] = mu_s[_played] + _phi**2 * difference_sum[_played]
+            new_phi_s[_played] = _phi
+            new_sigma[_played] = _sigma
+
+        # Step 8. Convert back to the original scale
+        return new_mu_s * RATIO + self.mu, new_phi_s * RATIO, new_sigma
+
+
+class SinglesMatrix:
+    """
+    P(win), Δμ and pooled RD for every pair of players (rows vs. columns).
+    Computed in one pass with broadcasting, rather than pair by pair, e.g.
+      p_win[i, j] = expect_score(i, j, reduce_impact(j)), on the Glicko-2 scale
+    """
+
+    def __init__(
+        self,
+        usernames: List[str],
+        p_win: np.ndarray,
+        delta_mu: np.ndarray,
+        pooled_rd: np.ndarray,
+    ) -> None:
+        self.usernames = usernames
+        self.index: Dict[str, int] = {x: i for i, x in enumerate(usernames)}
+        self.p_win = p_win
+        self.delta_mu = delta_mu
+        self.pooled_rd = pooled_rd
+
+    @classmethod
+    def from_ratings(
+        cls, usernames: List[str], mu: np.ndarray, phi: np.ndarray, mu_0: float = 1500.0
+    ) -> "SinglesMatrix":
+        """Computes the matrices from the players' (mu, phi) arrays"""
+        mu_s = (mu - mu_0) / RATIO
+        phi_s = phi / RATIO
+        impact = 1 / np.sqrt(1 + 3 * phi_s**2 / math.pi**2)
+
+        p_win = 1 / (1 + np.exp(-impact[None, :] * (mu_s[:, None] - mu_s[None, :])))
+        delta_mu = mu[:, None] - mu[None, :]
+        pooled_rd = np.sqrt((phi[:, None] ** 2 + phi[None, :] ** 2) / 2)
+
+        return cls(usernames, p_win, delta_mu, pooled_rd)
+
+    @staticmethod
+    def key(usernames: List[str], mu: np.ndarray, phi: np.ndarray) -> str:
+        """Hashes the ladder, so a saved matrix is only reused for the same one"""
+        _hash = hashlib.sha256("\n".join(usernames).encode())
+        _hash.update(np.ascontiguousarray(mu, dtype=float).tobytes())
+        _hash.update(np.ascontiguousarray(phi, dtype=float).tobytes())
+        return _hash.hexdigest()
+
+    @classmethod
+    def load_or_build(
+        cls, usernames: List[str], mu: np.ndarray, phi: np.ndarray, file_path: str
+    ) -> "SinglesMatrix":
+        """Loads the saved matrices if the ladder is unchanged, or computes & saves"""
+        _key = cls.key(usernames, mu, phi)
+
+        if os.path.isfile(file_path):
+            with np.load(file_path) as _saved:
+                if str(_saved["key"]) == _key:
+                    return cls(
+                        usernames,
+                        _saved["p_win"],
+                        _saved["delta_mu"],
+                        _saved["pooled_rd"],
+                    )
+
+        matrix = cls.from_ratings(usernames, mu, phi)
+        np.savez(
+            file_path,
+            key=_key,
+            p_win=matrix.p_win,
+            delta_mu=matrix.delta_mu,
+            pooled_rd=matrix.pooled_rd,
+        )
+        return matrix
+
+    def p_game(self, username1: str, username2: str) -> float:
+        """Gets P(player 1 wins a game), averaged over both players' impact"""
+        i, j = self.index[username1], self.index[username2]
+        return float((self.p_win[i, j] + (1 - self.p_win[j, i])) / 2)
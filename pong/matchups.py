@@ -6,17 +6,22 @@ Created on Mon Jan 23 10:19:13 2023
 @author: shane
 Detailed information about requested match up(s)
 """
+from __future__ import annotations
+
 import csv
 import math
-from typing import Dict, Set, Tuple
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple
 
-import trueskill
 from tabulate import tabulate
 
-from pong import CSV_RATINGS_FILE_PATHS, DOUBLES, DRAW_PROB_DOUBLES, SINGLES
-from pong.consts import GAME_PERCENT_TO_POINT_PROB
+from pong import (
+    CSV_RATINGS_FILE_PATHS,
+    DOUBLES,
+    DRAW_PROB_DOUBLES,
+    SINGLES,
+    lazy_import,
+)
 from pong.core import print_subtitle, print_title
-from pong.glicko2 import glicko2
 from pong.models import Player
 from pong.probs import (
     n_fair_handicap_points,
@@ -25,8 +30,21 @@ from pong.probs import (
     p_deuce,
     p_deuce_win,
     p_match,
+    p_point,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+    import trueskill  # pylint: disable=import-error
+
+    from pong import glickoutils
+    from pong.glicko2 import glicko2
+else:
+    np = lazy_import("numpy")
+    trueskill = lazy_import("trueskill")
+    glickoutils = lazy_import("pong.glickoutils")
+    glicko2 = lazy_import("pong.glicko2.glicko2")
+
 
 def add_player_to_club(player: Player, club: str, clubs: Dict[str, Set[str]]) -> None:
     """Create a club (if it doesn't exist) and add a player to its list"""
@@ -51,10 +69,13 @@ def build_players() -> Tuple[Dict[str, Player], Dict[str, Player]]:
             player = Player(username=row["username"])
 
             # Set rating
-            player.ratings[SINGLES][0] = glicko2.Glicko2(
-                mu=float(row["mu"]),
-                phi=float(row["phi"]),
-                sigma=float(row["sigma"]),
+            player.reset_rating(
+                SINGLES,
+                glicko2.Glicko2().create_rating(
+                    mu=float(row["mu"]),
+                    phi=float(row["phi"]),
+                    sigma=float(row["sigma"]),
+                ),
             )
 
             # Populate player's clubs
@@ -72,9 +93,12 @@ def build_players() -> Tuple[Dict[str, Player], Dict[str, Player]]:
             player = Player(username=row["username"])
 
             # Set rating
-            player.ratings[DOUBLES][0] = trueskill.TrueSkill(
-                mu=float(row["mu"]),
-                sigma=float(row["sigma"]),
+            player.reset_rating(
+                DOUBLES,
+                trueskill.Rating(
+                    mu=float(row["mu"]),
+                    sigma=float(row["sigma"]),
+                ),
             )
 
             # Populate player's clubs
@@ -92,7 +116,7 @@ def _inverse_probs(
 ) -> Tuple[Dict[str, float], Dict[str, Dict[int, float]]]:
     """Returns common match / point / game metrics to both singles & doubles"""
 
-    prob_point = GAME_PERCENT_TO_POINT_PROB[round(prob_game * 10000)]
+    prob_point = p_point(prob_game)
 
     prob_match = {n: p_match(prob_game, n) for n in [2, 3, 4]}
     prob_win_at_least_1 = {
@@ -117,10 +141,15 @@ def _inverse_probs(
 
 
 def detailed_match_ups_singles(
-    username1: str, username2: str, players: Dict[str, Player]
+    username1: str,
+    username2: str,
+    players: Dict[str, Player],
+    matrix: Optional[glickoutils.SinglesMatrix] = None,
 ) -> None:
     """
     Print out stats for player1 vs. player2
+
+    :param matrix: Pairwise P(win) etc., computed for just these two if not given
     """
 
     # Only use singles ratings for this
@@ -130,22 +159,20 @@ def detailed_match_ups_singles(
     player1, player2 = players[username1], players[username2]
     rating1, rating2 = player1.rating_singles, player2.rating_singles
 
+    if matrix is None:
+        matrix = glickoutils.SinglesMatrix.from_ratings(
+            [username1, username2],
+            np.array([rating1.mu, rating2.mu]),
+            np.array([rating1.phi, rating2.phi]),
+        )
+    _i1, _i2 = matrix.index[username1], matrix.index[username2]
+
     # Calculate misc stats
-    _delta_mu = round(rating1.mu - rating2.mu)
-    _rd = int(round(math.sqrt((rating1.phi**2 + rating2.phi**2) / 2), -1))
+    _delta_mu = round(float(matrix.delta_mu[_i1, _i2]))
+    _rd = int(round(float(matrix.pooled_rd[_i1, _i2]), -1))
 
     # Calculate probabilities
-    prob_p1_game = glicko.expect_score(
-        glicko.scale_down(rating1),
-        glicko.scale_down(rating2),
-        glicko.reduce_impact(glicko.scale_down(rating2)),
-    )
-    prob_p2_game = glicko.expect_score(
-        glicko.scale_down(rating2),
-        glicko.scale_down(rating1),
-        glicko.reduce_impact(glicko.scale_down(rating1)),
-    )
-    prob_game = (prob_p1_game + (1 - prob_p2_game)) / 2
+    prob_game = matrix.p_game(username1, username2)
 
     inverse_probs_pts, inverse_probs_match = _inverse_probs(prob_game)
 
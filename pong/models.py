@@ -7,15 +7,40 @@ Game model used for players, location, date, outcome, etc.
 Player model used for singles & doubles ratings, username, wins/losses, etc.
 Club model used for grouping games and players to location names.
 """
+from __future__ import annotations
+
+import abc
+import functools
 import sys
+from array import array
 from datetime import date
-from typing import Dict, List, Set, Union
-
-import asciichartpy  # pylint: disable=import-error
-import trueskill  # pylint: disable=import-error
-
-from pong import DOUBLES, DRAW_PROB_DOUBLES, SINGLES
-from pong.glicko2 import glicko2
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from pong import DOUBLES, DRAW_PROB_DOUBLES, SINGLES, lazy_import
+from pong.registry import CLUBS, PLAYERS
+
+# Rating & plotting libraries load on first use (not needed to just read players)
+if TYPE_CHECKING:
+    import asciichartpy  # pylint: disable=import-error
+    import trueskill  # pylint: disable=import-error
+
+    from pong.glicko2 import glicko2
+else:
+    asciichartpy = lazy_import("asciichartpy")
+    trueskill = lazy_import("trueskill")
+    glicko2 = lazy_import("pong.glicko2.glicko2")
 
 _PONG_DET = "Pong Det"
 CLUB_DICT = {
@@ -28,16 +53,52 @@ CLUB_DICT = {
     "Chinese Community Center (Madison Heights)": "ACA",
 }
 
+
+# Any kind of games (singles or doubles)
+G = TypeVar("G", bound="Games")
+
+
+@functools.lru_cache(maxsize=None)
+def _glicko() -> glicko2.Glicko2:
+    """Rating environment (singles), shared by all players & created on first use"""
+    return glicko2.Glicko2()
+
+
+@functools.lru_cache(maxsize=None)
+def _trueskill() -> trueskill.TrueSkill:
+    """Rating environment (doubles), shared by all players & created on first use"""
+    return trueskill.TrueSkill(draw_probability=DRAW_PROB_DOUBLES)
+
+
+def _default_rating(mode: str) -> Union[glicko2.Rating, trueskill.Rating]:
+    """Gets the starting rating for a mode"""
+    if mode == SINGLES:
+        return _glicko().create_rating()
+    return _trueskill().create_rating()
+
+
 # pylint: disable=too-few-public-methods
 
 
+def _round_mu(rating: float, mode: str) -> Union[int, float]:
+    """Rounds a rating for display, e.g. 1500 (singles) or 25.3 (doubles)"""
+    if mode == SINGLES:
+        return round(rating)
+    return round(rating, 1)
+
+
 class Club:
     """
     Model for storing the club name
+    NOTE: interned, there's one per location (see: Club.get)
     """
 
+    _instances: Dict[str, Club] = {}
+
     def __init__(self, name: str) -> None:
+        self.full_name = name
         self.name = CLUB_DICT[name]
+        self.club_id = CLUBS.intern(self.name)
 
         # Other values populated bi-directionally
         self.games = []  # type: ignore
@@ -52,8 +113,16 @@ class Club:
     def __hash__(self) -> int:
         return hash(self.name)
 
+    @classmethod
+    def get(cls, name: str) -> Club:
+        """Gets the (shared) club for a location, created the first time it's seen"""
+        club = cls._instances.get(name)
+        if club is None:
+            club = cls._instances[name] = cls(name)
+        return club
+
 
-class Games:
+class Games(abc.ABC):
     """
     Model for storing date, location, wins/losses, opponent, etc.
     TODO:
@@ -72,7 +141,33 @@ class Games:
             print(f"Must have high score first, invalid: {self._outcome}")
             sys.exit()
 
-        self.location = Club(row["location"])
+        self.location = Club.get(row["location"])
+
+    @classmethod
+    def from_values(
+        cls: Type[G],
+        day: date,
+        score: Tuple[int, int],
+        location: Club,
+        usernames: Sequence[str],
+    ) -> G:
+        """
+        Builds the games from values which were already parsed & validated, e.g. by
+        the games store (see: pong.store), rather than from a CSV row.
+        """
+        games = cls.__new__(cls)
+        games.date = day
+        games.score = score
+        games._outcome = f"{score[0]}-{score[1]}"  # pylint: disable=protected-access
+        games.location = location
+
+        for _i, _username in enumerate(usernames, start=1):
+            setattr(games, f"username{_i}", _username)
+        return games
+
+    @abc.abstractmethod
+    def usernames(self) -> List[str]:
+        """Gets the players' usernames, winner(s) first"""
 
     def winner_score(self) -> int:
         """Gets # games won by player 1 (or team 1)"""
@@ -108,6 +203,9 @@ class SinglesGames(Games):
     def __str__(self) -> str:
         return f"{self.date} {self.username1} vs. {self.username2} {self._outcome}"
 
+    def usernames(self) -> List[str]:
+        return [self.username1, self.username2]
+
 
 class DoublesGames(Games):
     """Doubles game specifics"""
@@ -130,6 +228,175 @@ class DoublesGames(Games):
             f"{self.username3} & {self.username4} {self._outcome}"
         )
 
+    def usernames(self) -> List[str]:
+        return [self.username1, self.username2, self.username3, self.username4]
+
+
+class PlayerRecord:
+    """
+    A player's ratings & tallies in one mode (singles or doubles).
+    History is kept in compact columns (array of doubles), rather than as a list of
+    rating objects. Only the current rating is kept as an object.
+    Wins & losses are tallied as running aggregates (count, sum, max, etc.), the raw
+    per-game opponent & partner ratings are only kept if retain_games is set.
+    NOTE: history_phi is only populated for singles (Glicko 2)
+    """
+
+    # Running aggregates, updated as games are applied (and saved in checkpoints)
+    AGGREGATES = (
+        "n_won",
+        "n_lost",
+        "sum_won",
+        "sum_lost",
+        "sum_partners",
+        "best_win",
+        "i_best_win",
+        "worst_loss",
+        "biggest_upset",
+    )
+
+    __slots__ = (
+        "rating",
+        "retain_games",
+        "history_mu",
+        "history_phi",
+        "history_sigma",
+        "opponents_won",
+        "opponents_lost",
+        "partners_mu",
+        "club_appearances",
+        "club_order",
+    ) + AGGREGATES
+
+    def __init__(
+        self,
+        rating: Union[glicko2.Rating, trueskill.Rating],
+        retain_games: bool = False,
+    ) -> None:
+        self.rating = rating
+        self.retain_games = retain_games
+
+        # NOTE: length of these is one longer than the other arrays
+        self.history_mu = array("d")
+        self.history_phi = array("d")
+        self.history_sigma = array("d")
+        self.push(rating)
+
+        # Opponent (or opposing team's average) mu, for each game won or lost
+        self.n_won = 0
+        self.n_lost = 0
+        self.sum_won = 0.0
+        self.sum_lost = 0.0
+
+        # Highest rated opponent beaten (and which game, counting from 0)
+        self.best_win: Optional[float] = None
+        self.i_best_win: Optional[int] = None
+
+        # Lowest rated opponent lost to, and biggest (opponent - own) mu beaten
+        self.worst_loss: Optional[float] = None
+        self.biggest_upset: Optional[float] = None
+
+        # Partner's mu summed over each game (doubles only)
+        self.sum_partners = 0.0
+
+        # Raw per-game values, only appended to in retain_games mode
+        self.opponents_won = array("d")
+        self.opponents_lost = array("d")
+        self.partners_mu = array("d")
+
+        # Used to decide home club. Counts indexed by club ID (see: pong.registry),
+        #  i.e. this player's row of the players × clubs matrix of appearances
+        self.club_appearances = array("L")
+        # Club IDs in the order first appeared at (the earliest one wins a tie)
+        self.club_order = array("L")
+
+    def push(self, rating: Union[glicko2.Rating, trueskill.Rating]) -> None:
+        """Appends a new rating to the history, and makes it the current rating"""
+        self.rating = rating
+        self.history_mu.append(rating.mu)
+        if hasattr(rating, "phi"):
+            self.history_phi.append(rating.phi)
+        self.history_sigma.append(rating.sigma)
+
+    def reset(self, rating: Union[glicko2.Rating, trueskill.Rating]) -> None:
+        """Replaces the history with a single starting rating, e.g. loaded from CSV"""
+        for _column in (self.history_mu, self.history_phi, self.history_sigma):
+            del _column[:]
+        self.push(rating)
+
+    @property
+    def n_games(self) -> int:
+        """Gets the number of games played"""
+        return self.n_won + self.n_lost
+
+    def add_wins(
+        self, opponent_mu: float, count: int = 1, own_mu: Optional[float] = None
+    ) -> None:
+        """
+        Tallies count games won against an opponent (or team average) rating
+        :param own_mu: Rating the upset is measured from, if not the current one
+        """
+        if not count:
+            return
+
+        if self.best_win is None or opponent_mu > self.best_win:
+            self.best_win = opponent_mu
+            self.i_best_win = self.n_games
+
+        _upset = opponent_mu - (self.rating.mu if own_mu is None else own_mu)
+        if self.biggest_upset is None or _upset > self.biggest_upset:
+            self.biggest_upset = _upset
+
+        self.n_won += count
+        self.sum_won += opponent_mu * count
+        if self.retain_games:
+            self.opponents_won.extend([opponent_mu] * count)
+
+    def add_losses(self, opponent_mu: float, count: int = 1) -> None:
+        """Tallies count games lost against an opponent (or team average) rating"""
+        if not count:
+            return
+
+        if self.worst_loss is None or opponent_mu < self.worst_loss:
+            self.worst_loss = opponent_mu
+
+        self.n_lost += count
+        self.sum_lost += opponent_mu * count
+        if self.retain_games:
+            self.opponents_lost.extend([opponent_mu] * count)
+
+    def add_partners(self, partner_mu: float, count: int = 1) -> None:
+        """Tallies count games played with a partner rating (doubles only)"""
+        self.sum_partners += partner_mu * count
+        if self.retain_games:
+            self.partners_mu.extend([partner_mu] * count)
+
+    def add_club(self, club_id: int, count: int = 1) -> None:
+        """Tallies count appearances at a club (by ID)"""
+        if not count:
+            return
+
+        _appearances = self.club_appearances
+        if club_id >= len(_appearances):
+            _appearances.extend([0] * (club_id + 1 - len(_appearances)))
+        if not _appearances[club_id]:
+            self.club_order.append(club_id)
+        _appearances[club_id] += count
+
+    def home_club_id(self) -> int:
+        """Gets the most appeared at club's ID (ties go to the earliest)"""
+        return max(self.club_order, key=self.club_appearances.__getitem__)
+
+    def club_counts(self) -> Dict[str, int]:
+        """Gets the appearances by club name, in the order first appeared at"""
+        return {CLUBS.names[i]: self.club_appearances[i] for i in self.club_order}
+
+
+@functools.lru_cache(maxsize=None)
+def _blank_record(mode: str) -> PlayerRecord:
+    """Record read for a mode never played, shared by all players (never updated)"""
+    return PlayerRecord(_default_rating(mode))
+
 
 class Player:
     """
@@ -140,43 +407,17 @@ class Player:
         - self.first_game (or self.join_date?)
     """
 
-    def __init__(self, username: str) -> None:
+    __slots__ = ("username", "player_id", "retain_games", "_records")
+
+    def __init__(self, username: str, retain_games: bool = False) -> None:
         self.username = username
+        self.player_id = PLAYERS.intern(username)
 
-        # # WIP stuff
-        # # self.singles_games = []
-        # self.games = {
-        #     "singles": {
-        #         "wins": [],
-        #         "losses": [],
-        #     },
-        #     "doubles": {
-        #         "wins": [],
-        #         "losses": [],
-        #     },
-        # }
-        # NOTE: length of this is one longer than other arrays
-        self.ratings = {
-            "singles": [glicko2.Glicko2()],
-            "doubles": [trueskill.TrueSkill(draw_probability=DRAW_PROB_DOUBLES)],
-        }
-        self.partner_rating_doubles: List[trueskill.TrueSkill] = []
-        self.opponent_ratings: Dict[str, Dict[str, List[float]]] = {
-            "singles": {
-                "wins": [],
-                "losses": [],
-            },
-            "doubles": {
-                "wins": [],
-                "losses": [],
-            },
-        }
+        # Keep the raw per-game opponent & partner ratings (not just aggregates)
+        self.retain_games = retain_games
 
-        # Used to decide home club
-        self.club_appearances: Dict[str, Dict[str, int]] = {
-            "singles": {},
-            "doubles": {},
-        }
+        # Singles and doubles records, created on first use
+        self._records: Dict[str, PlayerRecord] = {}
 
     def __str__(self) -> str:
         # NOTE: return this as a tuple, and tabulate it (rather than format as string)?
@@ -185,31 +426,105 @@ class Player:
             f"[{self.str_rating(mode=SINGLES)}, {self.str_rating(mode=DOUBLES)}]"
         )
 
+    def record(self, mode: str) -> PlayerRecord:
+        """Gets the ratings & tallies for a mode (to update), creating it if need be"""
+        if mode not in self._records:
+            self._records[mode] = PlayerRecord(_default_rating(mode), self.retain_games)
+
+        return self._records[mode]
+
+    def peek_record(self, mode: str) -> PlayerRecord:
+        """
+        Gets the ratings & tallies for a mode (to read). A mode never played reads as
+        a blank record (default rating, empty history), which isn't stored.
+        NOTE: the blank record is shared, update ratings with record() instead
+        """
+        _record = self._records.get(mode)
+        return _blank_record(mode) if _record is None else _record
+
     @property
     def rating_singles(self) -> glicko2.Rating:
-        """Gets the rating"""
-        glicko = glicko2.Glicko2()
-        _rating = self.ratings[SINGLES][-1]
-
-        return glicko.create_rating(mu=_rating.mu, phi=_rating.phi, sigma=_rating.sigma)
+        """Gets the (cached) current rating"""
+        _rating: glicko2.Rating = self.peek_record(SINGLES).rating
+        return _rating
 
     @property
-    def rating_doubles(self) -> trueskill.TrueSkill:
-        """Gets the rating"""
-        return self.ratings[DOUBLES][-1]
+    def rating_doubles(self) -> trueskill.Rating:
+        """Gets the (cached) current rating"""
+        return self.peek_record(DOUBLES).rating
+
+    def push_rating(
+        self, mode: str, rating: Union[glicko2.Rating, trueskill.Rating]
+    ) -> None:
+        """Appends a new rating to the history, and makes it the current rating"""
+        self.record(mode).push(rating)
+
+    def reset_rating(
+        self, mode: str, rating: Union[glicko2.Rating, trueskill.Rating]
+    ) -> None:
+        """Replaces the history with a single starting rating, e.g. loaded from CSV"""
+        self.record(mode).reset(rating)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializes the player's ratings & tallies, e.g. for a JSON checkpoint"""
+        return {
+            "username": self.username,
+            "retain_games": self.retain_games,
+            "records": {
+                mode: {
+                    "history_mu": x.history_mu.tolist(),
+                    "history_phi": x.history_phi.tolist(),
+                    "history_sigma": x.history_sigma.tolist(),
+                    "opponents_won": x.opponents_won.tolist(),
+                    "opponents_lost": x.opponents_lost.tolist(),
+                    "partners_mu": x.partners_mu.tolist(),
+                    "club_appearances": x.club_counts(),
+                    "aggregates": {k: getattr(x, k) for k in x.AGGREGATES},
+                }
+                for mode, x in self._records.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Player":
+        """Restores a player previously serialized with to_dict()"""
+        player = cls(data["username"], retain_games=data["retain_games"])
+
+        for mode, _data in data["records"].items():
+            _record = player.record(mode)
+            _record.history_mu = array("d", _data["history_mu"])
+            _record.history_phi = array("d", _data["history_phi"])
+            _record.history_sigma = array("d", _data["history_sigma"])
+            _record.opponents_won = array("d", _data["opponents_won"])
+            _record.opponents_lost = array("d", _data["opponents_lost"])
+            _record.partners_mu = array("d", _data["partners_mu"])
+            for _club, _count in _data["club_appearances"].items():
+                _record.add_club(CLUBS.intern(_club), count=_count)
+            for _key, _value in _data["aggregates"].items():
+                setattr(_record, _key, _value)
+
+            if mode == SINGLES:
+                _record.rating = _glicko().create_rating(
+                    mu=_record.history_mu[-1],
+                    phi=_record.history_phi[-1],
+                    sigma=_record.history_sigma[-1],
+                )
+            else:
+                _record.rating = trueskill.Rating(
+                    mu=_record.history_mu[-1], sigma=_record.history_sigma[-1]
+                )
+
+        return player
 
     def home_club(self, mode: str) -> str:
         """Gets the most frequent place of playing"""
-        return max(
-            self.club_appearances[mode],
-            key=self.club_appearances[mode].get,  # type: ignore
-        )
+        return CLUBS.names[self.peek_record(mode).home_club_id()]
 
     def clubs(self) -> List[str]:
         """Gets all the clubs someone has appeared at"""
         _clubs: Set[str] = set()
-        _clubs.update(self.club_appearances["singles"])
-        _clubs.update(self.club_appearances["doubles"])
+        for _record in self._records.values():
+            _clubs.update(_record.club_counts())
         return sorted(list(_clubs))
 
     def str_rating(self, mode: str) -> str:
@@ -226,38 +541,50 @@ class Player:
 
     def str_win_losses(self, mode: str) -> str:
         """Returns e.g. 5-2"""
+        _record = self.peek_record(mode)
 
-        n_wins = len(self.opponent_ratings[mode]["wins"])
-        n_losses = len(self.opponent_ratings[mode]["losses"])
-
-        return f"{n_wins}-{n_losses}"
+        return f"{_record.n_won}-{_record.n_lost}"
 
     def avg_opponent(self, mode: str) -> Union[int, float]:
         """Returns average opponent"""
+        _record = self.peek_record(mode)
 
-        _avg_opponent = (
-            sum(self.opponent_ratings[mode]["wins"])
-            + sum(self.opponent_ratings[mode]["losses"])
-        ) / (
-            len(self.opponent_ratings[mode]["wins"])
-            + len(self.opponent_ratings[mode]["losses"])
-        )
+        _avg_opponent = (_record.sum_won + _record.sum_lost) / _record.n_games
 
-        if mode == SINGLES:
-            return round(_avg_opponent)
-        return round(_avg_opponent, 1)
+        return _round_mu(_avg_opponent, mode)
+
+    def avg_partner(self, mode: str = DOUBLES) -> float:
+        """Returns average partner (doubles only)"""
+        _record = self.peek_record(mode)
+
+        return round(_record.sum_partners / _record.n_games, 1)
 
     def best_win(self, mode: str) -> Union[None, int, float]:
         """Returns best win"""
-        try:
-            _best_win = max(self.opponent_ratings[mode]["wins"])
-        except ValueError:
+        _best_win = self.peek_record(mode).best_win
+        if _best_win is None:
             return None
 
         if mode == SINGLES:
             return round(_best_win)
         return float(round(_best_win, 1))
 
+    def worst_loss(self, mode: str) -> Union[None, int, float]:
+        """Returns worst loss (lowest rated opponent lost to)"""
+        _worst_loss = self.peek_record(mode).worst_loss
+        if _worst_loss is None:
+            return None
+
+        return _round_mu(_worst_loss, mode)
+
+    def biggest_upset(self, mode: str) -> Union[None, int, float]:
+        """Returns biggest upset (rating of an opponent beaten, minus own rating)"""
+        _biggest_upset = self.peek_record(mode).biggest_upset
+        if _biggest_upset is None:
+            return None
+
+        return _round_mu(_biggest_upset, mode)
+
     def graph_ratings(
         self, graph_width_limit: int = 50, graph_height: int = 12
     ) -> None:
@@ -265,13 +592,16 @@ class Player:
         Prints an ASCII graph of rating over past 50 games
         """
 
-        if len(self.ratings[SINGLES]) > 1:
-            _series = [round(x.mu) for x in self.ratings[SINGLES][-graph_width_limit:]]
-        # TODO: mutually exclusive for now, we process singles/doubles separately
-        elif len(self.ratings[DOUBLES]) > 1:
-            _series = [
-                round(x.mu, 1) for x in self.ratings[DOUBLES][-graph_width_limit:]
+        _history_singles = self.peek_record(SINGLES).history_mu
+        _history_doubles = self.peek_record(DOUBLES).history_mu
+
+        if len(_history_singles) > 1:
+            _series: List[float] = [
+                round(x) for x in _history_singles[-graph_width_limit:]
             ]
+        # TODO: mutually exclusive for now, we process singles/doubles separately
+        elif len(_history_doubles) > 1:
+            _series = [round(x, 1) for x in _history_doubles[-graph_width_limit:]]
         else:
             _series = []
 
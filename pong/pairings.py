@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 03∶05∶44 PM EDT
+
+@author: shane
+Vectorized (NumPy) search over doubles match ups, e.g. (p1 & p2) vs. (p3 & p4).
+Team sums (mu, sigma²) are precomputed for all pairs of players, then scored a
+whole block of pairings at a time, instead of one 4-player split at a time.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from pong.core import TopK
+from pong.tsutils import quality_2v2, win_probability_2v2
+
+# pylint: disable=invalid-name,too-few-public-methods
+
+# Short listed match up, by player index: (i1, i2, i3, i4, Δμ, 2σ, Q, P(w))
+Matchup = Tuple[int, int, int, int, float, int, float, float]
+
+
+class MatchupBlock(NamedTuple):
+    """
+    Short listed match ups (i1 & i2) vs. (i3 & i4), one entry per match up, plus
+    the number of match ups skipped (outside the thresholds) in the same block
+    """
+
+    i1: np.ndarray
+    i2: np.ndarray
+    i3: np.ndarray
+    i4: np.ndarray
+    delta_mu: np.ndarray
+    two_rd: np.ndarray
+    n_skipped: int
+
+
+def teams(n_players: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gets every team (pair of players), as index arrays (first, second).
+    Teams are in lexicographic order, e.g. (0, 1), (0, 2), ..., (1, 2), ...
+    """
+    first, second = np.triu_indices(n_players, k=1)
+    return first, second
+
+
+def count_doubles_matchups(n_players: int) -> int:
+    """Gets the number of distinct match ups, (nC2 * (n-2)C2) / 2"""
+    return math.comb(n_players, 2) * math.comb(n_players - 2, 2) // 2
+
+
+class TeamIndex:
+    """
+    Every team (pair of players), sorted by combined mu.
+    Opposing teams within a window of combined mu are found with a binary search
+    (two pointers, lo & hi), rather than by scanning all nC2 teams.
+    """
+
+    def __init__(self, mu: np.ndarray, sigma: np.ndarray) -> None:
+        self.n_players = len(mu)
+        self.first, self.second = teams(self.n_players)
+        self.mu = mu[self.first] + mu[self.second]
+        self.var = sigma[self.first] ** 2 + sigma[self.second] ** 2
+
+        # Sorted (ascending) combined mu, and the team behind each entry
+        self.order = np.argsort(self.mu, kind="stable")
+        self.sorted_mu = self.mu[self.order]
+
+        # Teams starting at player i are a contiguous slice [start[i], start[i + 1])
+        self.start = np.concatenate(
+            ([0], np.cumsum(np.arange(self.n_players - 1, -1, -1)))
+        )
+
+    def window(
+        self, team_ids: np.ndarray, half_width: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets every (team, opposing team) with combined mu within ± half_width.
+        Returns flat arrays (a, b) of team ids, grouped by a (in the given order).
+        NOTE: b may overlap a (share a player), the caller has to filter these
+        """
+        _mu = self.mu[team_ids]
+        lo = np.searchsorted(self.sorted_mu, _mu - half_width, side="left")
+        hi = np.searchsorted(self.sorted_mu, _mu + half_width, side="right")
+
+        # Flatten the [lo, hi) ranges into one array of positions
+        _counts = hi - lo
+        _offsets = np.repeat(lo - (np.cumsum(_counts) - _counts), _counts)
+        _positions = np.arange(_counts.sum()) + _offsets
+
+        return np.repeat(team_ids, _counts), self.order[_positions]
+
+
+def iter_doubles_matchups(
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    delta_mu_threshold: float = 3.0,
+    two_rd_threshold: float = 9.5,
+    i1_values: Optional[Iterable[int]] = None,
+) -> Iterator[MatchupBlock]:
+    """
+    Finds the fair doubles match ups, in blocks (one per lowest player index, i1).
+    Team 1 always has the lowest player index, same order as the nested loops:
+      i1 < i2, and i1 < i3 < i4 (with i3 & i4 not equal to i2).
+
+    Only opposing teams inside the Δμ window are visited (see TeamIndex), so the
+    work scales with the number of acceptable match ups, rather than n^4.
+
+    Yields a MatchupBlock for each i1, holding only the match ups inside both
+    thresholds (the rest are counted as skipped).
+      delta_mu: (team 1 mu - team 2 mu) / 2, rounded to 0.1, within ± threshold
+      two_rd: 1.96 * root mean sigma² of the 4 players, rounded to 1
+
+    :param i1_values: Only search these blocks (e.g. one shard), defaults to all
+    """
+    index = TeamIndex(mu, sigma)
+    n_players = index.n_players
+    first, second = index.first, index.second
+
+    # Widen the window by the rounding of delta_mu, the exact cut is done below
+    half_width = 2 * (delta_mu_threshold + 0.05) + 1e-9
+
+    if i1_values is None:
+        i1_values = range(n_players - 2)
+
+    for i1 in i1_values:
+        a, b = index.window(np.arange(index.start[i1], index.start[i1 + 1]), half_width)
+
+        # Opposing team can't include either player (and must be above i1)
+        i2, i3, i4 = second[a], first[b], second[b]
+        _valid = (i3 > i1) & (i3 != i2) & (i4 != i2)
+
+        # Compute rating difference and average RD (as masks)
+        delta_mu = np.round((index.mu[a] - index.mu[b]) / 2, 1)
+        two_rd = np.rint(1.96 * np.sqrt((index.var[a] + index.var[b]) / 4))
+        _keep = np.flatnonzero(
+            _valid
+            & (np.abs(delta_mu) <= delta_mu_threshold)
+            & (two_rd <= two_rd_threshold)
+        )
+
+        # Restore the nested loop order, (i1, i2, i3, i4) ascending
+        _keep = _keep[np.argsort(a[_keep] * len(first) + b[_keep], kind="stable")]
+
+        # All the others (with i1 & i2 on team 1) are skipped, (n-i1-1)*(n-i1-2)C2
+        n_total = (n_players - i1 - 1) * math.comb(n_players - i1 - 2, 2)
+        yield MatchupBlock(
+            np.full(len(_keep), i1),
+            i2[_keep],
+            i3[_keep],
+            i4[_keep],
+            delta_mu[_keep],
+            two_rd[_keep].astype(int),
+            n_total - len(_keep),
+        )
+
+
+# pylint: disable=too-many-arguments
+def search_doubles_matchups(
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    delta_mu_threshold: float = 3.0,
+    two_rd_threshold: float = 9.5,
+    n_top: int = 100,
+    shard: Tuple[int, int] = (0, 1),
+) -> Tuple[List[Matchup], int, int]:
+    """
+    Scores the short listed match ups, and keeps the best n_top (by quality).
+    Returns (top match ups, n_shortlisted, n_skipped).
+
+    :param shard: (k, n_shards), only search every n_shards-th block, starting at k.
+        Interleaved (rather than contiguous), since the low i1 blocks are largest.
+    """
+    _k, _n_shards = shard
+    sigma_2 = sigma**2
+    matchups: TopK[Matchup] = TopK(n_top, key=lambda x: x[-2])
+    n_shortlisted = 0
+    n_skipped = 0
+
+    for block in iter_doubles_matchups(
+        mu,
+        sigma,
+        delta_mu_threshold=delta_mu_threshold,
+        two_rd_threshold=two_rd_threshold,
+        i1_values=range(_k, len(mu) - 2, _n_shards),
+    ):
+        n_skipped += block.n_skipped
+
+        # Compute quality metrics (as a batch)
+        _delta_mu = mu[block.i1] + mu[block.i2] - mu[block.i3] - mu[block.i4]
+        _sum_sigma_2 = sigma_2[block.i1] + sigma_2[block.i2]
+        _sum_sigma_2 += sigma_2[block.i3] + sigma_2[block.i4]
+        _quality = quality_2v2(_delta_mu, _sum_sigma_2)
+        _p_win = win_probability_2v2(_delta_mu, _sum_sigma_2)
+
+        # Only build the ones which could still make the top n_top (once rounded)
+        n_shortlisted += len(_quality)
+        _candidates: Iterable[int] = range(len(_quality))
+        if matchups.floor is not None:
+            _candidates = np.flatnonzero(_quality > matchups.floor - 0.01).tolist()
+
+        for _i in _candidates:
+            matchups.push(
+                (
+                    int(block.i1[_i]),
+                    int(block.i2[_i]),
+                    int(block.i3[_i]),
+                    int(block.i4[_i]),
+                    float(block.delta_mu[_i]),
+                    int(block.two_rd[_i]),
+                    round(float(_quality[_i]), 2),
+                    round(float(_p_win[_i]), 2),
+                )
+            )
+
+    return matchups.items(), n_shortlisted, n_skipped
+
+
+def search_doubles_matchups_parallel(
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    delta_mu_threshold: float = 3.0,
+    two_rd_threshold: float = 9.5,
+    n_top: int = 100,
+    n_workers: int = 2,
+) -> Tuple[List[Matchup], int, int]:
+    """
+    Same as search_doubles_matchups(), but split into n_workers shards, searched
+    in a process pool. Each worker only sends back its local top n_top & counts.
+    """
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [
+            executor.submit(
+                search_doubles_matchups,
+                mu,
+                sigma,
+                delta_mu_threshold,
+                two_rd_threshold,
+                n_top,
+                (_k, n_workers),
+            )
+            for _k in range(n_workers)
+        ]
+        results = [x.result() for x in futures]
+
+    # Merge, pushing in the serial (i1, i2, i3, i4) order, so ties break the same
+    matchups: TopK[Matchup] = TopK(n_top, key=lambda x: x[-2])
+    matchups.extend(
+        sorted((x for _top, _, _ in results for x in _top), key=lambda x: x[:4])
+    )
+
+    return (
+        matchups.items(),
+        sum(x[1] for x in results),
+        sum(x[2] for x in results),
+    )
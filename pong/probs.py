@@ -5,15 +5,43 @@ Created on Fri Jan 20 14:24:28 2023
 @author: shane
 Probability tools used for side statistics.
 """
+from __future__ import annotations
+
+import functools
 import math
 import os
 import sys
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 from tabulate import tabulate
 
+from pong import lazy_import
+
+# NumPy loads on first use, only the vectorized versions need it
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import ArrayLike
+else:
+    np = lazy_import("numpy")
+
 # pylint: disable=invalid-name
 
+# Largest n in the binomial table, covers deuce in games to 21 (e.g. 40C20)
+# NOTE: stays exact in float64 up to 2^53, i.e. (n=55, k=27)
+N_BINOMIAL = 50
+
+
+@functools.lru_cache(maxsize=None)
+def binomial_table() -> np.ndarray:
+    """Precomputed binomial coefficients, table[n, k] = nCk (zero for k > n)"""
+    return np.array(
+        [
+            [math.comb(n, k) for k in range(N_BINOMIAL + 1)]
+            for n in range(N_BINOMIAL + 1)
+        ],
+        dtype=float,
+    )
+
 
 def p_game_straight(p: float, n: int = 11) -> float:
     """
@@ -75,6 +103,83 @@ def p_game(p: float, n: int = 11) -> float:
     return p_game_straight(p, n) + p_deuce(p, n) * p_deuce_win(p)
 
 
+def _dp_game(p: float, n: int = 11) -> float:
+    """
+    Derivative of p_game() with respect to p (used in the Newton steps below).
+    :param p: Probability of winning an individual point
+    :param n: Points to win game (e.g. 11 or 21)
+    """
+    q = 1 - p
+
+    # d/dp [p^n q^k] = p^(n-1) q^(k-1) (n q - k p)
+    d_straight = sum(
+        math.comb(n - 1 + k, k) * p ** (n - 1) * q ** max(k - 1, 0) * (n * q - k * p)
+        if k
+        else n * p ** (n - 1)
+        for k in range(0, n - 1)
+    )
+
+    # Deuce, D = C (pq)^(n-1), and winning from deuce, W = p^2 / (1 - 2pq)
+    c = math.comb(2 * (n - 1), n - 1)
+    _d = c * (p * q) ** (n - 1)
+    d_d = c * (n - 1) * (p * q) ** (n - 2) * (1 - 2 * p)
+    _w = p_deuce_win(p)
+    d_w = 2 * p * (1 - 2 * p * q + p * (1 - 2 * p)) / (1 - 2 * p * q) ** 2
+
+    return d_straight + d_d * _w + _d * d_w
+
+
+@functools.lru_cache(maxsize=4096)
+def p_point(p_g: float, n: int = 11, tol: float = 1e-12) -> float:
+    """
+    Inverse of p_game(), the probability of winning a point which gives the
+    probability p_g of winning the game.
+
+    Newton's method, kept inside a bracket [lo, hi] which shrinks every step
+    (falls back to bisection, whenever a step leaves the bracket).
+    p_game() is increasing in p, so there is always exactly one root.
+
+    :param p_g: Probability of winning the game, between 0.0 - 1.0
+    :param n: Points to win game (e.g. 11 or 21)
+    :param tol: Tolerance on the point probability
+    """
+    if not 0.0 <= p_g <= 1.0:
+        sys.exit(f"Probability must be between 0.0 and 1.0, got {p_g}")
+
+    # Odds are symmetric, solve the lower half only (it's better conditioned)
+    if p_g > 0.5:
+        return 1 - p_point(1 - p_g, n=n, tol=tol)
+    if p_g in {0.0, 0.5}:
+        return p_g
+
+    lo, hi = 0.0, 0.5
+    p = 0.5 * (lo + hi)
+    while hi - lo > tol:
+        _f = p_game(p, n)
+        if _f == p_g:
+            return p
+
+        # Shrink the bracket
+        if _f < p_g:
+            lo = p
+        else:
+            hi = p
+
+        # Newton step on log(p_game), which is close to linear in log(p) for
+        # long shots (p_game ~ p^n). Falls back to bisection, outside the bracket
+        _df = _dp_game(p, n)
+        if _f > 0 and _df > 0:
+            _p = p - math.log(_f / p_g) * _f / _df
+            if math.fabs(_p - p) < tol:
+                return _p
+        if not (_f > 0 and _df > 0 and lo < _p < hi):
+            _p = 0.5 * (lo + hi)
+
+        p = _p
+
+    return p
+
+
 def p_match(p: float, n: int) -> float:
     """
     Calculate probability to win a match (best of 3 & best of 5), based on probability
@@ -91,31 +196,131 @@ def p_match(p: float, n: int) -> float:
     return p**n * sum(math.comb(n - 1 + k, k) * (1 - p) ** k for k in range(n))
 
 
-def p_at_least_k_points(p: float, k: int) -> float:
+def p_at_least_k_points(p: float, k: int, n: int = 11) -> float:
     """
-    Find the probability of winning at least k points in a game to 11.
+    Find the probability of winning at least k points in a game to n.
+    Solved over the score states (a, b), so any k works (e.g. 15, through deuce).
     :param p: Probability of winning an individual point
-    :param k: Goal to score # of points (k < 11), e.g. 1, 4, or 6
+    :param k: Goal to score # of points, e.g. 1, 4, or 6
+    :param n: Points to win game (e.g. 11 or 21)
     """
 
-    if k > 10:
-        sys.exit("Can't calculate k > 10 pts")
-
-    # Probabilities based on game of 11 points (not 21)
-    prob_lose_with_k_points = math.comb(11 + k, k) * p**k * (1 - p) ** 11
-    prob_deuce = p_deuce(p)
-    prob_win_straight = p_game_straight(p)
-
     # "Trivial case with k=0 has P=1.0"
-    if k == 0:
+    if k <= 0:
         return 1.0
 
-    # k=10  =>  P(deuce) + P(straight win)
-    if k == 10:
-        return prob_deuce + prob_win_straight
+    # Past b_max, the game is already lost (deuce can't run past k + 1)
+    b_max = max(n, k + 1)
+    table = [[0.0] * (b_max + 2) for _ in range(k + 1)]
+    table[k] = [1.0] * (b_max + 2)
+
+    for a in range(k - 1, -1, -1):
+        for b in range(b_max, -1, -1):
+            if _game_over(a, b, n):
+                # Lost, or won the game with fewer than k points
+                table[a][b] = 0.0
+            else:
+                table[a][b] = p * table[a + 1][b] + (1 - p) * table[a][b + 1]
+
+    return table[0][0]
+
+
+def _game_over(a: int, b: int, n: int = 11) -> bool:
+    """Whether a score a-b ends a game to n (win by two)"""
+    return max(a, b) >= n and math.fabs(a - b) >= 2
+
 
-    # k<10  =>  P(straight loss with k points) + P(deuce) + P(win)
-    return prob_lose_with_k_points + prob_deuce + prob_win_straight
+@functools.lru_cache(maxsize=256)
+def _game_table(p: float, n: int = 11) -> Tuple[Tuple[float, ...], ...]:
+    """
+    Probability of winning the game, from every score a-b up to n-n, table[a][b].
+    Filled backwards from the end of the game. The scores past (n-1)-(n-1) are
+    deuce (and advantage), which are solved in closed form with p_deuce_win().
+    """
+    q = 1 - p
+    _deuce = p_deuce_win(p)
+
+    table = [[0.0] * (n + 1) for _ in range(n + 1)]
+    for i in range(n - 1):
+        table[n][i] = 1.0
+    table[n - 1][n - 1] = _deuce
+    table[n][n - 1] = p + q * _deuce
+    table[n - 1][n] = p * _deuce
+    table[n][n] = _deuce
+
+    for a in range(n - 1, -1, -1):
+        for b in range(n - 1, -1, -1):
+            if a < n - 1 or b < n - 1:
+                table[a][b] = p * table[a + 1][b] + q * table[a][b + 1]
+
+    return tuple(tuple(x) for x in table)
+
+
+@functools.lru_cache(maxsize=256)
+def _match_table(p_g: float, m: int) -> Tuple[Tuple[float, ...], ...]:
+    """
+    Probability of winning the match (first to m games), from every games score
+    i-j, table[i][j]. Filled backwards, from the last game.
+    """
+    table = [[0.0] * (m + 1) for _ in range(m + 1)]
+    for j in range(m):
+        table[m][j] = 1.0
+
+    for i in range(m - 1, -1, -1):
+        for j in range(m - 1, -1, -1):
+            table[i][j] = p_g * table[i + 1][j] + (1 - p_g) * table[i][j + 1]
+
+    return tuple(tuple(x) for x in table)
+
+
+def p_game_live(p: float, a: int, b: int, n: int = 11) -> float:
+    """
+    Probability of winning a game, from the current score a-b (e.g. 7-9, or 14-13).
+    :param p: Probability of winning an individual point
+    :param a: Points won so far
+    :param b: Points lost so far
+    :param n: Points to win game (e.g. 11 or 21)
+    """
+    if a < 0 or b < 0:
+        sys.exit(f"Score can't be negative, got {a}-{b}")
+
+    if _game_over(a, b, n):
+        return float(a > b)
+
+    # Deuce or advantage, only the lead matters
+    if a >= n - 1 and b >= n - 1:
+        a, b = n - 1 + max(a - b, 0), n - 1 + max(b - a, 0)
+
+    return _game_table(p, n)[a][b]
+
+
+def p_match_live(
+    p: float,
+    games: Tuple[int, int] = (0, 0),
+    points: Tuple[int, int] = (0, 0),
+    n: int = 11,
+    m: int = 3,
+) -> float:
+    """
+    Probability of winning the match, from any score (e.g. point by point, live).
+    The current game is played out from its score, the rest of the games from 0-0.
+    Both levels are memoized (per p), so each update is only a couple of lookups.
+
+    :param p: Probability of winning an individual point
+    :param games: Games won so far, (won, lost)
+    :param points: Score in the current game, (won, lost)
+    :param n: Points to win game (e.g. 11 or 21)
+    :param m: Games to win the match, e.g. win 3 games => 5 game match
+    """
+    i, j = games
+    if i < 0 or j < 0:
+        sys.exit(f"Games can't be negative, got {i}-{j}")
+    if max(i, j) >= m:
+        return float(i > j)
+
+    p_w = p_game_live(p, points[0], points[1], n)
+    table = _match_table(_game_table(p, n)[0][0], m)
+    return p_w * table[i + 1][j] + (1 - p_w) * table[i][j + 1]
 
 
 def p_at_least_k_wins_in_match(p: float, n: int, k: int) -> float:
@@ -161,6 +366,153 @@ def p_at_least_k_wins_out_of_n_games(p: float, n: int, k: int) -> float:
     return sum(math.comb(n, i) * p**i * (1 - p) ** (n - i) for i in range(k, n + 1))
 
 
+# ----------------------------------------------------------------------------
+# Vectorized (NumPy) versions, these take an array of probabilities (any shape)
+# and evaluate the sums for all of them at once, returning the same shape.
+# ----------------------------------------------------------------------------
+
+
+def binomial(n: ArrayLike, k: ArrayLike) -> np.ndarray:
+    """
+    Looks up nCk in the precomputed table (falls back to math.comb, past it).
+    :param n: Array of n values (broadcast against k)
+    :param k: Array of k values
+    """
+    _n, _k = np.broadcast_arrays(np.asarray(n, dtype=int), np.asarray(k, dtype=int))
+    if _n.size and _n.max() > N_BINOMIAL:
+        return np.reshape(
+            [
+                float(math.comb(int(x), int(y)))
+                for x, y in zip(_n.ravel().tolist(), _k.ravel().tolist())
+            ],
+            _n.shape,
+        )
+    return np.asarray(binomial_table()[_n, _k])
+
+
+def _powers(x: ArrayLike, exponents: np.ndarray) -> np.ndarray:
+    """Raises each x to each of the exponents, as a new (last) axis"""
+    return np.asarray(x, dtype=float)[..., None] ** exponents
+
+
+def p_game_straight_array(p: ArrayLike, n: int = 11) -> np.ndarray:
+    """
+    Vectorized p_game_straight()
+    :param p: Array of probabilities of winning an individual point
+    :param n: Points to win game (e.g. 11 or 21)
+    """
+    k = np.arange(n - 1)
+    _p = np.asarray(p, dtype=float)
+    return _p**n * (_powers(1 - _p, k) @ binomial(n - 1 + k, k))
+
+
+def p_game_straight_handicap_array(p: ArrayLike, n: int = 11, i: int = 0) -> np.ndarray:
+    """
+    Vectorized p_game_straight_handicap()
+    :param p: Array of probabilities of winning an individual point
+    :param n: Points to win game (e.g. 11 or 21)
+    :param i: Initial score of lower rated player (e.g. 0-6 starting score)
+    """
+    k = np.arange(n - 1)
+    _p = np.asarray(p, dtype=float)
+    return _p ** (n - i) * (_powers(1 - _p, k) @ binomial(n - i - 1 + k, k))
+
+
+def p_deuce_array(p: ArrayLike, n: int = 11) -> np.ndarray:
+    """
+    Vectorized p_deuce()
+    :param p: Array of probabilities of winning an individual point
+    :param n: Points to win game (e.g. 11 or 21)
+    """
+    _p = np.asarray(p, dtype=float)
+    return (_p * (1 - _p)) ** (n - 1) * binomial(2 * (n - 1), n - 1)
+
+
+def p_deuce_handicap_array(p: ArrayLike, n: int = 11, i: int = 0) -> np.ndarray:
+    """
+    Vectorized p_deuce_handicap()
+    :param p: Array of probabilities of winning an individual point
+    :param n: Points to win game (e.g. 11 or 21)
+    :param i: Initial score of lower rated player (e.g. 0-6 starting score)
+    """
+    _p = np.asarray(p, dtype=float)
+    return (
+        _p ** (n - i - 1) * (1 - _p) ** (n - 1) * binomial(2 * (n - 1) - i, n - i - 1)
+    )
+
+
+def p_deuce_win_array(p: ArrayLike) -> np.ndarray:
+    """
+    Vectorized p_deuce_win()
+    :param p: Array of probabilities of winning an individual point
+    """
+    _p = np.asarray(p, dtype=float)
+    return _p**2 / (1 - 2 * _p * (1 - _p))
+
+
+def p_game_array(p: ArrayLike, n: int = 11) -> np.ndarray:
+    """
+    Vectorized p_game()
+    :param p: Array of probabilities of winning an individual point
+    :param n: Points to win game (e.g. 11 or 21)
+    """
+    return p_game_straight_array(p, n) + p_deuce_array(p, n) * p_deuce_win_array(p)
+
+
+def p_match_array(p: ArrayLike, n: int) -> np.ndarray:
+    """
+    Vectorized p_match()
+    :param p: Array of probabilities to win one game
+    :param n: First to win n games, e.g. win 3 games => 5 game match
+    """
+    k = np.arange(n)
+    _p = np.asarray(p, dtype=float)
+    return _p**n * (_powers(1 - _p, k) @ binomial(n - 1 + k, k))
+
+
+def p_at_least_k_wins_in_match_array(p: ArrayLike, n: int, k: int) -> np.ndarray:
+    """
+    Vectorized p_at_least_k_wins_in_match()
+    :param p: Array of probabilities to win one game
+    :param n: Number of games to win the match
+    :param k: Desired number to win (e.g. win at least 1 in a best of 5)
+    """
+    if n < 1:
+        sys.exit("Can't have a best of zero")
+
+    if k < 0 or k > n:
+        sys.exit(f"Desired wins k must be between 0 and {n}")
+
+    _p = np.asarray(p, dtype=float)
+    if k == 0:
+        return np.ones_like(_p)
+
+    # P(win) + Sum [P(lose & win i games), for i in range(k, n)]
+    i = np.arange(k, n)
+    return p_match_array(_p, n) + (1 - _p) ** n * (
+        _powers(_p, i) @ binomial(n - 1 + i, i)
+    )
+
+
+def p_at_least_k_wins_out_of_n_games_array(p: ArrayLike, n: int, k: int) -> np.ndarray:
+    """
+    Vectorized p_at_least_k_wins_out_of_n_games()
+    :param p: Array of probabilities to win one game
+    :param n: Number of games to play
+    :param k: Desired number to win (e.g. win at least 2 out of 6)
+    """
+    if n < 1:
+        sys.exit(f"Can only calculate probability for 1 or more games, got n={n}")
+
+    _p = np.asarray(p, dtype=float)
+    if k > n:
+        print(f"WARN: got k>n ({k}>{n}, are you sure? This has no probability")
+        return np.zeros_like(_p)
+
+    i = np.arange(k, n + 1)
+    return (_powers(_p, i) * _powers(1 - _p, n - i)) @ binomial(n, i)
+
+
 def n_fair_handicap_points(p: float, n: int = 11) -> List[Tuple[int, float]]:
     """
     Start e.g. up 7-0 or 6-0 against a stronger opponent for fair odds ~0.5 of winning
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 04∶31∶09 AM EDT
+
+@author: shane
+Interns usernames & club names as dense integer IDs (0, 1, 2, ... in order of
+first appearance), so each name is hashed once, when it's first ingested.
+Tallies can then be plain arrays indexed by ID, e.g. the players × clubs matrix
+of appearances (each player's record holds its row).
+"""
+from typing import Dict, Iterable, List
+
+
+class Registry:
+    """Two way map between names & dense integer IDs"""
+
+    __slots__ = ("names", "ids")
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+        for name in names:
+            self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.ids
+
+    def intern(self, name: str) -> int:
+        """Gets the name's ID, assigning the next one if it's new"""
+        _id = self.ids.get(name)
+        if _id is None:
+            _id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return _id
+
+
+# Shared by the whole process, IDs are never reassigned (nor reused)
+PLAYERS = Registry()
+CLUBS = Registry()
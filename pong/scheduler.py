@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 06∶10∶27 PM EDT
+
+@author: shane
+Session scheduler for doubles, e.g. a club night's rotation of N rounds on T tables.
+Each round sits out the players with the fewest sit-outs so far, forms balanced
+teams with an assignment (Hungarian) solve, then pairs up the teams to tables.
+"""
+import math
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+import numpy as np
+
+from pong.tsutils import quality_2v2, win_probability_2v2
+
+# pylint: disable=invalid-name
+
+# Added to the cost of pairing up two former partners (never chosen, if avoidable)
+REPEAT_PARTNER_PENALTY = 1e6
+
+# Number of ways to split the players into two sides, tried once partners repeat
+N_SPLITS = 16
+
+
+class Game(NamedTuple):
+    """One game, (i1 & i2) vs. (i3 & i4), by player index"""
+
+    table: int
+    i1: int
+    i2: int
+    i3: int
+    i4: int
+    delta_mu: float
+    quality: float
+    p_win: float
+
+
+class Round(NamedTuple):
+    """The games (one per table) and the players sitting out, for one round"""
+
+    games: List[Game]
+    sitting_out: List[int]
+
+
+def linear_sum_assignment(cost: np.ndarray) -> np.ndarray:
+    """
+    Hungarian algorithm (with potentials), O(n^3) for a square cost matrix.
+    Returns the column assigned to each row, minimizing the total cost.
+    The inner scan over columns is vectorized.
+    """
+    n = len(cost)
+    u = np.zeros(n + 1)
+    v = np.zeros(n + 1)
+
+    # p[j] is the row (1-based) assigned to column j, way[] is the augmenting path
+    p: np.ndarray = np.zeros(n + 1, dtype=int)
+    way: np.ndarray = np.zeros(n + 1, dtype=int)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv: np.ndarray = np.full(n + 1, np.inf)
+        used: np.ndarray = np.zeros(n + 1, dtype=bool)
+
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+
+            # Relax the reduced costs of the free columns, from row i0
+            free: np.ndarray = ~used
+            free[0] = False
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free[1:] & (cur < minv[1:])
+            minv[1:][improve] = cur[improve]
+            way[1:][improve] = j0
+
+            j1 = int(np.argmin(np.where(free, minv, np.inf)))
+            delta = minv[j1]
+
+            # Update the potentials
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    assignment = np.empty(n, dtype=int)
+    assignment[p[1:] - 1] = np.arange(n)
+    return assignment
+
+
+def _choose_sit_outs(
+    sit_outs: np.ndarray, n_sitting: int, i_round: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Splits the players into (playing, sitting out), balancing the sit-outs.
+    Ties are broken by a rotation, so it's not the same players each round.
+    """
+    n_players = len(sit_outs)
+    _rotation = (np.arange(n_players) - i_round * n_sitting) % n_players
+    order = np.lexsort((_rotation, sit_outs))
+    return np.sort(order[n_sitting:]), np.sort(order[:n_sitting])
+
+
+def _form_teams(
+    mu: np.ndarray,
+    playing: np.ndarray,
+    partners: Set[Tuple[int, int]],
+    rng: np.random.Generator,
+    n_splits: int = N_SPLITS,
+) -> List[Tuple[int, int]]:
+    """
+    Pairs up one half of the players with the other half, so every team's combined
+    mu is as close as possible to the average (and partners aren't repeated).
+    The first split is stronger half vs. weaker half, the others are random, and
+    the cheapest assignment wins (they only matter once repeats become likely).
+    """
+    _playing = playing[np.argsort(-mu[playing], kind="stable")]
+    n_teams = len(_playing) // 2
+    target = 2 * np.mean(mu[_playing])
+
+    best_cost, best_teams = math.inf, []
+    for i_split in range(n_splits):
+        if i_split:
+            _playing = rng.permutation(_playing)
+        side1, side2 = _playing[:n_teams], _playing[n_teams:]
+
+        cost = (mu[side1][:, None] + mu[side2][None, :] - target) ** 2
+        for _i, _p1 in enumerate(side1.tolist()):
+            for _j, _p2 in enumerate(side2.tolist()):
+                if (min(_p1, _p2), max(_p1, _p2)) in partners:
+                    cost[_i, _j] += REPEAT_PARTNER_PENALTY
+
+        assignment = linear_sum_assignment(cost)
+        _cost = float(cost[np.arange(n_teams), assignment].sum())
+        if _cost < best_cost:
+            best_cost = _cost
+            best_teams = [
+                (int(min(_p1, _p2)), int(max(_p1, _p2)))
+                for _p1, _p2 in zip(side1, side2[assignment])
+            ]
+
+        # No repeats in the stronger vs. weaker split, good enough
+        if best_cost < REPEAT_PARTNER_PENALTY and not i_split:
+            break
+
+    return best_teams
+
+
+def schedule_session(
+    mu: np.ndarray, sigma: np.ndarray, n_tables: int, n_rounds: int, seed: int = 0
+) -> List[Round]:
+    """
+    Builds a rotation of n_rounds rounds of doubles, on (up to) n_tables tables.
+
+    Every round:
+      - sits out the players with the fewest sit-outs so far
+      - forms balanced teams (assignment problem), without repeating partners
+      - sorts the teams by combined mu and plays neighbours against each other,
+        which minimizes the total |Δμ| (maximizing the overall match quality)
+
+    :param mu: Doubles (TrueSkill) mu of each present player
+    :param sigma: Doubles (TrueSkill) sigma of each present player
+    :param seed: Seeds the random splits (see _form_teams), for a repeatable plan
+    """
+    n_players = len(mu)
+    n_games = min(n_tables, n_players // 4)
+    n_sitting = n_players - 4 * n_games
+
+    sit_outs = np.zeros(n_players, dtype=int)
+    partners: Set[Tuple[int, int]] = set()
+    rounds: List[Round] = []
+    rng = np.random.default_rng(seed)
+
+    for i_round in range(n_rounds):
+        playing, sitting_out = _choose_sit_outs(sit_outs, n_sitting, i_round)
+        sit_outs[sitting_out] += 1
+
+        teams = _form_teams(mu, playing, partners, rng)
+        partners.update(teams)
+        teams.sort(key=lambda x: float(mu[x[0]] + mu[x[1]]), reverse=True)
+
+        # Neighbouring teams play each other (team 1 being the stronger one)
+        _team1 = np.array(teams[0::2], dtype=int).reshape(-1, 2)
+        _team2 = np.array(teams[1::2], dtype=int).reshape(-1, 2)
+        delta_mu = mu[_team1].sum(axis=1) - mu[_team2].sum(axis=1)
+        sum_sigma_2 = np.sum(sigma[_team1] ** 2 + sigma[_team2] ** 2, axis=1)
+        quality = quality_2v2(delta_mu, sum_sigma_2)
+        p_win = win_probability_2v2(delta_mu, sum_sigma_2)
+
+        games = [
+            Game(
+                _table + 1,
+                *teams[2 * _table],
+                *teams[2 * _table + 1],
+                delta_mu=float(delta_mu[_table]) / 2,
+                quality=float(quality[_table]),
+                p_win=float(p_win[_table]),
+            )
+            for _table in range(n_games)
+        ]
+        rounds.append(Round(games, sitting_out.tolist()))
+
+    return rounds
+
+
+def summarize_session(rounds: List[Round], n_players: int) -> Dict[str, float]:
+    """Gets the average quality, the sit-out spread, and any repeated partners"""
+    sit_outs = np.bincount(
+        np.array([x for _round in rounds for x in _round.sitting_out], dtype=int),
+        minlength=n_players,
+    )
+    teams = [(g.i1, g.i2) for _round in rounds for g in _round.games]
+    teams += [(g.i3, g.i4) for _round in rounds for g in _round.games]
+    qualities = [g.quality for _round in rounds for g in _round.games]
+
+    return {
+        "avg_quality": sum(qualities) / len(qualities) if qualities else math.nan,
+        "min_quality": min(qualities, default=math.nan),
+        "min_sit_outs": int(sit_outs.min()),
+        "max_sit_outs": int(sit_outs.max()),
+        "repeat_partners": len(teams) - len(set(teams)),
+    }
@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 11∶41∶52 PM EDT
+
+@author: shane
+Resident ratings service (stdlib asyncio HTTP, or a Unix socket), for the club
+kiosks. The ladders are rated once at start up and kept in memory, along with the
+rankings, P(win) matrix, etc. which are only rebuilt after a game is submitted.
+
+  GET  /rankings?mode=singles
+  GET  /players/<username>?mode=singles
+  GET  /odds?mode=singles&players=benji,norm        (doubles: a,b,c,d => ab vs. cd)
+  GET  /matchups?mode=singles&players=benji,norm,mal&n_top=10
+  POST /games?mode=singles                          (body: a CSV row, as JSON)
+
+NOTE: submitted games are rated in memory only, the sheet is still the record.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from pong import DOUBLES, SINGLES, lazy_import
+from pong.checkpoint import load_checkpoint
+from pong.core import TopK, get_or_create_player_by_name
+from pong.env import RATE_PER_SET, RATING_PERIOD_DAYS, RETAIN_GAMES
+from pong.models import DoublesGames, Player, SinglesGames
+from pong.probs import p_match, p_point
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from pong import glickoutils, pairings, store, tsutils
+else:
+    np = lazy_import("numpy")
+    glickoutils = lazy_import("pong.glickoutils")
+    pairings = lazy_import("pong.pairings")
+    store = lazy_import("pong.store")
+    tsutils = lazy_import("pong.tsutils")
+
+# Same as the singles & doubles scripts, so their checkpoints can be resumed
+CHECKPOINT_OPTIONS = {"rate_per_set": RATE_PER_SET, "retain_games": RETAIN_GAMES}
+
+# Match lengths reported by /odds, games to win (e.g. 2 => best of 3)
+MATCH_LENGTHS = [2, 3, 4]
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class HTTPError(Exception):
+    """Error response, e.g. HTTPError(404, "Unknown player: bob")"""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Ladder:
+    """
+    One mode's players (singles or doubles), kept up to date in memory.
+    Rankings & P(win) matrices are cached, and rebuilt on first use after a game.
+
+    :param do_games: Rating update, e.g. singles.do_games() or doubles.do_games()
+    :param do_rating_periods: Rating periods update, i.e. singles.do_rating_periods()
+        Required for singles if PONG_RATING_PERIOD_DAYS is set.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        do_games: Callable[..., None],
+        do_rating_periods: Optional[
+            Callable[[store.GameStore, int], Dict[str, Player]]
+        ] = None,
+    ) -> None:
+        self.mode = mode
+        self.do_games = do_games
+        self.players: Dict[str, Player] = {}
+
+        # Rating periods (singles only), every set is re-rated when one is added
+        self.period_days = RATING_PERIOD_DAYS if mode == SINGLES else 0
+        if self.period_days and do_rating_periods is None:
+            raise ValueError(
+                f"PONG_RATING_PERIOD_DAYS={self.period_days} is set, "
+                f"but no rating periods update was given for {mode}"
+            )
+        self.do_rating_periods = do_rating_periods
+        self.sets: List[Union[SinglesGames, DoublesGames]] = []
+        self.n_sets = 0
+        self.version = 0
+
+        self._ranked: Optional[List[Player]] = None
+        self._index: Optional[Dict[str, int]] = None
+        self._matrix: Optional[glickoutils.SinglesMatrix] = None
+
+        # Match ups searched for, by (players, n_top), e.g. a kiosk's regulars
+        self.matchups: Dict[Tuple[Tuple[str, ...], int], Dict[str, Any]] = {}
+
+    def load(self, rows: List[Dict[str, str]]) -> None:
+        """Rates the CSV rows, resuming from the checkpoint if it's still valid"""
+        if self.period_days:
+            # NOTE: not checkpointed, rating periods are re-rated in full (fast)
+            self.sets = [self.parse(x) for x in rows]
+            self.rate_periods()
+            self.n_sets = len(rows)
+            self.invalidate()
+            return
+
+        self.players, n_rows_applied = load_checkpoint(
+            rows, mode=self.mode, options=CHECKPOINT_OPTIONS
+        )
+        for row in rows[n_rows_applied:]:
+            self.rate(self.parse(row))
+
+        self.n_sets = len(rows)
+        self.invalidate()
+
+    def parse(self, row: Dict[str, str]) -> Union[SinglesGames, DoublesGames]:
+        """Parses a CSV row (or submitted game) for this mode"""
+        if self.mode == SINGLES:
+            return SinglesGames(row)
+        return DoublesGames(row)
+
+    def rate_periods(self) -> None:
+        """Re-rates all the sets, in rating periods (a new set changes its period)"""
+        assert self.do_rating_periods is not None
+        _store = store.GameStore.from_games(self.mode, self.sets, digest="")
+        self.players = self.do_rating_periods(_store, self.period_days)
+
+    def rate(self, games: Union[SinglesGames, DoublesGames]) -> List[Player]:
+        """Runs the rating update for one set, returns its players"""
+        if self.period_days:
+            self.sets.append(games)
+            self.rate_periods()
+            return [self.players[x] for x in games.usernames()]
+
+        if isinstance(games, DoublesGames):
+            _usernames = [
+                games.username1,
+                games.username2,
+                games.username3,
+                games.username4,
+            ]
+        else:
+            _usernames = [games.username1, games.username2]
+
+        _players = [get_or_create_player_by_name(self.players, x) for x in _usernames]
+        self.do_games(*_players, games, alternate=not RATE_PER_SET)
+        return _players
+
+    def submit(self, row: Dict[str, str]) -> List[Player]:
+        """Rates a new set on top of the current ratings, returns its players"""
+        # NOTE: Games() exits on a bad outcome, e.g. 1-2 (fatal in the scripts)
+        _score = row.get("outcome", "").split("-")
+        if len(_score) != 2 or not all(x.isdigit() for x in _score):
+            raise HTTPError(400, f"Invalid outcome: {row.get('outcome')}")
+        if int(_score[0]) < int(_score[1]):
+            raise HTTPError(400, f"Winner score first, invalid: {row['outcome']}")
+
+        try:
+            games = self.parse(row)
+        except KeyError as err:
+            raise HTTPError(400, f"Missing field or unknown club: {err}") from err
+        except ValueError as err:
+            raise HTTPError(400, f"Invalid game: {err}") from err
+
+        # NOTE: do_games would rate a player against (or partnered with) themselves
+        _usernames = games.usernames()
+        if len(set(_usernames)) != len(_usernames):
+            raise HTTPError(400, f"A player is named twice: {', '.join(_usernames)}")
+
+        _players = self.rate(games)
+        self.n_sets += 1
+        self.invalidate()
+        return _players
+
+    def invalidate(self) -> None:
+        """Drops the cached rankings & matrices (the ratings have changed)"""
+        self.version += 1
+        self._ranked = None
+        self._index = None
+        self._matrix = None
+        self.matchups.clear()
+
+    def ranked(self) -> List[Player]:
+        """Gets the players, best first"""
+        if self._ranked is None:
+            self._ranked = sorted(
+                self.players.values(),
+                key=lambda x: float(x.peek_record(self.mode).rating.mu),
+                reverse=True,
+            )
+            self._index = {x.username: i for i, x in enumerate(self._ranked)}
+        return self._ranked
+
+    def rank(self, username: str) -> int:
+        """Gets a player's place on the ladder (1 = top)"""
+        self.ranked()
+        assert self._index is not None
+        return self._index[username] + 1
+
+    def matrix(self) -> glickoutils.SinglesMatrix:
+        """Gets the P(win), Δμ and pooled RD matrices for every pair (singles)"""
+        if self._matrix is None:
+            _ranked = self.ranked()
+            self._matrix = glickoutils.SinglesMatrix.from_ratings(
+                [x.username for x in _ranked],
+                np.array([x.rating_singles.mu for x in _ranked]),
+                np.array([x.rating_singles.phi for x in _ranked]),
+            )
+        return self._matrix
+
+    def get(self, usernames: Iterable[str]) -> List[Player]:
+        """Gets the players by username, in the order given"""
+        _unknown = [x for x in usernames if x not in self.players]
+        if _unknown:
+            raise HTTPError(404, f"No {self.mode} rating for: {', '.join(_unknown)}")
+        return [self.players[x] for x in usernames]
+
+
+def player_summary(player: Player, mode: str) -> Dict[str, Any]:
+    """Gets a player's rating & record, as a JSON-able dict"""
+    _record = player.peek_record(mode)
+    summary: Dict[str, Any] = {
+        "username": player.username,
+        "rating": player.str_rating(mode),
+        "mu": _record.rating.mu,
+        "sigma": _record.rating.sigma,
+        "wins": _record.n_won,
+        "losses": _record.n_lost,
+        "club": player.home_club(mode),
+    }
+    if mode == SINGLES:
+        summary["phi"] = _record.rating.phi
+    return summary
+
+
+def player_detail(player: Player, mode: str) -> Dict[str, Any]:
+    """Gets the summary, plus the history & notable results"""
+    _record = player.peek_record(mode)
+    detail = player_summary(player, mode)
+    detail.update(
+        {
+            "peak": max(_record.history_mu),
+            "avg_opponent": player.avg_opponent(mode),
+            "best_win": player.best_win(mode),
+            "worst_loss": player.worst_loss(mode),
+            "biggest_upset": player.biggest_upset(mode),
+            "clubs": _record.club_counts(),
+            "history": list(_record.history_mu),
+        }
+    )
+    if mode == DOUBLES:
+        detail["avg_partner"] = player.avg_partner(mode)
+    return detail
+
+
+def match_odds(prob_game: float) -> Dict[str, Any]:
+    """Gets P(point) & P(match) from P(game), e.g. p_match["3"] for best of 3"""
+    return {
+        "p_game": prob_game,
+        "p_point": p_point(prob_game),
+        "p_match": {str(2 * n - 1): p_match(prob_game, n) for n in MATCH_LENGTHS},
+    }
+
+
+class Service:
+    """
+    Routes the requests to the (resident) ladders.
+    handle() is plain Python, the asyncio server below only does the HTTP framing.
+    """
+
+    def __init__(self, ladders: Dict[str, Ladder]) -> None:
+        self.ladders = ladders
+
+    def ladder(self, query: Dict[str, List[str]]) -> Ladder:
+        """Gets the ladder for ?mode=, singles by default"""
+        mode = query.get("mode", [SINGLES])[0]
+        if mode not in self.ladders:
+            raise HTTPError(400, f"Unknown mode: {mode}")
+        return self.ladders[mode]
+
+    @staticmethod
+    def usernames(query: Dict[str, List[str]]) -> List[str]:
+        """Gets ?players=a,b,c (or repeated ?players=a&players=b)"""
+        return [y for x in query.get("players", []) for y in x.split(",") if y]
+
+    # pylint: disable=too-many-return-statements
+    def handle(
+        self, method: str, target: str, body: bytes = b""
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Serves one request, returns (status code, JSON payload)"""
+        _url = urlsplit(target)
+        path = [unquote(x) for x in _url.path.split("/") if x]
+        query = parse_qs(_url.query)
+
+        try:
+            if path == ["games"]:
+                if method != "POST":
+                    raise HTTPError(405, "Use POST to submit a game")
+                return 201, self.submit(self.ladder(query), body)
+
+            if method != "GET":
+                raise HTTPError(405, f"Use GET for /{'/'.join(path)}")
+            if path == ["rankings"]:
+                return 200, self.rankings(self.ladder(query))
+            if len(path) == 2 and path[0] == "players":
+                return 200, self.player(self.ladder(query), path[1])
+            if path == ["odds"]:
+                return 200, self.odds(self.ladder(query), self.usernames(query))
+            if path == ["matchups"]:
+                _n_top = int(query.get("n_top", ["10"])[0])
+                if _n_top < 1:
+                    raise HTTPError(400, f"n_top should be at least 1: {_n_top}")
+                return 200, self.matchups(
+                    self.ladder(query), self.usernames(query), _n_top
+                )
+            raise HTTPError(404, f"Unknown path: {_url.path}")
+
+        except HTTPError as err:
+            return err.status, {"error": str(err)}
+        except ValueError as err:
+            return 400, {"error": str(err)}
+
+    @staticmethod
+    def rankings(ladder: Ladder) -> Dict[str, Any]:
+        """GET /rankings"""
+        return {
+            "mode": ladder.mode,
+            "version": ladder.version,
+            "n_sets": ladder.n_sets,
+            "players": [
+                {"rank": i + 1, **player_summary(x, ladder.mode)}
+                for i, x in enumerate(ladder.ranked())
+            ],
+        }
+
+    @staticmethod
+    def player(ladder: Ladder, username: str) -> Dict[str, Any]:
+        """GET /players/<username>"""
+        (_player,) = ladder.get([username])
+        return {
+            "rank": ladder.rank(username),
+            "mode": ladder.mode,
+            **player_detail(_player, ladder.mode),
+        }
+
+    @staticmethod
+    def odds(ladder: Ladder, usernames: List[str]) -> Dict[str, Any]:
+        """GET /odds, player 1 vs. player 2 (or team 1 vs. team 2, for doubles)"""
+        _players = ladder.get(usernames)
+
+        if ladder.mode == SINGLES:
+            if len(_players) != 2:
+                raise HTTPError(400, "Singles odds need 2 players, e.g. players=a,b")
+            _matrix = ladder.matrix()
+            i, j = _matrix.index[usernames[0]], _matrix.index[usernames[1]]
+            return {
+                "players": usernames,
+                "delta_mu": float(_matrix.delta_mu[i, j]),
+                "pooled_rd": float(_matrix.pooled_rd[i, j]),
+                **match_odds(_matrix.p_game(usernames[0], usernames[1])),
+            }
+
+        if len(_players) != 4:
+            raise HTTPError(400, "Doubles odds need 4 players, e.g. players=a,b,c,d")
+        _mu = [x.rating_doubles.mu for x in _players]
+        _sigma_2 = sum(x.rating_doubles.sigma**2 for x in _players)
+        _delta_mu = _mu[0] + _mu[1] - _mu[2] - _mu[3]
+        return {
+            "players": usernames,
+            "delta_mu": _delta_mu,
+            "quality": float(tsutils.quality_2v2(np.array(_delta_mu), _sigma_2)),
+            **match_odds(
+                float(tsutils.win_probability_2v2(np.array(_delta_mu), _sigma_2))
+            ),
+        }
+
+    @classmethod
+    def matchups(
+        cls, ladder: Ladder, usernames: List[str], n_top: int
+    ) -> Dict[str, Any]:
+        """GET /matchups, cached until the next game (the doubles search is O(n⁴))"""
+        _key = (tuple(sorted(usernames)), n_top)
+        if _key not in ladder.matchups:
+            ladder.matchups[_key] = cls.search_matchups(ladder, usernames, n_top)
+        return ladder.matchups[_key]
+
+    @staticmethod
+    def search_matchups(
+        ladder: Ladder, usernames: List[str], n_top: int
+    ) -> Dict[str, Any]:
+        """Gets the fairest games among the players (or everyone), best first"""
+        _players = ladder.get(usernames) if usernames else ladder.ranked()
+        _players = sorted(
+            _players,
+            key=lambda x: float(x.peek_record(ladder.mode).rating.mu),
+            reverse=True,
+        )
+
+        if ladder.mode == SINGLES:
+            # Fairest first, by the underdog's P(win)
+            _matrix = ladder.matrix()
+            _index = [_matrix.index[x.username] for x in _players]
+            matchups: TopK[Dict[str, Any]] = TopK(n_top, key=lambda x: x["p_lose"])
+            for _a, _b in zip(*np.triu_indices(len(_index), k=1)):
+                _i, _j = _index[_a], _index[_b]
+                matchups.push(
+                    {
+                        "players": [_players[_a].username, _players[_b].username],
+                        "delta_mu": float(_matrix.delta_mu[_i, _j]),
+                        "pooled_rd": float(_matrix.pooled_rd[_i, _j]),
+                        "p_win": float(_matrix.p_win[_i, _j]),
+                        "p_lose": float(_matrix.p_win[_j, _i]),
+                    }
+                )
+            return {"mode": ladder.mode, "matchups": matchups.items()}
+
+        if len(_players) < 4:
+            raise HTTPError(400, "Doubles match ups need at least 4 players")
+        _matchups, _, _ = pairings.search_doubles_matchups(
+            np.array([x.rating_doubles.mu for x in _players]),
+            np.array([x.rating_doubles.sigma for x in _players]),
+            n_top=n_top,
+        )
+        return {
+            "mode": ladder.mode,
+            "matchups": [
+                {
+                    "players": [_players[i].username for i in x[:4]],
+                    "delta_mu": x[4],
+                    "two_rd": x[5],
+                    "quality": x[6],
+                    "p_win": x[7],
+                }
+                for x in _matchups
+            ],
+        }
+
+    @staticmethod
+    def submit(ladder: Ladder, body: bytes) -> Dict[str, Any]:
+        """POST /games, e.g. {"date": ..., "winner": ..., "outcome": "2-1", ...}"""
+        try:
+            row = json.loads(body or b"{}")
+        except json.JSONDecodeError as err:
+            raise HTTPError(400, f"Invalid JSON: {err}") from err
+        if not isinstance(row, dict):
+            raise HTTPError(400, "Expected a JSON object (one CSV row)")
+
+        _players = ladder.submit({str(k).lower(): str(v) for k, v in row.items()})
+        return {
+            "mode": ladder.mode,
+            "version": ladder.version,
+            "players": [
+                {"rank": ladder.rank(x.username), **player_summary(x, ladder.mode)}
+                for x in _players
+            ],
+        }
+
+
+async def handle_connection(
+    service: Service, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """
+    Minimal HTTP/1.1 framing (keep-alive, Content-Length bodies) around handle().
+    Requests are served one at a time, so no locking is needed around the ladders.
+    """
+    try:
+        while True:
+            _request_line = await reader.readline()
+            if not _request_line.strip():
+                break
+            method, target, version = _request_line.decode("latin-1").split()
+
+            headers: Dict[str, str] = {}
+            while True:
+                _line = await reader.readline()
+                if not _line.strip():
+                    break
+                _key, _, _value = _line.decode("latin-1").partition(":")
+                headers[_key.strip().lower()] = _value.strip()
+
+            body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+            t_start = time.perf_counter()
+            status, payload = service.handle(method, target, body)
+            _ms = round((time.perf_counter() - t_start) * 1000, 3)
+            _body = json.dumps({**payload, "ms": _ms}).encode()
+
+            _keep_alive = version == "HTTP/1.1" and headers.get("connection") != "close"
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(_body)}\r\n"
+                    f"Connection: {'keep-alive' if _keep_alive else 'close'}\r\n"
+                    "\r\n"
+                ).encode("latin-1")
+                + _body
+            )
+            await writer.drain()
+            if not _keep_alive:
+                break
+
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(
+    service: Service,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    socket_path: Optional[str] = None,
+) -> asyncio.Server:
+    """
+    Starts listening on host:port (port 0 picks a free one), or a Unix socket.
+    """
+
+    async def _on_connect(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await handle_connection(service, reader, writer)
+
+    if socket_path:
+        return await asyncio.start_unix_server(_on_connect, path=socket_path)
+    return await asyncio.start_server(_on_connect, host=host, port=port)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 03∶12∶48 AM EDT
+
+@author: shane
+Columnar (binary) store of the games, written alongside the cached CSV file.
+Player & club IDs, day ordinals and scores, each a contiguous column, which are
+memory mapped on load. A cold start (unchanged sheet) skips parsing the CSV.
+The CSV file is still cached as well, for (manually) auditing edits.
+NOTE: only the rating period engine (do_rating_periods) reads the columns as is,
+  the per-game engines (do_games) still take Games objects, rebuilt by games().
+
+Layout: MAGIC, the header's length (uint32), the JSON header, then the columns,
+each 8-byte aligned (their dtype, shape & offset are in the header).
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Type
+
+from pong import CSV_GAMES_FILE_PATHS, GAMES_STORE_FILE_PATHS, atomic_write, lazy_import
+from pong.fetch import hash_file
+from pong.models import Club, G, Games
+from pong.registry import Registry
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = lazy_import("numpy")
+
+MAGIC = b"PONGGAME"
+
+# Bump this whenever the layout changes, to force a rebuild
+STORE_VERSION = 2
+
+# Little endian, whatever the platform
+DTYPES = {
+    "day": "<i4",
+    "club": "<i4",
+    "score": "<u2",
+    "player": "<i4",
+    "prefix": "u1",
+}
+
+# Size of each row's prefix hash (SHA-256)
+_DIGEST_SIZE = 32
+
+_ALIGN = 8
+_PREAMBLE = struct.Struct("<8sI")
+
+
+def _padding(n_bytes: int) -> bytes:
+    """Pads up to the next aligned offset"""
+    return b"\0" * (-n_bytes % _ALIGN)
+
+
+class GameStore:
+    """
+    The games as columns, one entry per set (CSV row):
+      day: date ordinals, club: club IDs, score: (winner's, loser's) games won,
+      player: player IDs, winner(s) first. e.g. (winner, loser) for singles
+      prefix: hash of the CSV rows up to (and including) each one, if known
+    IDs index into players & clubs, in order of first appearance.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        mode: str,
+        players: List[str],
+        clubs: List[str],
+        columns: Dict[str, np.ndarray],
+        digest: str,
+    ) -> None:
+        """
+        :param digest: Hash of the CSV rows (see: pong.checkpoint.hash_rows)
+        """
+        self.mode = mode
+        self.players = players
+        self.clubs = clubs
+        self.day = columns["day"]
+        self.club = columns["club"]
+        self.score = columns["score"]
+        self.player = columns["player"]
+        self.prefix = columns["prefix"]
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def prefix_digest(self, n_rows: int) -> Optional[str]:
+        """Gets the hash of the first n_rows (see: hash_rows), None if not known"""
+        if not 0 < n_rows <= len(self.prefix):
+            return None
+        return bytes(self.prefix[n_rows - 1]).hex()
+
+    @classmethod
+    def from_games(
+        cls, mode: str, sets: Sequence[Games], digest: str, prefix: bytes = b""
+    ) -> GameStore:
+        """
+        Interns the players & clubs, and builds the columns.
+
+        :param prefix: Each row's prefix hash, back to back (see: StreamingCheckpoint)
+        """
+        # NOTE: IDs local to the store (not the shared ones), so they stay dense
+        players, clubs = Registry(), Registry()
+
+        n_players = 2 if not sets else len(sets[0].usernames())
+        columns = {
+            "day": np.array([x.date.toordinal() for x in sets], dtype=DTYPES["day"]),
+            "club": np.array(
+                [clubs.intern(x.location.full_name) for x in sets],
+                dtype=DTYPES["club"],
+            ),
+            "score": np.array([x.score for x in sets], dtype=DTYPES["score"]).reshape(
+                -1, 2
+            ),
+            "player": np.array(
+                [[players.intern(y) for y in x.usernames()] for x in sets],
+                dtype=DTYPES["player"],
+            ).reshape(-1, n_players),
+            "prefix": np.frombuffer(bytes(prefix), dtype=DTYPES["prefix"]).reshape(
+                -1, _DIGEST_SIZE
+            ),
+        }
+        return cls(mode, players.names, clubs.names, columns, digest)
+
+    @classmethod
+    def load(cls, mode: str) -> Optional[GameStore]:
+        """
+        Memory maps the saved store. None if there isn't one, or if it was built from
+        a different CSV file than the cached one.
+        """
+        _file_path = GAMES_STORE_FILE_PATHS[mode]
+        if (
+            not os.path.isfile(_file_path)
+            or os.path.getsize(_file_path) < _PREAMBLE.size
+        ):
+            return None
+
+        _buffer = np.memmap(_file_path, dtype=np.uint8, mode="r")
+        _magic, _n_header = _PREAMBLE.unpack(_buffer[: _PREAMBLE.size].tobytes())
+        if _magic != MAGIC:
+            return None
+
+        _header_start, _header_end = _PREAMBLE.size, _PREAMBLE.size + _n_header
+        header = json.loads(_buffer[_header_start:_header_end].tobytes())
+        if header["version"] != STORE_VERSION or header["csv_sha256"] != hash_file(
+            CSV_GAMES_FILE_PATHS[mode]
+        ):
+            return None
+
+        # NOTE: views onto the mapped file, nothing is read until it's used
+        _data_start = _header_end + len(_padding(_header_end))
+        columns = {}
+        for name, (_dtype, _shape, _offset) in header["columns"].items():
+            _start = _data_start + _offset
+            _end = _start + int(np.prod(_shape)) * np.dtype(_dtype).itemsize
+            columns[name] = _buffer[_start:_end].view(_dtype).reshape(_shape)
+
+        return cls(mode, header["players"], header["clubs"], columns, header["digest"])
+
+    def save(self) -> None:
+        """Persists the columns, tied to the cached CSV file (by its hash)"""
+        columns = {name: getattr(self, name) for name in DTYPES}
+
+        _offset = 0
+        _layout = {}
+        for name, column in columns.items():
+            _layout[name] = (DTYPES[name], list(column.shape), _offset)
+            _offset += column.nbytes + len(_padding(column.nbytes))
+
+        header = json.dumps(
+            {
+                "version": STORE_VERSION,
+                "mode": self.mode,
+                "csv_sha256": hash_file(CSV_GAMES_FILE_PATHS[self.mode]),
+                "digest": self.digest,
+                "players": self.players,
+                "clubs": self.clubs,
+                "columns": _layout,
+            }
+        ).encode()
+
+        with atomic_write(GAMES_STORE_FILE_PATHS[self.mode], "wb") as _f:
+            _f.write(_PREAMBLE.pack(MAGIC, len(header)))
+            _f.write(header)
+            _f.write(_padding(_PREAMBLE.size + len(header)))
+            for name, column in columns.items():
+                _f.write(np.ascontiguousarray(column, dtype=DTYPES[name]).tobytes())
+                _f.write(_padding(column.nbytes))
+
+    def games(self, cls: Type[G]) -> Iterator[G]:
+        """
+        Rebuilds the games from the columns, e.g. SinglesGames, for do_games().
+        Nothing is parsed (or validated again), and the clubs are shared.
+        """
+        _clubs = [Club.get(x) for x in self.clubs]
+
+        for _day, _club, _score, _player in zip(
+            self.day.tolist(),
+            self.club.tolist(),
+            self.score.tolist(),
+            self.player.tolist(),
+        ):
+            yield cls.from_values(
+                date.fromordinal(_day),
+                (_score[0], _score[1]),
+                _clubs[_club],
+                [self.players[x] for x in _player],
+            )
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 09∶12∶40 PM EDT
+
+@author: shane
+Monte Carlo tournament simulator, e.g. each player's chance to win the bracket.
+Plays a whole chunk of tournaments at once, as NumPy array operations, using the
+P(match) of every pair of entrants (see pong.probs.p_match_array).
+Chunks can be spread across a process pool, with estimates streamed back as they
+finish (with confidence intervals).
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from pong.probs import p_match_array
+from pong.tsutils import win_probability_2v2
+
+# pylint: disable=invalid-name
+
+# Formats
+ROUND_ROBIN = "round_robin"
+SINGLE_ELIMINATION = "elimination"
+
+# Tournaments played per chunk (bounds the memory, about 8 bytes per game played)
+CHUNK_SIZE = 10000
+
+
+class Estimate:
+    """
+    Running tally of finishing places, over all the tournaments played so far.
+    place_counts[i, k] is the number of times entrant i finished in place k + 1.
+    Each add() returns a new Estimate, so the streamed ones can be kept as is.
+    NOTE: in single elimination, the losers of a round share a place (e.g. 3rd)
+    """
+
+    def __init__(self, n_entrants: int) -> None:
+        self.n_sims = 0
+        self.place_counts = np.zeros((n_entrants, n_entrants), dtype=np.int64)
+
+    def add(self, place_counts: np.ndarray, n_sims: int) -> "Estimate":
+        """Adds the place counts from another chunk, returns a new Estimate"""
+        estimate = Estimate(len(self.place_counts))
+        estimate.place_counts = self.place_counts + place_counts
+        estimate.n_sims = self.n_sims + n_sims
+        return estimate
+
+    def p_top(self, n: int = 1) -> np.ndarray:
+        """Gets each entrant's chance of finishing in the top n (n=1 => winning)"""
+        return np.asarray(self.place_counts[:, :n].sum(axis=1) / max(self.n_sims, 1))
+
+    def ci_top(self, n: int = 1, z: float = 1.96) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the (lower, upper) Wilson score interval on p_top(n), 95% by default.
+        Unlike p ± z * stderr, it stays inside [0, 1] (e.g. for long shots).
+        """
+        p = self.p_top(n)
+        _n = max(self.n_sims, 1)
+        _center = (p + z**2 / (2 * _n)) / (1 + z**2 / _n)
+        _half_width = (
+            z * np.sqrt(p * (1 - p) / _n + z**2 / (4 * _n**2)) / (1 + z**2 / _n)
+        )
+        return _center - _half_width, _center + _half_width
+
+
+def p_game_singles(p_win: np.ndarray) -> np.ndarray:
+    """
+    Gets P(row wins a game vs. column), averaged over both players' impact.
+    :param p_win: The (square) P(win) matrix, see glickoutils.SinglesMatrix
+    """
+    return np.asarray((p_win + (1 - p_win.T)) / 2)
+
+
+def p_game_doubles(mu: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+    """
+    Gets P(row team wins a game vs. column team), with TrueSkill.
+    :param mu: Array (n_teams, 2) of each team's players' mu
+    :param sigma: Array (n_teams, 2) of each team's players' sigma
+    """
+    team_mu = mu.sum(axis=1)
+    team_sigma_2 = (sigma**2).sum(axis=1)
+    return win_probability_2v2(
+        team_mu[:, None] - team_mu[None, :],
+        team_sigma_2[:, None] + team_sigma_2[None, :],
+    )
+
+
+def p_match_matrix(p_game: np.ndarray, m: int = 2) -> np.ndarray:
+    """
+    Gets P(row wins a match vs. column), from P(game) (see pong.probs).
+    :param p_game: Square matrix of P(row wins a game vs. column)
+    :param m: Games to win the match, e.g. win 2 games => 3 game match
+    """
+    p_match = p_match_array(p_game, m)
+    np.fill_diagonal(p_match, 0.5)
+    return p_match
+
+
+def bracket_order(n_slots: int) -> List[int]:
+    """
+    Gets the seed (0-based) in each slot of a bracket, e.g. for 8 slots
+      [0, 7, 3, 4, 1, 6, 2, 5] => 1v8, 4v5, 2v7, 3v6
+    The top 2 seeds can only meet in the final, the top 4 in the semis, etc.
+    """
+    order = [0]
+    while len(order) < n_slots:
+        _size = 2 * len(order)
+        order = [x for seed in order for x in (seed, _size - 1 - seed)]
+    return order
+
+
+def simulate_round_robin(
+    p_match: np.ndarray, n_sims: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Plays n_sims round robins, every entrant plays every other once.
+    Ranked by matches won, ties are broken at random.
+    Returns the finishing places (n_sims, n_entrants), starting at 1.
+    """
+    n = len(p_match)
+    first, second = np.triu_indices(n, k=1)
+
+    # Who won each match (n_sims, n_pairs), +1 for first & -1 for second (if won)
+    won = rng.random((n_sims, len(first))) < p_match[first, second]
+    _incidence = np.zeros((len(first), n), dtype=np.float32)
+    _incidence[np.arange(len(first)), first] = 1
+    _incidence[np.arange(len(first)), second] = -1
+
+    # Tally the wins per entrant (second wins all its matches, unless it lost)
+    wins = won.astype(np.float32) @ _incidence + np.bincount(second, minlength=n)
+
+    # Rank (most wins first), the random fraction breaks the ties
+    order = np.argsort(-(wins + rng.random((n_sims, n))), axis=1)
+    places = np.empty_like(order)
+    np.put_along_axis(places, order, np.arange(1, n + 1)[None, :], axis=1)
+    return places
+
+
+def simulate_single_elimination(
+    p_match: np.ndarray,
+    n_sims: int,
+    rng: np.random.Generator,
+    seeds: Optional[List[int]] = None,
+) -> np.ndarray:
+    """
+    Plays n_sims single elimination brackets (the top seeds get any byes).
+    The losers of each round share a place, e.g. 2, 3, 5, 9 (for 16 entrants).
+    Returns the finishing places (n_sims, n_entrants), starting at 1.
+
+    :param seeds: Entrants in seeding order (best first), defaults to as given
+    """
+    n = len(p_match)
+    if seeds is None:
+        seeds = list(range(n))
+    n_slots = 1 << max(n - 1, 0).bit_length()
+
+    # Entrant in each slot, -1 for a bye
+    _slots = np.array(
+        [seeds[x] if x < n else -1 for x in bracket_order(n_slots)], dtype=int
+    )
+    alive = np.tile(_slots, (n_sims, 1))
+    places = np.ones((n_sims, n), dtype=int)
+    _rows = np.arange(n_sims)[:, None]
+
+    n_alive = n_slots
+    while n_alive > 1:
+        a, b = alive[:, 0::2], alive[:, 1::2]
+
+        # Anyone facing a bye goes through, otherwise draw against P(match)
+        p = p_match[np.maximum(a, 0), np.maximum(b, 0)]
+        a_wins = (b < 0) | ((a >= 0) & (rng.random(a.shape) < p))
+        winners, losers = np.where(a_wins, a, b), np.where(a_wins, b, a)
+
+        # Losers finish just behind everyone still in it
+        _mask = losers >= 0
+        _sims = np.broadcast_to(_rows, losers.shape)[_mask]
+        n_alive //= 2
+        places[_sims, losers[_mask]] = n_alive + 1
+        alive = winners
+
+    return places
+
+
+def simulate_chunk(
+    p_match: np.ndarray,
+    tournament_format: str,
+    n_sims: int,
+    seed: np.random.SeedSequence,
+    seeds: Optional[List[int]] = None,
+) -> np.ndarray:
+    """
+    Plays one chunk of tournaments, and counts the finishing places.
+    Returns place_counts[i, k], times entrant i finished in place k + 1.
+    """
+    rng = np.random.default_rng(seed)
+    if tournament_format == ROUND_ROBIN:
+        places = simulate_round_robin(p_match, n_sims, rng)
+    elif tournament_format == SINGLE_ELIMINATION:
+        places = simulate_single_elimination(p_match, n_sims, rng, seeds=seeds)
+    else:
+        raise ValueError(f"Unknown tournament format: {tournament_format}")
+
+    n = len(p_match)
+    _flat = np.arange(n)[None, :] * n + (places - 1)
+    return np.bincount(_flat.ravel(), minlength=n * n).reshape(n, n)
+
+
+# pylint: disable=too-many-arguments
+def iter_simulations(
+    p_match: np.ndarray,
+    tournament_format: str = SINGLE_ELIMINATION,
+    n_sims: int = 100000,
+    seeds: Optional[List[int]] = None,
+    seed: int = 0,
+    n_workers: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Estimate]:
+    """
+    Plays n_sims tournaments in chunks, yielding the running Estimate after each.
+    Every chunk has its own (spawned) random stream, so the final estimate is the
+    same for any number of workers, only the order of the progress differs.
+
+    :param p_match: Square matrix of P(row wins a match vs. column)
+    :param seeds: Entrants in seeding order (single elimination only)
+    :param seed: Seeds the random streams, for repeatable results
+    :param n_workers: Processes to play the chunks in (1 = play in this process)
+    """
+    _chunks = [
+        min(chunk_size, n_sims - x) for x in range(0, n_sims, max(chunk_size, 1))
+    ]
+    _streams = np.random.SeedSequence(seed).spawn(len(_chunks))
+    estimate = Estimate(len(p_match))
+
+    if n_workers <= 1:
+        for _n, _stream in zip(_chunks, _streams):
+            estimate = estimate.add(
+                simulate_chunk(p_match, tournament_format, _n, _stream, seeds), _n
+            )
+            yield estimate
+        return
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {
+            executor.submit(
+                simulate_chunk, p_match, tournament_format, _n, _stream, seeds
+            ): _n
+            for _n, _stream in zip(_chunks, _streams)
+        }
+        for future in as_completed(futures):
+            estimate = estimate.add(future.result(), futures[future])
+            yield estimate
+
+
+def count_matches(tournament_format: str, n_entrants: int) -> int:
+    """Gets the matches played per tournament (byes not included)"""
+    if tournament_format == ROUND_ROBIN:
+        return math.comb(n_entrants, 2)
+    return max(n_entrants - 1, 0)
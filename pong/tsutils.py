@@ -8,11 +8,36 @@ Helper functions for TrueSkill algo
 
 import itertools
 import math
-from typing import Tuple
+from typing import Optional, Tuple
 
+import numpy as np
 import trueskill  # pylint: disable=import-error
 from trueskill import BETA  # pylint: disable=import-error
 
+from pong import DRAW_PROB_DOUBLES
+
+# pylint: disable=invalid-name
+
+# Winners (team 1) move up, losers (team 2) move down
+_SIGN_2V2 = np.array([1.0, 1.0, -1.0, -1.0])
+
+# Chebyshev fit used by erfc(), highest degree first
+_ERFC_COEFFICIENTS = (
+    0.17087277,
+    -0.82215223,
+    1.48851587,
+    -1.13520398,
+    0.27886807,
+    -0.18628806,
+    0.09678418,
+    0.37409196,
+    1.00002368,
+    -1.26551223,
+)
+
+# Environment used for doubles ratings
+ENV_DOUBLES = trueskill.TrueSkill(draw_probability=DRAW_PROB_DOUBLES)
+
 
 def win_probability(team1: Tuple, team2: Tuple) -> float:
     """
@@ -24,3 +49,87 @@ def win_probability(team1: Tuple, team2: Tuple) -> float:
     size = len(team1) + len(team2)
     denom = math.sqrt(size * (BETA * BETA) + sum_sigma)
     return float(trueskill.global_env().cdf(delta_mu / denom))
+
+
+def erfc(x: np.ndarray) -> np.ndarray:
+    """
+    Complementary error function, vectorized.
+    Same approximation as trueskill's backend (fractional error < 1.2e-7).
+    """
+    z = np.abs(x)
+    t = 1.0 / (1.0 + z / 2.0)
+
+    # Evaluate the polynomial in t (Horner's method)
+    poly = np.zeros_like(t)
+    for coefficient in _ERFC_COEFFICIENTS:
+        poly = coefficient + t * poly
+
+    r = t * np.exp(-z * z + poly)
+    return np.where(x < 0, 2.0 - r, r)
+
+
+def cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal cumulative distribution function, vectorized"""
+    return 0.5 * erfc(np.divide(x, -math.sqrt(2)))
+
+
+def pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal probability density function, vectorized"""
+    return np.exp(-(x**2) / 2) / math.sqrt(2 * math.pi)  # type: ignore
+
+
+def quality_2v2(
+    delta_mu: np.ndarray, sum_sigma_2: np.ndarray, beta: float = BETA
+) -> np.ndarray:
+    """
+    Closed-form match quality for two teams of two, on arrays of team aggregates.
+    Equivalent to trueskill.quality([(r1, r2), (r3, r4)]), minus the matrices.
+
+    :param delta_mu: Team 1 mu sum minus team 2 mu sum, (r1 + r2) - (r3 + r4)
+    :param sum_sigma_2: Sum of all 4 players' sigma²
+    :param beta: Performance spread, defaults to the global environment's
+    """
+    c_2 = 4 * beta**2 + sum_sigma_2
+    return np.sqrt(4 * beta**2 / c_2) * np.exp(-(delta_mu**2) / (2 * c_2))
+
+
+def win_probability_2v2(
+    delta_mu: np.ndarray, sum_sigma_2: np.ndarray, beta: float = BETA
+) -> np.ndarray:
+    """
+    Win probability for team 1, on arrays of team aggregates.
+    Vectorized win_probability(), see quality_2v2() for the parameters.
+    """
+    return cdf(delta_mu / np.sqrt(4 * beta**2 + sum_sigma_2))
+
+
+def rate_2v2(
+    mu: np.ndarray, sigma: np.ndarray, env: Optional[trueskill.TrueSkill] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Closed-form TrueSkill update for two teams of two, where team 1 wins.
+    Equivalent to env.rate([(r1, r2), (r3, r4)]), minus building the factor graph.
+
+    :param mu: Shape (4,) or (n_games, 4), columns are (winner 1, winner 2,
+        loser 1, loser 2). Games within a batch must not share players.
+    :param sigma: Same shape as mu
+    :param env: TrueSkill environment, defaults to ENV_DOUBLES
+    """
+    env = env or ENV_DOUBLES
+    draw_margin = trueskill.calc_draw_margin(env.draw_probability, size=4, env=env)
+
+    # Add the dynamics factor (tau), then sum up each team's performance
+    sigma_2 = sigma**2 + env.tau**2
+    c_2 = np.sum(sigma_2, axis=-1, keepdims=True) + 4 * env.beta**2
+    c = np.sqrt(c_2)
+    delta_mu = np.sum(mu * _SIGN_2V2, axis=-1, keepdims=True)
+
+    # Truncated Gaussian (non-draw) correction factors, "V" and "W"
+    x = (delta_mu - draw_margin) / c
+    _cdf = cdf(x)
+    v = np.where(_cdf > 0, pdf(x) / np.where(_cdf > 0, _cdf, 1.0), -x)
+    w = v * (v + x)
+
+    new_mu = mu + _SIGN_2V2 * sigma_2 / c * v
+    new_sigma = np.sqrt(sigma_2 * (1 - sigma_2 / c_2 * w))
+    return new_mu, new_sigma
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 06∶58∶12 PM EDT
+
+@author: shane
+Builds a night's rotation of doubles games for the present players.
+"""
+import os
+import shlex
+import sys
+import time
+from typing import List
+
+import numpy as np
+from tabulate import tabulate
+
+from pong.core import print_title
+from pong.env import N_ROUNDS, N_TABLES
+from pong.matchups import build_players
+from pong.models import Player
+from pong.scheduler import Round, schedule_session, summarize_session
+
+
+def print_schedule(rounds: List[Round], players: List[Player]) -> None:
+    """Prints the games (by table) and the players sitting out, for each round"""
+    for i_round, _round in enumerate(rounds):
+        print_title(f"Round {i_round + 1}")
+        _table = tabulate(
+            [
+                (
+                    game.table,
+                    f"{players[game.i1].username} & {players[game.i2].username}",
+                    f"{players[game.i3].username} & {players[game.i4].username}",
+                    round(game.delta_mu, 1),
+                    round(game.quality, 2),
+                    round(game.p_win, 2),
+                )
+                for game in _round.games
+            ],
+            headers=["Table", "Team 1", "Team 2", "Δμ", "Q", "P(w)"],
+        )
+        print(_table)
+
+        if _round.sitting_out:
+            print()
+            print(
+                "Sitting out: "
+                + ", ".join(players[x].username for x in _round.sitting_out)
+            )
+
+
+if __name__ == "__main__":
+    # Parse player names
+    # NOTE: either pass in on command line or set in .env file
+    _players = sys.argv[1:] or shlex.split(os.environ.get("PONG_PLAYERS") or str())
+
+    # Load players/ratings from CSV
+    _, doubles_players = build_players()
+    _unknown = [x for x in _players if x not in doubles_players]
+    if _unknown:
+        sys.exit(f"No doubles rating for: {', '.join(_unknown)}")
+    if len(_players) < 4:
+        sys.exit(f"Need at least 4 players, got: {len(_players)}")
+
+    present_players = [doubles_players[x] for x in _players]
+
+    t_start = time.time()
+    _rounds = schedule_session(
+        np.array([x.rating_doubles.mu for x in present_players]),
+        np.array([x.rating_doubles.sigma for x in present_players]),
+        n_tables=N_TABLES,
+        n_rounds=N_ROUNDS,
+    )
+    t_delta = time.time() - t_start
+
+    print_schedule(_rounds, present_players)
+
+    # Summary
+    _summary = summarize_session(_rounds, n_players=len(present_players))
+    print()
+    print(
+        f"Scheduled {N_ROUNDS} rounds on {N_TABLES} tables "
+        f"for {len(present_players)} players in {round(t_delta * 1000, 1)}ms"
+    )
+    print(
+        f"avg(Q)={round(_summary['avg_quality'], 2)}, "
+        f"min(Q)={round(_summary['min_quality'], 2)}, "
+        f"sit-outs {_summary['min_sit_outs']}-{_summary['max_sit_outs']}, "
+        f"repeat partners {_summary['repeat_partners']}"
+    )
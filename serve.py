@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 11∶58∶20 PM EDT
+
+@author: shane
+Runs the resident ratings service (see: pong/service.py), e.g. for club kiosks.
+  curl localhost:8008/rankings?mode=doubles
+"""
+import asyncio
+import time
+
+from doubles import do_games as do_games_doubles
+from pong import DOUBLES, SINGLES
+from pong.core import build_csv_readers, print_title
+from pong.env import SERVE_HOST, SERVE_PORT, SERVE_SOCKET
+from pong.service import Ladder, Service, start_server
+from singles import do_games as do_games_singles
+from singles import do_rating_periods
+
+
+def build_service() -> Service:
+    """Rates both ladders (resuming from the checkpoints), to be kept in memory"""
+    ladders = {
+        SINGLES: Ladder(SINGLES, do_games_singles, do_rating_periods),
+        DOUBLES: Ladder(DOUBLES, do_games_doubles),
+    }
+
+    # Both sheets are fetched at once
+    readers = build_csv_readers(list(ladders))
+
+    for mode, ladder in ladders.items():
+        t_start = time.time()
+        ladder.load(list(readers[mode]))
+        print(
+            f"Rated {ladder.n_sets} {mode} sets, {len(ladder.players)} players "
+            f"in {round((time.time() - t_start) * 1000, 1)} ms"
+        )
+
+    # Warm up the caches (and lazy imports), before the first kiosk asks
+    service = Service(ladders)
+    for mode in ladders:
+        service.handle("GET", f"/matchups?mode={mode}")
+
+    return service
+
+
+async def main() -> None:
+    """Serves until interrupted"""
+    service = build_service()
+    server = await start_server(
+        service, host=SERVE_HOST, port=SERVE_PORT, socket_path=SERVE_SOCKET
+    )
+
+    _address = SERVE_SOCKET or f"http://{SERVE_HOST}:{SERVE_PORT}"
+    print_title(f"Serving ratings on {_address}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -9,27 +9,47 @@ import math
 import sys
 import time
 from datetime import datetime
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
 from tabulate import tabulate
 
-from pong import SINGLES
+from pong import MATRIX_FILE_PATH, SINGLES
+from pong.checkpoint import StreamingCheckpoint
 from pong.core import (
+    DownloadInterrupted,
+    SheetPoller,
+    TopK,
     add_club,
-    build_csv_reader,
     cache_ratings_csv_file,
     filter_players,
     get_or_create_player_by_name,
+    load_games,
     print_title,
+    watch,
 )
+from pong.env import RATE_PER_SET, RATING_PERIOD_DAYS, RETAIN_GAMES, WATCH_INTERVAL
 from pong.glicko2 import glicko2
+from pong.glickoutils import Glicko2Batch, SinglesMatrix
 from pong.models import Club, Player, SinglesGames
+from pong.store import GameStore
 
+# Shared engines (the system constants never change between games)
+GLICKO = glicko2.Glicko2()
+GLICKO_BATCH = Glicko2Batch.from_env(GLICKO)
 
-def do_games(player1: Player, player2: Player, games: SinglesGames) -> None:
+# A checkpoint built with different options can't be resumed
+CHECKPOINT_OPTIONS = {"rate_per_set": RATE_PER_SET, "retain_games": RETAIN_GAMES}
+
+
+def do_games(
+    player1: Player, player2: Player, games: SinglesGames, alternate: bool = True
+) -> None:
     """
     Updates ratings for given games & players
     NOTE: player1 wins, player2 loses
+    :param alternate: Rate game by game (won games first, then alternate), otherwise
+        rate the whole set as one rating period, in a single update
     """
 
     def _update_rating(_player1: Player, _player2: Player) -> None:
@@ -38,7 +58,7 @@ def do_games(player1: Player, player2: Player, games: SinglesGames) -> None:
         TODO:
             - store date and other meta data in stack
         """
-        glicko = glicko2.Glicko2()
+        glicko = GLICKO
 
         rating1 = _player1.rating_singles
         rating2 = _player2.rating_singles
@@ -47,13 +67,44 @@ def do_games(player1: Player, player2: Player, games: SinglesGames) -> None:
         _new_player1_rating, _new_player2_rating = glicko.rate_1vs1(rating1, rating2)
 
         # Push to list of ratings
-        _player1.ratings[SINGLES].append(_new_player1_rating)
-        _player2.ratings[SINGLES].append(_new_player2_rating)
+        _player1.push_rating(SINGLES, _new_player1_rating)
+        _player2.push_rating(SINGLES, _new_player2_rating)
 
         # Update list of opponent ratings (track e.g. worst defeat & biggest upset)
         # NOTE: these are just the mu values, but the main player stores the rating obj
-        _player1.opponent_ratings[SINGLES]["wins"].append(_player2.rating_singles.mu)
-        _player2.opponent_ratings[SINGLES]["losses"].append(_player1.rating_singles.mu)
+        _player1.record(SINGLES).add_wins(_player2.rating_singles.mu)
+        _player2.record(SINGLES).add_losses(_player1.rating_singles.mu)
+
+    def _update_rating_set(wins: int, losses: int) -> None:
+        """Updates ratings, once for the whole set"""
+        glicko, engine = GLICKO, GLICKO_BATCH
+
+        rating1 = player1.rating_singles
+        rating2 = player2.rating_singles
+
+        # Calculate new ratings (player1 is index 0, player2 is index 1)
+        _mu, _phi, _sigma = engine.rate_period(
+            np.array([rating1.mu, rating2.mu]),
+            np.array([rating1.phi, rating2.phi]),
+            np.array([rating1.sigma, rating2.sigma]),
+            winners=np.array([0] * wins + [1] * losses),
+            losers=np.array([1] * wins + [0] * losses),
+        )
+
+        # Push to list of ratings
+        for _i, _player in enumerate([player1, player2]):
+            _player.push_rating(
+                SINGLES,
+                glicko.create_rating(
+                    mu=float(_mu[_i]), phi=float(_phi[_i]), sigma=float(_sigma[_i])
+                ),
+            )
+
+        # Update list of opponent ratings (one entry per game)
+        player1.record(SINGLES).add_wins(float(_mu[1]), count=wins)
+        player1.record(SINGLES).add_losses(float(_mu[1]), count=losses)
+        player2.record(SINGLES).add_wins(float(_mu[0]), count=losses)
+        player2.record(SINGLES).add_losses(float(_mu[0]), count=wins)
 
     # pylint: disable=duplicate-code
     # Disallow scores like 2-5
@@ -63,56 +114,206 @@ def do_games(player1: Player, player2: Player, games: SinglesGames) -> None:
             f"{games.winner_score()}-{games.loser_score()}"
         )
 
-    # Do the rating updates for won games, then alternate
-    for _ in range(games.winner_score() - games.loser_score()):
-        _update_rating(player1, player2)
+    if alternate:
+        # Do the rating updates for won games, then alternate
+        for _ in range(games.winner_score() - games.loser_score()):
+            _update_rating(player1, player2)
 
-    for _ in range(games.loser_score()):
-        _update_rating(player2, player1)
-        _update_rating(player1, player2)
+        for _ in range(games.loser_score()):
+            _update_rating(player2, player1)
+            _update_rating(player1, player2)
+    else:
+        _update_rating_set(games.winner_score(), games.loser_score())
 
     # Push to list of club appearances
-    add_club(player1, club=games.location.name, mode=SINGLES)
-    add_club(player2, club=games.location.name, mode=SINGLES)
+    add_club(player1, club=games.location.club_id, mode=SINGLES)
+    add_club(player2, club=games.location.club_id, mode=SINGLES)
 
 
-def build_ratings() -> Tuple[List[Player], List[SinglesGames], Set[Club]]:
+def do_rating_periods(store: GameStore, period_days: int) -> Dict[str, Player]:
+    """
+    Rates the games in batches, treating each window of period_days as one Glicko-2
+    rating period (rather than one rating period per game).
+    Reads the games straight from the store's columns (player IDs are the indices).
+    NOTE: players are indexed in order of first appearance, so the players who have
+      joined so far are always a prefix of the arrays (idle ones gain RD each period)
+    """
+    glicko = glicko2.Glicko2()
+    engine = Glicko2Batch.from_env(glicko)
+
+    players: Dict[str, Player] = {}
+    _clubs = [Club.get(x).club_id for x in store.clubs]
+
+    n_max = len(store.players)
+    mus = np.full(n_max, float(engine.mu))
+    phis = np.full(n_max, float(engine.phi))
+    sigmas = np.full(n_max, float(engine.sigma))
+
+    def _push_rating(_i: int) -> None:
+        players[store.players[_i]].push_rating(
+            SINGLES,
+            glicko.create_rating(
+                mu=float(mus[_i]), phi=float(phis[_i]), sigma=float(sigmas[_i])
+            ),
+        )
+
+    if len(store) == 0:
+        return players
+
+    # Split into (consecutive) periods
+    _periods = store.day // period_days
+    _bounds = [0, *(np.flatnonzero(np.diff(_periods)) + 1).tolist(), len(store)]
+
+    n_joined = 0
+    for _start, _end in zip(_bounds[:-1], _bounds[1:]):
+        _player, _score = store.player[_start:_end], store.score[_start:_end]
+
+        for _i in range(n_joined, int(_player.max()) + 1):
+            get_or_create_player_by_name(players, store.players[_i])
+        n_joined = len(players)
+
+        # Expand the sets, e.g. "2-1", into individual games (winner, loser)
+        winners = np.repeat(_player[:, [0, 1]].ravel(), _score.ravel())
+        losers = np.repeat(_player[:, [1, 0]].ravel(), _score.ravel())
+
+        # Run the algorithm on everyone at once
+        mus[:n_joined], phis[:n_joined], sigmas[:n_joined] = engine.rate_period(
+            mus[:n_joined],
+            phis[:n_joined],
+            sigmas[:n_joined],
+            winners.astype(int),
+            losers.astype(int),
+        )
+
+        # Push to list of ratings (one entry per period)
+        for _i in np.unique(_player).tolist():
+            _push_rating(_i)
+
+        # Update list of opponent ratings, and club appearances
+        for (_i1, _i2), (_wins, _losses), _club in zip(
+            _player.tolist(), _score.tolist(), store.club[_start:_end].tolist()
+        ):
+            player1, player2 = players[store.players[_i1]], players[store.players[_i2]]
+
+            _record1, _record2 = player1.record(SINGLES), player2.record(SINGLES)
+            _mu1, _mu2 = player1.rating_singles.mu, player2.rating_singles.mu
+
+            _record1.add_wins(_mu2, count=_wins)
+            _record1.add_losses(_mu2, count=_losses)
+            _record2.add_wins(_mu1, count=_losses)
+            _record2.add_losses(_mu1, count=_wins)
+
+            add_club(player1, club=_clubs[_club], mode=SINGLES)
+            add_club(player2, club=_clubs[_club], mode=SINGLES)
+
+    # Bring idle players' RD up to date
+    for _i in range(n_joined):
+        if phis[_i] != players[store.players[_i]].rating_singles.phi:
+            _push_rating(_i)
+
+    return players
+
+
+def build_ratings(
+    rows: Optional[Iterable[Dict[str, str]]] = None,
+    resume: Optional[Tuple[Dict[str, Player], int]] = None,
+) -> Tuple[List[Player], List[SinglesGames], Set[Club]]:
     """
     Main method which aggregates games, players, clubs.
     And calculates ratings.
 
+    :param rows: CSV rows, streamed from the sheet if not given (and rated as they
+        arrive, while the rest is still downloading)
+    :param resume: (players, n_rows_applied) already in memory, e.g. in watch mode.
+        Otherwise resumed from the checkpoint (if still valid).
+
+    NOTE: if the download drops part way, the half rated players are dropped (nothing
+      was saved yet), and rating starts over with a fresh checkpoint, from the cached
+      CSV file (or the games store)
+
     TODO:
      - Support an API level interface?
      - Filter RD > 300/350? Command-line flag / ENV VAR to force anyways?
      - Verify dates are in order, throw error if not
     """
-
-    # Prepare the CSV inputs (fetch Google Sheet and save to disk)
-    reader = build_csv_reader(mode=SINGLES)
+    # pylint: disable=duplicate-code
+    try:
+        return _build_ratings(rows, resume=resume)
+    except DownloadInterrupted:
+        return _build_ratings(rows, resume=None, offline=True)
+
+
+def _build_ratings(
+    rows: Optional[Iterable[Dict[str, str]]] = None,
+    resume: Optional[Tuple[Dict[str, Player], int]] = None,
+    offline: bool = False,
+) -> Tuple[List[Player], List[SinglesGames], Set[Club]]:
+    """Builds the ratings, see: build_ratings()"""
+
+    # Prepare the inputs, the games store if the sheet is unchanged (cold start).
+    # Otherwise the CSV rows (fetch Google Sheet and save to disk)
+    store, _streamed = None, rows is None
+    if rows is None:
+        store, rows = load_games(mode=SINGLES, offline=offline)
+
+    # Resume from the last checkpoint, only new rows need to be replayed
+    # NOTE: rating periods are re-rated in full (fast), per-game rating is resumed.
+    #   The rows are hashed either way (for the games store)
+    checkpoint = StreamingCheckpoint(
+        SINGLES,
+        options=CHECKPOINT_OPTIONS,
+        resume=({}, 0) if RATING_PERIOD_DAYS else resume,
+    )
 
     # pylint: disable=duplicate-code
-    sets = []
-    players: Dict[str, Player] = {}
+    sets: List[SinglesGames] = []
     clubs = set()
 
     t_start = time.time()
 
-    # Process the CSV
-    for row in reader:
+    def _rate(_sets: List[SinglesGames], _players: Dict[str, Player]) -> None:
+        if RATING_PERIOD_DAYS:
+            return
+        for games in _sets:
+            # Check if players are already tracked, create if not
+            _winner_player1 = get_or_create_player_by_name(_players, games.username1)
+            _loser_player2 = get_or_create_player_by_name(_players, games.username2)
+
+            # Run the algorithm and update ratings
+            do_games(_winner_player1, _loser_player2, games, alternate=not RATE_PER_SET)
+
+    # Already parsed (and hashed) in the store
+    if store is not None:
+        sets = list(store.games(SinglesGames))
+        clubs = {x.location for x in sets}
+        _skip = checkpoint.skip(len(store), store.digest, store.prefix_digest)
+        _rate(sets[_skip], checkpoint.players)
+
+    # Process the CSV (as it's streamed in)
+    for row in rows:
         # Add game to list
         games = SinglesGames(row)
         sets.append(games)
+        clubs.add(games.location)
 
-        # Check if players are already tracked, create if not
-        _winner_player1 = get_or_create_player_by_name(players, games.username1)
-        _loser_player2 = get_or_create_player_by_name(players, games.username2)
-
-        # Run the algorithm and update ratings
-        do_games(_winner_player1, _loser_player2, games)
+        # Rate it, unless already accounted for in the checkpointed ratings
+        _rate(sets[checkpoint.push(row)], checkpoint.players)
 
-        # pylint: disable=duplicate-code
-        # Push to list of club appearances
-        clubs.add(games.location)
+    if _streamed and store is None:
+        store = GameStore.from_games(
+            SINGLES, sets, digest=checkpoint.digest, prefix=checkpoint.prefix_digests
+        )
+        store.save()
+
+    if RATING_PERIOD_DAYS:
+        if store is None:
+            store = GameStore.from_games(SINGLES, sets, digest=checkpoint.digest)
+        players = do_rating_periods(store, period_days=RATING_PERIOD_DAYS)
+        n_rows_applied = len(sets)
+    else:
+        _rate(sets[checkpoint.finish()], checkpoint.players)
+        checkpoint.save()
+        players, n_rows_applied = checkpoint.players, checkpoint.n_rows_applied
 
     n_games = sum(sum(y for y in x.score) for x in sets)
 
@@ -130,7 +331,7 @@ def build_ratings() -> Tuple[List[Player], List[SinglesGames], Set[Club]]:
                 p.username,
                 p.str_rating(mode=SINGLES),
                 p.str_win_losses(mode=SINGLES),
-                round(max(x.mu for x in p.ratings[SINGLES])),
+                round(max(p.peek_record(SINGLES).history_mu)),
                 p.avg_opponent(mode=SINGLES),
                 p.home_club(mode=SINGLES),
             )
@@ -145,104 +346,87 @@ def build_ratings() -> Tuple[List[Player], List[SinglesGames], Set[Club]]:
     t_delta = time.time() - t_start
     print()
     print(
-        f"Analyzed {len(sets)} CSV lines in {round(1000 * t_delta, 1)} ms "
-        f"({round(len(sets) / t_delta)}/s)"
+        f"Analyzed {len(sets)} CSV lines ({len(sets) - n_rows_applied} new) "
+        f"in {round(1000 * t_delta, 1)} ms ({round(len(sets) / t_delta)}/s)"
     )
 
     # Used to build pairings / ideal matches
     return sorted_players, sets, clubs
 
 
+def singles_matrix(players: List[Player]) -> SinglesMatrix:
+    """Gets the P(win), Δμ and pooled RD matrices, reusing the saved ones if able"""
+    return SinglesMatrix.load_or_build(
+        [x.username for x in players],
+        np.array([x.rating_singles.mu for x in players]),
+        np.array([x.rating_singles.phi for x in players]),
+        file_path=MATRIX_FILE_PATH,
+    )
+
+
 def print_singles_matchups(
     players: List[Player],
+    n_top: int = 100,
+    matrix: Optional[SinglesMatrix] = None,
 ) -> List[Tuple[str, str, int, int, float, float]]:
     """
     Prints out the fairest possible games, matching up nearly equal opponents for
     interesting play.
+    Returns the top n_top match ups (best first).
+
+    :param matrix: Pairwise P(win) etc., for (at least) these players
     """
 
     n_players = len(players)
-    matchups = []
-
-    rating_engine = glicko2.Glicko2()
+    matchups: TopK[Tuple[str, str, int, int, float, float]] = TopK(
+        n_top, key=lambda x: float(x[-1])
+    )
 
-    _n_top = 100
     _n_choose_2_players = math.comb(len(players), 2)
 
+    # P(win), Δμ and RD for every pair (saved, for re-use by the same ladder)
+    matrix = matrix or singles_matrix(players)
+    _index = [matrix.index[x.username] for x in players]
+    _p_win = matrix.p_win[np.ix_(_index, _index)].tolist()
+    _delta_mu = matrix.delta_mu[np.ix_(_index, _index)].tolist()
+    _pooled_rd = matrix.pooled_rd[np.ix_(_index, _index)].tolist()
+
     # Evaluate all possible match ups
     # pylint: disable=invalid-name
     for i1 in range(n_players):
-        player1 = players[i1]
         # Second player
         for i2 in range(i1 + 1, n_players):
-            player2 = players[i2]
-
-            # Compute quality, and add to list
-            _delta_rating = round(player1.rating_singles.mu - player2.rating_singles.mu)
-            _rd_avg = int(
-                round(
-                    math.sqrt(
-                        (
-                            player1.rating_singles.phi**2
-                            + player2.rating_singles.phi**2
-                        )
-                        / 2
-                    ),
-                    -1,
-                )
-            )
-            _win_probability = round(
-                rating_engine.expect_score(
-                    rating_engine.scale_down(player1.rating_singles),
-                    rating_engine.scale_down(player2.rating_singles),
-                    rating_engine.reduce_impact(
-                        rating_engine.scale_down(player2.rating_singles),
-                    ),
-                ),
-                2,
-            )
-            _loss_probability = round(
-                rating_engine.expect_score(
-                    rating_engine.scale_down(player2.rating_singles),
-                    rating_engine.scale_down(player1.rating_singles),
-                    rating_engine.reduce_impact(
-                        rating_engine.scale_down(player1.rating_singles),
-                    ),
-                ),
-                2,
-            )
-
-            # Add to list
-            matchups.append(
+            # Add to list (if among the top n_top so far)
+            matchups.push(
                 (
-                    player1.username,
-                    player2.username,
-                    _delta_rating,
-                    _rd_avg,
-                    _win_probability,
-                    _loss_probability,
+                    players[i1].username,
+                    players[i2].username,
+                    round(_delta_mu[i1][i2]),
+                    int(round(_pooled_rd[i1][i2], -1)),
+                    round(_p_win[i1][i2], 2),
+                    round(_p_win[i2][i1], 2),
                 )
             )
 
     # Print title and sort
     print_title(
-        f"Pair ups [top {min(_n_top, _n_choose_2_players)}, "
+        f"Pair ups [top {min(n_top, _n_choose_2_players)}, "
         f"{len(players)}C2={_n_choose_2_players} possible]"
     )
-    matchups.sort(key=lambda x: float(x[-1]), reverse=True)
 
     # Verify things
-    if len(matchups) != _n_choose_2_players:
-        sys.exit(f"Missed some match ups? {len(matchups)} != {_n_choose_2_players}")
+    if matchups.n_pushed != _n_choose_2_players:
+        sys.exit(f"Missed some match ups? {matchups.n_pushed} != {_n_choose_2_players}")
 
     # Print off best matches
+    _top_matchups = matchups.items()
     _table = tabulate(
-        matchups[:_n_top],
+        _top_matchups,
         headers=["Player 1", "Player 2", "Δμ", "RD", "P(w)", "P(l)"],
     )
     print(_table)
 
-    return matchups
+    return _top_matchups
 
 
 def print_progresses(_players: List[Player]) -> None:
@@ -251,18 +435,25 @@ def print_progresses(_players: List[Player]) -> None:
     for _player in _players:
         print(
             f"{_player.username} [{_player.str_rating(mode=SINGLES)}], "
-            f"peak {round(max(x.mu for x in _player.ratings[SINGLES]))}, "
-            f"best win {_player.best_win(mode=SINGLES)}"
+            f"peak {round(max(_player.peek_record(SINGLES).history_mu))}, "
+            f"best win {_player.best_win(mode=SINGLES)}, "
+            f"biggest upset {_player.biggest_upset(mode=SINGLES)}, "
+            f"worst loss {_player.worst_loss(mode=SINGLES)}"
         )
         _player.graph_ratings()
         print()
 
 
-if __name__ == "__main__":
-    print("SINGLES")
+def main(
+    rows: Optional[List[Dict[str, str]]] = None,
+    resume: Optional[Tuple[Dict[str, Player], int]] = None,
+) -> Dict[str, Player]:
+    """Rates, prints and saves everything, returns all the players (for resuming)"""
+    # pylint: disable=duplicate-code
     print(f"Last updated: {datetime.utcnow()}")
 
-    _sorted_players, _games, _clubs = build_ratings()
+    _sorted_players, _games, _clubs = build_ratings(rows, resume=resume)
+    players = {x.username: x for x in _sorted_players}
 
     # TODO: make use of _clubs and _games now. Filter uncertain ratings here?
     _sorted_players = filter_players(_sorted_players)
@@ -275,3 +466,13 @@ if __name__ == "__main__":
         filter(lambda x: x.rating_singles.phi * 1.96 < 300, _sorted_players)
     )
     print_progresses(_sorted_players)
+    return players
+
+
+if __name__ == "__main__":
+    print("SINGLES")
+
+    if "--watch" in sys.argv[1:]:
+        watch(SheetPoller(SINGLES), main, interval=WATCH_INTERVAL)
+    else:
+        main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 09∶20∶13 AM EDT
+
+@author: shane
+"""
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+from pong import CSV_GAMES_FILE_PATHS, SINGLES, checkpoint
+from pong.checkpoint import (
+    StreamingCheckpoint,
+    hash_rows,
+    load_checkpoint,
+    save_checkpoint,
+)
+from pong.core import csv_reader
+from pong.models import Player
+
+ROWS = [
+    {"date": f"2023-01-0{i}", "winner": "shane", "loser": "mal", "outcome": "2-1"}
+    for i in range(1, 6)
+]
+
+
+@pytest.fixture(autouse=True)
+def fixture_checkpoint_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Checkpoints go to tmp_path"""
+    monkeypatch.setattr(
+        checkpoint,
+        "CHECKPOINT_FILE_PATHS",
+        {SINGLES: str(tmp_path / "checkpoint_singles.json")},
+    )
+
+
+def _cached_rows() -> List[Dict[str, str]]:
+    """Reads the cached games CSV"""
+    with open(CSV_GAMES_FILE_PATHS[SINGLES], encoding="utf-8") as _f:
+        return list(csv_reader(_f))
+
+
+def _ratings(players: List[Player]) -> Dict[str, List[float]]:
+    """Gets everyone's rating history"""
+    return {x.username: list(x.record(SINGLES).history_mu) for x in players}
+
+
+def test_round_trip() -> None:
+    """The players come back as saved, along with the rows applied to them"""
+    players = {"shane": Player("shane"), "mal": Player("mal")}
+    players["shane"].record(SINGLES).add_wins(1600.0, count=2)
+    save_checkpoint(players, ROWS, SINGLES, options={"rate_per_set": False})
+
+    restored, n_rows = load_checkpoint(ROWS, SINGLES, options={"rate_per_set": False})
+    assert n_rows == len(ROWS)
+    assert [x.to_dict() for x in restored.values()] == [
+        x.to_dict() for x in players.values()
+    ]
+
+
+def test_stale_checkpoint(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Edited older rows, a shorter sheet, other options or a new version replay"""
+    save_checkpoint({"shane": Player("shane")}, ROWS[:3], SINGLES)
+    assert load_checkpoint(ROWS, SINGLES)[1] == 3
+
+    _edited = [dict(x) for x in ROWS]
+    _edited[0]["loser"] = "norm"
+    assert load_checkpoint(_edited, SINGLES) == ({}, 0)
+    assert load_checkpoint(ROWS[:2], SINGLES) == ({}, 0)
+    assert load_checkpoint(ROWS, SINGLES, options={"rate_per_set": True}) == ({}, 0)
+
+    monkeypatch.setattr(
+        checkpoint, "CHECKPOINT_VERSION", checkpoint.CHECKPOINT_VERSION + 1
+    )
+    assert load_checkpoint(ROWS, SINGLES) == ({}, 0)
+
+
+def test_resume_appended_rows() -> None:
+    """Resuming only rates the appended rows, and agrees with a full replay"""
+    # pylint: disable=import-outside-toplevel
+    from singles import CHECKPOINT_OPTIONS, build_ratings
+
+    rows = _cached_rows()
+    build_ratings(rows[:100])
+    resumed, sets, _ = build_ratings(rows)
+    assert len(sets) == len(rows)
+    assert load_checkpoint(rows, SINGLES, options=CHECKPOINT_OPTIONS)[1] == len(rows)
+
+    save_checkpoint({}, [], SINGLES, options=CHECKPOINT_OPTIONS)
+    replayed, _, _ = build_ratings(rows)
+    assert _ratings(resumed) == _ratings(replayed)
+
+
+def _stream(rows: List[Dict[str, str]]) -> List[int]:
+    """Pushes the rows in, returns the (indices of) rows rated"""
+    _checkpoint = StreamingCheckpoint(SINGLES)
+    rated: List[int] = []
+
+    for row in rows:
+        rated.extend(range(len(rows))[_checkpoint.push(row)])
+    rated.extend(range(len(rows))[_checkpoint.finish()])
+
+    _checkpoint.players.setdefault("shane", Player("shane"))
+    _checkpoint.save()
+    return rated
+
+
+def test_streaming_checkpoint() -> None:
+    """Only appended rows are rated, and edits (or removals) start over"""
+    assert _stream(ROWS[:3]) == [0, 1, 2]
+    assert load_checkpoint(ROWS, SINGLES)[1] == 3
+
+    # Appended
+    assert _stream(ROWS) == [3, 4]
+
+    # Edited, or removed
+    _edited = [dict(x) for x in ROWS]
+    _edited[1]["outcome"] = "2-0"
+    assert _stream(_edited) == [0, 1, 2, 3, 4]
+    assert _stream(_edited[:4]) == [0, 1, 2, 3]
+
+    # The same hash, streamed or not
+    players, n_rows = load_checkpoint(_edited[:4], SINGLES)
+    assert (list(players), n_rows) == (["shane"], 4)
+    save_checkpoint(players, _edited, SINGLES)
+    assert not _stream(_edited)
+
+
+def test_streaming_checkpoint_resume() -> None:
+    """Players already in memory are trusted, without a checkpoint"""
+    players = {"shane": Player("shane")}
+    _checkpoint = StreamingCheckpoint(SINGLES, resume=(players, 2))
+
+    assert [_checkpoint.push(x) for x in ROWS[:3]] == [
+        slice(0),
+        slice(0),
+        slice(2, 3),
+    ]
+    assert _checkpoint.players is players
+
+
+def test_streaming_checkpoint_skip() -> None:
+    """Rows hashed elsewhere (the games store) are skipped, if they're the same"""
+    assert _stream(ROWS) == [0, 1, 2, 3, 4]
+
+    _checkpoint = StreamingCheckpoint(SINGLES)
+    assert _checkpoint.skip(len(ROWS), hash_rows(ROWS)) == slice(0)
+    assert list(_checkpoint.players) == ["shane"]
+    assert _checkpoint.digest == hash_rows(ROWS)
+
+    _checkpoint = StreamingCheckpoint(SINGLES)
+    assert _checkpoint.skip(len(ROWS), hash_rows(ROWS[::-1])) == slice(0, 5)
+    assert not _checkpoint.players
+
+
+def test_streaming_checkpoint_skip_appended() -> None:
+    """Rows appended since the checkpoint are resumed, if its rows are a prefix"""
+    assert _stream(ROWS[:3]) == [0, 1, 2]
+
+    _checkpoint = StreamingCheckpoint(SINGLES)
+    for row in ROWS:
+        _checkpoint.push(row)
+    assert _checkpoint.prefix_digests == b"".join(
+        bytes.fromhex(hash_rows(ROWS[:i])) for i in range(1, len(ROWS) + 1)
+    )
+
+    def _skip(rows: List[Dict[str, str]]) -> Tuple[slice, List[str]]:
+        """Skips the rows, as if from a games store (which knows each prefix hash)"""
+        _checkpoint = StreamingCheckpoint(SINGLES)
+        _slice = _checkpoint.skip(
+            len(rows), hash_rows(rows), lambda n_rows: hash_rows(rows[:n_rows])
+        )
+        return _slice, list(_checkpoint.players)
+
+    assert _skip(ROWS) == (slice(3, 5), ["shane"])
+
+    # An older row edited, or no prefix hashes (e.g. an old store), starts over
+    _edited = [dict(x) for x in ROWS]
+    _edited[1]["outcome"] = "2-0"
+    assert _skip(_edited) == (slice(0, 5), [])
+    assert StreamingCheckpoint(SINGLES).skip(len(ROWS), hash_rows(ROWS)) == slice(0, 5)
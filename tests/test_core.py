@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 04∶52∶31 PM EDT
+
+@author: shane
+"""
+import functools
+import http.server
+import os
+import random
+import threading
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from pong import SINGLES, atomic_write, fetch
+from pong.core import SheetPoller, TopK, csv_reader, iter_lines, watch
+
+CSV_HEADER = "Date,Winner,Loser,Outcome,Location\n"
+CSV_ROW = "2023-01-08,shane,patrick,2-1,Norm's\n"
+
+
+def test_top_k_matches_stable_sort() -> None:
+    """Tests the heap against a full (stable) sort, with lots of tied keys"""
+    rng = random.Random(0)
+    items = [(i, round(rng.random(), 1)) for i in range(1000)]
+
+    top_k: TopK[Tuple[int, float]] = TopK(25, key=lambda x: x[1])
+    top_k.extend(items)
+
+    assert top_k.n_pushed == len(items)
+    assert len(top_k) == 25
+    assert top_k.items() == sorted(items, key=lambda x: x[1], reverse=True)[:25]
+    assert top_k.floor == top_k.items()[-1][1]
+
+
+def test_top_k_not_full() -> None:
+    """Tests fewer items than K"""
+    top_k: TopK[str] = TopK(10, key=len)
+    top_k.extend(["aa", "b", "ccc"])
+
+    assert top_k.floor is None
+    assert top_k.items() == ["ccc", "aa", "b"]
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_top_k_empty(k: int) -> None:
+    """Tests K below 1 keeps nothing (e.g. matchups for a lone player)"""
+    top_k: TopK[str] = TopK(k, key=len)
+    top_k.extend(["aa", "b", "ccc"])
+
+    assert top_k.n_pushed == 3
+    assert top_k.floor is None
+    assert not top_k.items()
+
+
+@pytest.fixture(name="sheet")
+def fixture_sheet(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """A local CSV file stands in for the sheet, and the cache goes to tmp_path"""
+    monkeypatch.setitem(
+        fetch.CSV_GAMES_FILE_PATHS, SINGLES, str(tmp_path / "games_singles.csv")
+    )
+    monkeypatch.setitem(
+        fetch.CSV_GAMES_VALIDATORS_FILE_PATHS,
+        SINGLES,
+        str(tmp_path / "validators_singles.json"),
+    )
+    sheet = tmp_path / "sheet.csv"
+    sheet.write_text(CSV_HEADER + CSV_ROW * 3, encoding="utf-8")
+    return sheet
+
+
+def test_sheet_poller(sheet: Path) -> None:
+    """Unchanged => None, appended => the old rows are kept, edited => full replay"""
+    poller = SheetPoller(SINGLES, url=sheet.as_uri())
+
+    rows, n_rows_unchanged = poller.poll() or ([], -1)
+    assert (len(rows), n_rows_unchanged) == (3, 0)
+    assert rows[0]["winner"] == "shane"
+    assert poller.poll() is None
+
+    with open(sheet, "a", encoding="utf-8") as _f:
+        _f.write(CSV_ROW)
+    rows, n_rows_unchanged = poller.poll() or ([], -1)
+    assert (len(rows), n_rows_unchanged) == (4, 3)
+    assert Path(fetch.CSV_GAMES_FILE_PATHS[SINGLES]).read_bytes() == sheet.read_bytes()
+
+    sheet.write_text(CSV_HEADER + CSV_ROW.replace("2-1", "2-0") * 4, encoding="utf-8")
+    assert (poller.poll() or ([], -1))[1] == 0
+
+
+def test_watch_http(sheet: Path) -> None:
+    """Watches a local HTTP stand-in, only re-running when the sheet changed"""
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler, directory=str(sheet.parent)
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+
+    runs: List[Tuple[int, Optional[int]]] = []
+
+    def _run(rows: List[Dict[str, str]], resume: Optional[Tuple]) -> Dict:
+        runs.append((len(rows), resume[1] if resume else None))
+        if len(runs) == 1:
+            # A game is added to the sheet before the next poll
+            # NOTE: Last-Modified is to the second, so it's edited "later"
+            with open(sheet, "a", encoding="utf-8") as _f:
+                _f.write(CSV_ROW)
+            _mtime = sheet.stat().st_mtime + 2
+            os.utime(sheet, (_mtime, _mtime))
+        return {}
+
+    try:
+        _url = f"http://127.0.0.1:{server.server_address[1]}/{sheet.name}"
+        watch(SheetPoller(SINGLES, url=_url), _run, interval=0, n_polls=4)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert runs == [(3, None), (4, 3)]
+
+
+def test_atomic_write(tmp_path: Path) -> None:
+    """The old file is left as is if writing fails, and no temp files are left"""
+    file_path = tmp_path / "ratings.csv"
+    file_path.write_text("old", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(file_path)) as _f:
+            _f.write("half written")
+            raise RuntimeError
+    assert file_path.read_text(encoding="utf-8") == "old"
+
+    with atomic_write(str(file_path)) as _f:
+        _f.write("new")
+    assert file_path.read_text(encoding="utf-8") == "new"
+    assert [x.name for x in tmp_path.iterdir()] == ["ratings.csv"]
+
+
+def test_iter_lines() -> None:
+    """Parses the same rows however the bytes are chunked (even mid character)"""
+    csv_text = CSV_HEADER + '2023-01-09,zoë,"pat\r\nrick",2-0,Café\r\n' + CSV_ROW
+    csv_bytes = csv_text.encode()
+    rows = list(csv_reader(StringIO(csv_text)))
+    assert rows[0]["loser"] == "pat\r\nrick"
+
+    for i in range(len(csv_bytes) + 1):
+        chunks = [csv_bytes[:i], csv_bytes[i:]]
+        assert list(csv_reader(iter_lines(chunks))) == rows, i
+
+    _bytewise = [bytes([x]) for x in csv_bytes]
+    assert list(csv_reader(iter_lines(_bytewise))) == rows
+    assert list(iter_lines([b"a\nb"])) == ["a\n", "b"]
+
+
+class SlowSheetHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in for the sheet, which holds the rest of the body until released"""
+
+    body = (CSV_HEADER + CSV_ROW * 3).encode()
+    released = threading.Event()
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Sends the header & first row, then the rest once released"""
+        _n_first = len(CSV_HEADER + CSV_ROW)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body[:_n_first])
+        self.wfile.flush()
+
+        self.released.wait(timeout=5)
+        self.wfile.write(self.body[_n_first:])
+
+    def log_message(self, *args: object) -> None:
+        """Quiet"""
+
+
+@pytest.mark.usefixtures("sheet")
+def test_stream_sheet() -> None:
+    """Rows are parsed while downloading, and only a finished stream is cached"""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SlowSheetHandler)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    _url = f"http://127.0.0.1:{server.server_address[1]}/sheet.csv"
+    _cache = Path(fetch.CSV_GAMES_FILE_PATHS[SINGLES])
+
+    try:
+        SlowSheetHandler.released.clear()
+        reader = csv_reader(iter_lines(fetch.stream_sheet(_url, SINGLES, 1)))
+        assert next(reader)["winner"] == "shane"
+        assert not SlowSheetHandler.released.is_set()
+        assert not _cache.exists()
+
+        SlowSheetHandler.released.set()
+        assert len(list(reader)) == 2
+        assert _cache.read_bytes() == SlowSheetHandler.body
+
+        # Abandoned part way, the old cache is kept
+        _cache.write_bytes(b"old")
+        SlowSheetHandler.released.clear()
+        chunks = fetch.stream_sheet(_url, SINGLES, 1)
+        next(csv_reader(iter_lines(chunks)))
+        chunks.close()
+        assert _cache.read_bytes() == b"old"
+        assert [x.name for x in _cache.parent.iterdir() if x.name.startswith(".")] == []
+    finally:
+        SlowSheetHandler.released.set()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 01∶36∶12 AM EDT
+
+@author: shane
+"""
+import http.server
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import pytest
+
+from pong import DOUBLES, SINGLES, fetch
+
+CSV_BYTES = b"Date,Winner,Loser,Outcome,Location\n2023-01-08,shane,mal,2-1,Norm's\n"
+
+
+class SheetHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Stand-in for the sheet, with an ETag (and a number of 503s to send first).
+    Any other status is sent instead, e.g. 404 for a sheet that's been unshared.
+    """
+
+    body = CSV_BYTES
+    n_failures = 0
+    status = 200
+    requests: List[Dict[str, str]] = []
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Serves the CSV, or 304 if the client's copy is current"""
+        cls = type(self)
+        cls.requests.append(dict(self.headers))
+        _etag = f'"{hash(cls.body)}"'
+
+        if cls.status != 200:
+            self.send_response(cls.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif cls.n_failures > 0:
+            cls.n_failures -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == _etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("ETag", _etag)
+            self.send_header("Content-Length", str(len(cls.body)))
+            self.end_headers()
+            self.wfile.write(cls.body)
+
+    def log_message(self, *args: object) -> None:
+        """Quiet"""
+
+
+@pytest.fixture(name="url")
+def fixture_url(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[str]:
+    """Serves the stand-in sheet locally, and caches to tmp_path"""
+    for mode in (SINGLES, DOUBLES):
+        monkeypatch.setitem(
+            fetch.CSV_GAMES_FILE_PATHS, mode, str(tmp_path / f"games_{mode}.csv")
+        )
+        monkeypatch.setitem(
+            fetch.CSV_GAMES_VALIDATORS_FILE_PATHS,
+            mode,
+            str(tmp_path / f"validators_{mode}.json"),
+        )
+    monkeypatch.setattr(SheetHandler, "requests", [])
+    monkeypatch.setattr(SheetHandler, "n_failures", 0)
+    monkeypatch.setattr(SheetHandler, "status", 200)
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SheetHandler)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}/sheet.csv"
+
+    server.shutdown()
+    server.server_close()
+    fetch.session.cache_clear()
+
+
+def test_revalidate(url: str) -> None:
+    """The second fetch sends the ETag back, and is served from the cache"""
+    assert fetch.fetch_sheet(url, SINGLES) == CSV_BYTES
+    assert Path(fetch.CSV_GAMES_FILE_PATHS[SINGLES]).read_bytes() == CSV_BYTES
+    assert "If-None-Match" not in SheetHandler.requests[-1]
+
+    assert fetch.fetch_sheet(url, SINGLES) == CSV_BYTES
+    assert "If-None-Match" in SheetHandler.requests[-1]
+
+    # An edited cache file isn't trusted, it's downloaded again
+    Path(fetch.CSV_GAMES_FILE_PATHS[SINGLES]).write_bytes(b"edited")
+    assert fetch.fetch_sheet(url, SINGLES) == CSV_BYTES
+    assert "If-None-Match" not in SheetHandler.requests[-1]
+    assert Path(fetch.CSV_GAMES_FILE_PATHS[SINGLES]).read_bytes() == CSV_BYTES
+
+
+def test_retry(url: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A server error is retried, until the retries run out"""
+    SheetHandler.n_failures = 1
+    assert fetch.fetch_sheet(url, SINGLES) == CSV_BYTES
+    assert len(SheetHandler.requests) == 2
+
+    monkeypatch.setattr(fetch, "FETCH_RETRIES", 0)
+    fetch.session.cache_clear()
+    SheetHandler.n_failures = 1
+    results = fetch.fetch_sheets({SINGLES: url})
+    assert isinstance(results[SINGLES], fetch.requests.exceptions.RetryError)
+
+
+def test_not_found(url: str) -> None:
+    """A client error is raised (not exited), and the cached file is kept"""
+    assert fetch.fetch_sheet(url, SINGLES) == CSV_BYTES
+
+    SheetHandler.status = 404
+    with pytest.raises(fetch.requests.HTTPError, match="404"):
+        fetch.fetch_sheet(url, SINGLES)
+
+    error = fetch.fetch_sheets({SINGLES: url})[SINGLES]
+    assert isinstance(error, fetch.requests.HTTPError)
+    assert error.response is not None and error.response.status_code == 404
+    assert Path(fetch.CSV_GAMES_FILE_PATHS[SINGLES]).read_bytes() == CSV_BYTES
+
+
+def test_fetch_sheets(
+    url: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Several sheets at once, one failing doesn't stop the others"""
+    monkeypatch.setattr(fetch, "FETCH_RETRIES", 0)
+    results = fetch.fetch_sheets({SINGLES: url, DOUBLES: url + "?gid=2"})
+    assert results == {SINGLES: CSV_BYTES, DOUBLES: CSV_BYTES}
+
+    results = fetch.fetch_sheets({SINGLES: url, DOUBLES: "http://127.0.0.1:9/"})
+    assert results[SINGLES] == CSV_BYTES
+    assert isinstance(results[DOUBLES], fetch.requests.exceptions.ConnectionError)
+
+    # A missing file:// stand-in is an error too (not raised)
+    _missing = (tmp_path / "missing.csv").as_uri()
+    results = fetch.fetch_sheets({SINGLES: url, DOUBLES: _missing})
+    assert results[SINGLES] == CSV_BYTES
+    assert isinstance(results[DOUBLES], FileNotFoundError)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 10∶41∶52 AM EDT
+
+@author: shane
+"""
+from typing import Any
+
+import numpy as np
+import pytest
+
+from pong.glicko2 import glicko2
+from pong.glickoutils import Glicko2Batch, SinglesMatrix
+
+# pylint: disable=invalid-name
+
+
+def test_rate_period_glickman_example() -> None:
+    """Tests the worked example from Glickman's paper (tau=0.5)"""
+    engine = Glicko2Batch(tau=0.5)
+
+    # Player 0 beats player 1, then loses to players 2 and 3
+    mu, phi, sigma = engine.rate_period(
+        np.array([1500.0, 1400.0, 1550.0, 1700.0]),
+        np.array([200.0, 30.0, 100.0, 300.0]),
+        np.full(4, 0.06),
+        winners=np.array([0, 2, 3]),
+        losers=np.array([1, 0, 0]),
+    )
+
+    assert mu[0] == pytest.approx(1464.06, abs=0.01)
+    assert phi[0] == pytest.approx(151.52, abs=0.01)
+    assert sigma[0] == pytest.approx(0.05999, abs=0.00001)
+
+
+def test_rate_period_idle_player() -> None:
+    """Tests an idle player only has their deviation inflated"""
+    engine = Glicko2Batch()
+
+    mu, phi, sigma = engine.rate_period(
+        np.array([1500.0, 1500.0, 1600.0]),
+        np.array([350.0, 350.0, 100.0]),
+        np.full(3, 0.06),
+        winners=np.array([0]),
+        losers=np.array([1]),
+    )
+
+    # Symmetric outcome for the two equal players
+    assert mu[0] > 1500 > mu[1]
+    assert mu[0] - 1500 == pytest.approx(1500 - mu[1])
+    assert phi[0] == pytest.approx(phi[1])
+
+    # Idle player
+    assert mu[2] == 1600.0
+    assert sigma[2] == 0.06
+    assert phi[2] == pytest.approx(np.sqrt(100.0**2 + (0.06 * 173.7178) ** 2))
+
+
+def test_singles_matrix_matches_scalar(tmp_path: Any) -> None:
+    """Tests the P(win) matrix against pong.glicko2, and the saved artifact"""
+    glicko = glicko2.Glicko2()
+    usernames = ["a", "b", "c"]
+    mu = np.array([1700.0, 1500.0, 1350.0])
+    phi = np.array([60.0, 200.0, 350.0])
+
+    file_path = str(tmp_path / "matrix.npz")
+    matrix = SinglesMatrix.load_or_build(usernames, mu, phi, file_path=file_path)
+
+    for i, j in [(0, 1), (1, 0), (0, 2), (2, 1)]:
+        rating1 = glicko.scale_down(glicko.create_rating(mu[i], phi[i]))
+        rating2 = glicko.scale_down(glicko.create_rating(mu[j], phi[j]))
+        expected = glicko.expect_score(rating1, rating2, glicko.reduce_impact(rating2))
+
+        assert matrix.p_win[i, j] == pytest.approx(expected, abs=1e-12)
+        assert matrix.delta_mu[i, j] == mu[i] - mu[j]
+        assert matrix.pooled_rd[i, j] == pytest.approx(
+            ((phi[i] ** 2 + phi[j] ** 2) / 2) ** 0.5
+        )
+
+    # Saved, then reused (only) for the same ladder
+    saved = SinglesMatrix.load_or_build(usernames, mu, phi, file_path=file_path)
+    assert np.array_equal(saved.p_win, matrix.p_win)
+    assert saved.p_game("a", "b") == matrix.p_game("a", "b") > 0.5
+
+    mu[0] = 1800.0
+    rebuilt = SinglesMatrix.load_or_build(usernames, mu, phi, file_path=file_path)
+    assert rebuilt.p_win[0, 1] > matrix.p_win[0, 1]
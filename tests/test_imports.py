@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 11∶02∶16 PM EDT
+
+@author: shane
+"""
+import subprocess  # nosec: B404
+import sys
+import time
+from typing import List
+
+import pytest
+
+from pong import env
+
+# Only loaded once used, e.g. fetching the sheet or rating a game
+HEAVY_MODULES = ["numpy", "requests", "trueskill", "asciichartpy"]
+
+
+def _loaded(module: str) -> List[str]:
+    """Imports a module in a fresh interpreter, gets the heavy modules it loaded"""
+    code = (
+        f"import sys, {module}\n"
+        f"print(*[x for x in {HEAVY_MODULES} if x in sys.modules\n"
+        "    and type(sys.modules[x]).__name__ != '_LazyModule'])"
+    )
+    result = subprocess.run(  # nosec: B603
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize(
+    "module", ["pong", "pong.probs", "pong.models", "pong.core", "pong.matchups"]
+)
+def test_lazy_imports(module: str) -> None:
+    """The light entry points don't load the heavy modules (see: make bench)"""
+    t_start = time.time()
+    assert not _loaded(module)
+    print(f"{module}: {round((time.time() - t_start) * 1000)}ms")
+
+
+def test_sheet_config_deferred(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Missing sheet env vars only fail once the sheet is needed"""
+    monkeypatch.setenv("PONG_SHEET_KEY", "key")
+    monkeypatch.setenv("PONG_SHEET_GID_SINGLES", "1")
+    monkeypatch.setenv("PONG_SHEET_GID_DOUBLES", "2")
+    assert env.sheet_config() == ("key", 1, 2)
+
+    monkeypatch.delenv("PONG_SHEET_KEY")
+    with pytest.raises(SystemExit):
+        env.sheet_config()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 02∶18∶05 PM EDT
+
+@author: shane
+"""
+import pytest
+import trueskill  # pylint: disable=import-error
+
+from pong import DOUBLES, SINGLES
+from pong.glicko2 import glicko2
+from pong.models import Club, Games, Player, SinglesGames
+
+
+def test_running_aggregates_match_retained_games() -> None:
+    """Tests the running aggregates against the raw (retained) per-game values"""
+    player = Player("tester", retain_games=True)
+    record = player.record(SINGLES)
+
+    record.add_wins(1600.0, count=2)
+    record.add_losses(1400.0)
+    record.add_wins(1700.0)
+    record.add_losses(1800.0, count=0)
+
+    assert player.str_win_losses(SINGLES) == "3-1"
+    assert player.avg_opponent(SINGLES) == round(
+        (sum(record.opponents_won) + sum(record.opponents_lost)) / 4
+    )
+    assert player.best_win(SINGLES) == max(record.opponents_won) == 1700
+    assert record.i_best_win == 3
+    assert player.worst_loss(SINGLES) == min(record.opponents_lost) == 1400
+    assert player.biggest_upset(SINGLES) == 200
+
+
+def test_aggregates_without_retention() -> None:
+    """Tests the raw per-game values are dropped by default, and checkpointed"""
+    player = Player("tester")
+    player.record(DOUBLES).add_losses(20.0, count=3)
+    player.record(DOUBLES).add_partners(30.0, count=3)
+
+    assert not player.record(DOUBLES).opponents_lost
+    assert player.best_win(DOUBLES) is None
+    assert player.avg_partner(DOUBLES) == 30.0
+
+    restored = Player.from_dict(player.to_dict())
+    assert restored.str_win_losses(DOUBLES) == "0-3"
+    assert restored.worst_loss(DOUBLES) == 20.0
+
+
+def test_club_appearances() -> None:
+    """Tallied by club ID, ties go to the club appeared at first, and checkpointed"""
+    player = Player("tester")
+    record = player.record(SINGLES)
+
+    _pong_det, _norms = Club.get("Pong Detroit (Bert's)"), Club.get("Norm's")
+    record.add_club(_norms.club_id)
+    record.add_club(_pong_det.club_id, count=2)
+    record.add_club(_norms.club_id)
+
+    assert record.club_counts() == {"Norm's": 2, "Pong Det": 2}
+    assert player.home_club(SINGLES) == "Norm's"
+    assert player.clubs() == ["Norm's", "Pong Det"]
+
+    restored = Player.from_dict(player.to_dict())
+    assert restored.record(SINGLES).club_counts() == record.club_counts()
+    assert restored.home_club(SINGLES) == "Norm's"
+
+
+def test_cached_rating() -> None:
+    """The current rating follows push & reset, kept apart from the history"""
+    player = Player("tester")
+    _rating = trueskill.Rating(mu=30.0, sigma=5.0)
+
+    player.push_rating(DOUBLES, _rating)
+    assert player.rating_doubles is _rating
+    assert player.record(DOUBLES).history_mu.tolist() == [25.0, 30.0]
+
+    # The history is plain floats, editing it doesn't touch the current rating
+    player.record(DOUBLES).history_mu[-1] = 0.0
+    assert player.rating_doubles.mu == 30.0
+
+    player.reset_rating(SINGLES, glicko2.Rating(mu=1600.0, phi=100.0, sigma=0.05))
+    assert player.rating_singles.mu == 1600.0
+    assert player.record(SINGLES).history_mu.tolist() == [1600.0]
+    assert player.record(SINGLES).history_phi.tolist() == [100.0]
+
+    player.push_rating(SINGLES, glicko2.Rating(mu=1650.0, phi=90.0, sigma=0.05))
+    assert player.rating_singles.mu == 1650.0
+    assert player.record(SINGLES).history_mu.tolist() == [1600.0, 1650.0]
+
+    restored = Player.from_dict(player.to_dict())
+    assert restored.rating_singles.mu == 1650.0
+    assert restored.rating_doubles.mu == 0.0
+
+
+def test_records_created_on_first_update() -> None:
+    """Reading a mode never played doesn't create (or checkpoint) its record"""
+    player = Player("tester")
+    player.push_rating(SINGLES, glicko2.Rating(mu=1600.0, phi=100.0, sigma=0.05))
+
+    assert "1600" in str(player)
+    assert player.rating_doubles.mu == 25.0
+    assert player.str_win_losses(DOUBLES) == "0-0"
+    assert not player.peek_record(DOUBLES).partners_mu
+    assert list(player.to_dict()["records"]) == [SINGLES]
+
+    # Compact: no per-instance __dict__, histories are arrays of doubles
+    record = player.record(SINGLES)
+    assert getattr(player, "__dict__", None) is None
+    assert getattr(record, "__dict__", None) is None
+    assert record.history_mu.typecode == "d"
+
+    player.record(DOUBLES).add_losses(30.0)
+    assert sorted(player.to_dict()["records"]) == [DOUBLES, SINGLES]
+
+
+def test_games_is_abstract() -> None:
+    """Only singles & doubles games can be built, which say who played"""
+    row = {
+        "date": "2026-10-17",
+        "winner": "shane",
+        "loser": "patrick",
+        "outcome": "2-1",
+        "location": "Norm's",
+    }
+    # pylint: disable=abstract-class-instantiated
+    with pytest.raises(TypeError, match="usernames"):
+        Games(row)  # type: ignore[abstract]
+    assert SinglesGames(row).usernames() == ["shane", "patrick"]
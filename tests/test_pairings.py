@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 03∶41∶10 PM EDT
+
+@author: shane
+"""
+import itertools
+
+import numpy as np
+
+from pong.pairings import (
+    count_doubles_matchups,
+    iter_doubles_matchups,
+    search_doubles_matchups,
+    search_doubles_matchups_parallel,
+)
+
+# pylint: disable=invalid-name
+
+
+def test_iter_doubles_matchups_matches_nested_loops() -> None:
+    """Tests the vectorized blocks against brute force enumeration of all splits"""
+    rng = np.random.default_rng(0)
+    n_players = 9
+    mu = rng.uniform(15, 35, n_players)
+    sigma = rng.uniform(1, 6, n_players)
+
+    expected = []
+    n_total = 0
+    for i1, i2, i3, i4 in itertools.permutations(range(n_players), 4):
+        if not (i1 < i2 and i1 < i3 < i4):
+            continue
+        n_total += 1
+        delta_mu = round((mu[i1] + mu[i2] - mu[i3] - mu[i4]) / 2, 1)
+        two_rd = round(1.96 * np.sqrt(sum(sigma[[i1, i2, i3, i4]] ** 2) / 4))
+        if abs(delta_mu) <= 3.0 and two_rd <= 9.5:
+            expected.append((i1, i2, i3, i4, delta_mu, two_rd))
+
+    result = []
+    n_skipped = 0
+    for block in iter_doubles_matchups(mu, sigma):
+        result += list(zip(*(x.tolist() for x in block[:-1])))
+        n_skipped += block.n_skipped
+
+    assert n_total == count_doubles_matchups(n_players)
+    assert result == expected
+    assert len(result) + n_skipped == n_total
+
+
+def test_search_doubles_matchups_parallel_matches_serial() -> None:
+    """Tests the sharded search merges into the same top match ups & counts"""
+    rng = np.random.default_rng(2)
+    mu = np.round(rng.uniform(20, 30, 16), 1)
+    sigma = rng.uniform(1, 3, 16)
+
+    serial = search_doubles_matchups(mu, sigma, n_top=30)
+    parallel = search_doubles_matchups_parallel(mu, sigma, n_top=30, n_workers=3)
+
+    assert parallel == serial
+    assert serial[1] + serial[2] == count_doubles_matchups(16)
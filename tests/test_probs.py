@@ -4,8 +4,11 @@ Created on Thu Jan 26 15:03:24 2023
 
 @author: shane
 """
+import math
+import os
 from typing import Dict
 
+import numpy as np
 import pytest
 
 from pong import probs
@@ -51,7 +54,27 @@ def test_p_match(input_dict: Dict) -> None:
 )
 def test_p_at_least_k_points(p_p: float, k: int, p_k: float) -> None:
     """Tests common values for winning >= k points (in a game of 11)"""
-    assert probs.p_at_least_k_points(p_p, k) == p_k
+    assert probs.p_at_least_k_points(p_p, k) == pytest.approx(p_k)
+
+
+@pytest.mark.parametrize("n", [11, 21])
+@pytest.mark.parametrize("p_p", [0.3, 0.5, 0.65])
+def test_p_at_least_k_points_closed_form(p_p: float, n: int) -> None:
+    """Short of deuce, it's 1 - P(losing the game with fewer than k points)"""
+    for k in range(n):
+        p_k = 1 - sum(
+            math.comb(n - 1 + j, j) * (1 - p_p) ** n * p_p**j for j in range(k)
+        )
+        assert probs.p_at_least_k_points(p_p, k, n=n) == pytest.approx(p_k)
+
+    # Past deuce, the chances only go down, e.g. 15 points takes 4 deuces
+    p_ks = [probs.p_at_least_k_points(p_p, k, n=n) for k in range(n - 1, n + 10)]
+    assert all(x > y for x, y in zip(p_ks, p_ks[1:]))
+
+    # Reaching n points: a straight win, or not losing the first two at deuce
+    assert probs.p_at_least_k_points(p_p, n, n=n) == pytest.approx(
+        probs.p_game_straight(p_p, n=n) + probs.p_deuce(p_p, n=n) * (1 - (1 - p_p) ** 2)
+    )
 
 
 @pytest.mark.parametrize(
@@ -68,5 +91,147 @@ def test_p_at_least_k_wins(n: int, p_g: float, k: int, p_k: float) -> None:
     assert probs.p_at_least_k_wins_in_match(p_g, n, k) == p_k
 
 
+@pytest.mark.parametrize("n", [11, 21])
+@pytest.mark.parametrize("p_p", [0.0, 0.3, 0.5, 0.55, 1.0])
+def test_p_game_live(p_p: float, n: int) -> None:
+    """Live game odds, from 0-0, at deuce, and once the game is over"""
+    assert probs.p_game_live(p_p, 0, 0, n=n) == pytest.approx(probs.p_game(p_p, n=n))
+
+    # Deuce & advantage only depend on the lead
+    _deuce = probs.p_deuce_win(p_p)
+    for a in [n - 1, n + 3]:
+        assert probs.p_game_live(p_p, a, a, n=n) == pytest.approx(_deuce)
+        assert probs.p_game_live(p_p, a + 1, a, n=n) == pytest.approx(
+            p_p + (1 - p_p) * _deuce
+        )
+        assert probs.p_game_live(p_p, a, a + 1, n=n) == pytest.approx(p_p * _deuce)
+        assert probs.p_game_live(p_p, a + 2, a, n=n) == 1.0
+        assert probs.p_game_live(p_p, a, a + 2, n=n) == 0.0
+
+    # One step of the chain: P(a, b) = p P(a + 1, b) + q P(a, b + 1)
+    for a, b in [(0, 0), (3, 7), (n - 2, n - 1), (n - 1, 4)]:
+        assert probs.p_game_live(p_p, a, b, n=n) == pytest.approx(
+            p_p * probs.p_game_live(p_p, a + 1, b, n=n)
+            + (1 - p_p) * probs.p_game_live(p_p, a, b + 1, n=n)
+        )
+
+    assert probs.p_game_live(p_p, n, 3, n=n) == 1.0
+    assert probs.p_game_live(p_p, 0, n, n=n) == 0.0
+
+
+@pytest.mark.parametrize("m", [1, 2, 3, 4])
+@pytest.mark.parametrize("p_p", [0.0, 0.35, 0.5, 0.52, 1.0])
+def test_p_match_live(p_p: float, m: int) -> None:
+    """Live match odds agree with p_match(), and the live game odds"""
+    p_g = probs.p_game(p_p)
+    assert probs.p_match_live(p_p, m=m) == pytest.approx(probs.p_match(p_g, m))
+
+    # Up a game, win m - 1 more, before losing m (negative binomial)
+    if m > 1:
+        assert probs.p_match_live(p_p, (1, 0), m=m) == pytest.approx(
+            sum(
+                math.comb(m - 2 + k, k) * p_g ** (m - 1) * (1 - p_g) ** k
+                for k in range(m)
+            )
+        )
+
+    # Game point in the deciding game
+    _score = (m - 1, m - 1)
+    assert probs.p_match_live(p_p, _score, (10, 9), m=m) == pytest.approx(
+        probs.p_game_live(p_p, 10, 9)
+    )
+    assert probs.p_match_live(p_p, (m, 0), (0, 5), m=m) == 1.0
+    assert probs.p_match_live(p_p, (0, m), m=m) == 0.0
+
+
+# Point / game probabilities, including the edges (0.0 & 1.0)
+P_GRID = np.linspace(0.0, 1.0, 41)
+
+
+def test_binomial_table() -> None:
+    """The table matches math.comb, and falls back to it past N_BINOMIAL"""
+    n, k = np.meshgrid(np.arange(probs.N_BINOMIAL + 1), np.arange(21))
+    assert np.array_equal(
+        probs.binomial(n, k),
+        np.vectorize(math.comb)(n, k).astype(float),
+    )
+    assert probs.binomial(60, 30) == float(math.comb(60, 30))
+
+
+@pytest.mark.parametrize("n", [11, 21])
+def test_game_array_parity(n: int) -> None:
+    """Vectorized point -> game functions agree with the scalar ones"""
+    for func_array, func in [
+        (probs.p_game_straight_array, probs.p_game_straight),
+        (probs.p_deuce_array, probs.p_deuce),
+        (probs.p_game_array, probs.p_game),
+    ]:
+        np.testing.assert_allclose(
+            func_array(P_GRID, n=n), [func(x, n=n) for x in P_GRID], atol=1e-12
+        )
+
+    for i in [0, 3, 6]:
+        np.testing.assert_allclose(
+            probs.p_game_straight_handicap_array(P_GRID, n=n, i=i),
+            [probs.p_game_straight_handicap(x, n=n, i=i) for x in P_GRID],
+            atol=1e-12,
+        )
+        np.testing.assert_allclose(
+            probs.p_deuce_handicap_array(P_GRID, n=n, i=i),
+            [probs.p_deuce_handicap(x, n=n, i=i) for x in P_GRID],
+            atol=1e-12,
+        )
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4])
+def test_match_array_parity(n: int) -> None:
+    """Vectorized game -> match functions agree with the scalar ones"""
+    np.testing.assert_allclose(
+        probs.p_match_array(P_GRID, n), [probs.p_match(x, n) for x in P_GRID]
+    )
+    for k in range(n + 1):
+        np.testing.assert_allclose(
+            probs.p_at_least_k_wins_in_match_array(P_GRID, n, k),
+            [probs.p_at_least_k_wins_in_match(x, n, k) for x in P_GRID],
+            atol=1e-12,
+        )
+        np.testing.assert_allclose(
+            probs.p_at_least_k_wins_out_of_n_games_array(P_GRID, 2 * n, k),
+            [probs.p_at_least_k_wins_out_of_n_games(x, 2 * n, k) for x in P_GRID],
+            atol=1e-12,
+        )
+
+
+def test_array_shapes() -> None:
+    """Any shape goes in, the same shape comes out (e.g. a matrix of pairings)"""
+    p = P_GRID[1:].reshape(8, 5)
+    assert probs.p_game_array(p).shape == (8, 5)
+    assert probs.p_match_array(p, 3).shape == (8, 5)
+    assert probs.p_game_array(0.5).shape == ()
+
+
+# Old lookup table, point probabilities (to 6 places) for game odds 0.0000 - 1.0000
+PROB_GAME_TO_POINT_FILE = os.path.join(
+    os.path.dirname(__file__), "resources", "prob_game_to_point.txt"
+)
+
+
+def test_p_point_table() -> None:
+    """The inverse reproduces every entry in the old (rounded) lookup table"""
+    with open(PROB_GAME_TO_POINT_FILE, encoding="utf-8") as _f:
+        table = [float(x) for x in _f]
+
+    assert len(table) == 10001
+    for i, p_p in enumerate(table):
+        assert probs.p_point(i / 10000) == pytest.approx(p_p, abs=5e-7)
+
+
+@pytest.mark.parametrize("n", [11, 21])
+@pytest.mark.parametrize("p_g", [1e-9, 0.01, 0.123456789, 0.5, 0.75, 0.999])
+def test_p_point_inverse(p_g: float, n: int) -> None:
+    """p_game(p_point(x)) == x, well past the table's resolution"""
+    assert probs.p_game(probs.p_point(p_g, n=n), n=n) == pytest.approx(p_g, rel=1e-9)
+
+
 if __name__ == "__main__":
     pytest.main()
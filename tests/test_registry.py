@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 04∶52∶40 AM EDT
+
+@author: shane
+"""
+from pong.models import Club, Player, SinglesGames
+from pong.registry import CLUBS, PLAYERS, Registry
+
+
+def test_registry() -> None:
+    """Dense IDs in order of first appearance, the same one each time"""
+    registry = Registry(["shane", "mal"])
+    assert [registry.intern(x) for x in ("mal", "norm", "shane", "norm")] == [
+        1,
+        2,
+        0,
+        2,
+    ]
+    assert registry.names == ["shane", "mal", "norm"]
+    assert "norm" in registry and len(registry) == 3
+
+
+def test_shared_ids() -> None:
+    """Players & clubs get their (shared) IDs once, and games share clubs"""
+    row = {
+        "date": "2023-01-08",
+        "winner": "shane",
+        "loser": "mal",
+        "outcome": "2-1",
+        "location": "Norm's",
+    }
+    games, _games = SinglesGames(row), SinglesGames(row)
+    assert games.location is _games.location is Club.get("Norm's")
+    assert CLUBS.names[games.location.club_id] == "Norm's"
+
+    player = Player("shane")
+    assert Player("shane").player_id == player.player_id
+    assert PLAYERS.names[player.player_id] == "shane"
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 07∶20∶44 PM EDT
+
+@author: shane
+"""
+import itertools
+import time
+
+import numpy as np
+
+from pong.scheduler import linear_sum_assignment, schedule_session, summarize_session
+
+# pylint: disable=invalid-name
+
+
+def test_linear_sum_assignment_brute_force() -> None:
+    """Tests the Hungarian solve against every permutation, on small matrices"""
+    rng = np.random.default_rng(0)
+
+    for n in range(1, 7):
+        cost = rng.integers(0, 20, size=(n, n)).astype(float)
+        assignment = linear_sum_assignment(cost)
+
+        best = min(
+            sum(cost[i, j] for i, j in enumerate(permutation))
+            for permutation in itertools.permutations(range(n))
+        )
+        assert sorted(assignment) == list(range(n))
+        assert cost[np.arange(n), assignment].sum() == best
+
+
+def test_schedule_session_constraints() -> None:
+    """Tests a club night of 64 players on 10 tables, is fair and fast"""
+    rng = np.random.default_rng(1)
+    mu = rng.uniform(15.0, 35.0, 64)
+    sigma = rng.uniform(1.0, 6.0, 64)
+
+    t_start = time.time()
+    rounds = schedule_session(mu, sigma, n_tables=10, n_rounds=12)
+    assert time.time() - t_start < 1.0
+
+    for _round in rounds:
+        # Everyone plays, or sits out, exactly once per round
+        _players = [x for g in _round.games for x in (g.i1, g.i2, g.i3, g.i4)]
+        assert len(_round.games) == 10
+        assert sorted(_players + _round.sitting_out) == list(range(64))
+
+    summary = summarize_session(rounds, n_players=64)
+    assert summary["repeat_partners"] == 0
+    assert summary["max_sit_outs"] - summary["min_sit_outs"] <= 1
+    assert summary["avg_quality"] > 0.6
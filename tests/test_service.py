@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 12∶14∶37 AM EDT
+
+@author: shane
+"""
+import asyncio
+import csv
+import http.client
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import pytest
+
+from doubles import do_games as do_games_doubles
+from pong import CSV_GAMES_FILE_PATHS, DOUBLES, SINGLES, checkpoint
+from pong.service import Ladder, Service, start_server
+from singles import build_ratings
+from singles import do_games as do_games_singles
+from singles import do_rating_periods
+
+NEW_GAME = {
+    "Date": "2026-10-17",
+    "Winner": "norm",
+    "Loser": "benji",
+    "Outcome": "2-1",
+    "Location": "Norm's",
+}
+
+
+def _rows(mode: str) -> List[Dict[str, str]]:
+    """Reads the cached games CSV"""
+    with open(CSV_GAMES_FILE_PATHS[mode], encoding="utf-8") as _f:
+        reader = csv.DictReader(_f)
+        reader.fieldnames = [x.strip().lower() for x in reader.fieldnames or []]
+        return list(reader)
+
+
+@pytest.fixture(name="service")
+def fixture_service(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Service:
+    """Both ladders, rated from scratch (no checkpoints)"""
+    monkeypatch.setattr(
+        checkpoint,
+        "CHECKPOINT_FILE_PATHS",
+        {x: str(tmp_path / f"checkpoint_{x}.json") for x in (SINGLES, DOUBLES)},
+    )
+
+    singles = Ladder(SINGLES, do_games_singles)
+    singles.load(_rows(SINGLES))
+    doubles = Ladder(DOUBLES, do_games_doubles)
+    doubles.load(_rows(DOUBLES))
+    return Service({SINGLES: singles, DOUBLES: doubles})
+
+
+def test_rankings(service: Service) -> None:
+    """Ranked best first, and served from memory in well under 10 ms"""
+    status, payload = service.handle("GET", "/rankings")
+    assert status == 200
+    assert payload["n_sets"] == len(_rows(SINGLES))
+
+    _mu = [x["mu"] for x in payload["players"]]
+    assert _mu == sorted(_mu, reverse=True)
+    assert [x["rank"] for x in payload["players"]] == list(range(1, len(_mu) + 1))
+
+    for target in [
+        "/rankings?mode=doubles",
+        "/players/benji",
+        "/odds?players=benji,norm",
+        "/odds?mode=doubles&players=benji,mal,thomas,shane",
+        "/matchups?players=benji,norm,shane,amos,mal",
+    ]:
+        t_start = time.perf_counter()
+        assert service.handle("GET", target)[0] == 200
+        assert time.perf_counter() - t_start < 0.01, target
+
+
+def test_odds(service: Service) -> None:
+    """Odds are complementary, and agree with the singles matrix"""
+    _, odds = service.handle("GET", "/odds?players=benji,norm")
+    _, reverse = service.handle("GET", "/odds?players=norm,benji")
+
+    assert odds["p_game"] + reverse["p_game"] == pytest.approx(1.0)
+    assert odds["p_match"]["3"] + reverse["p_match"]["3"] == pytest.approx(1.0)
+    assert odds["delta_mu"] == -reverse["delta_mu"]
+
+    _, doubles = service.handle(
+        "GET", "/odds?mode=doubles&players=benji,mal,thomas,shane"
+    )
+    assert 0 < doubles["p_game"] < 1 and 0 < doubles["quality"] <= 1
+
+
+def test_matchups(service: Service) -> None:
+    """Fairest first (the underdog's P(win)), over every pair of players"""
+    _, payload = service.handle(
+        "GET", "/matchups?players=benji,norm,shane,amos,mal&n_top=100"
+    )
+    _p_lose = [x["p_lose"] for x in payload["matchups"]]
+    assert len(_p_lose) == 10
+    assert _p_lose == sorted(_p_lose, reverse=True)
+
+    _, payload = service.handle("GET", "/matchups?mode=doubles&n_top=5")
+    assert len(payload["matchups"]) == 5
+
+    # Cached until the next game
+    _, cached = service.handle("GET", "/matchups?mode=doubles&n_top=5")
+    assert cached is payload
+    service.ladders[DOUBLES].invalidate()
+    assert service.handle("GET", "/matchups?mode=doubles&n_top=5")[1] is not payload
+
+
+def test_submit_game(service: Service) -> None:
+    """A submitted game is rated on top, the same as a full replay with it"""
+    _ladder = service.ladders[SINGLES]
+    _version = _ladder.version
+
+    status, payload = service.handle(
+        "POST", "/games?mode=singles", json.dumps(NEW_GAME).encode()
+    )
+    assert status == 201
+    assert payload["version"] == _version + 1
+    assert [x["username"] for x in payload["players"]] == ["norm", "benji"]
+
+    replay = Ladder(SINGLES, do_games_singles)
+    replay.load(_rows(SINGLES) + [{k.lower(): v for k, v in NEW_GAME.items()}])
+    _, rankings = service.handle("GET", "/rankings")
+    assert rankings["players"] == Service.rankings(replay)["players"]
+
+
+def test_rating_periods(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Singles are rated in periods if set, the same as the singles script"""
+    monkeypatch.setattr("pong.service.RATING_PERIOD_DAYS", 7)
+    with pytest.raises(ValueError, match="PONG_RATING_PERIOD_DAYS"):
+        Ladder(SINGLES, do_games_singles)
+
+    ladder = Ladder(SINGLES, do_games_singles, do_rating_periods)
+    ladder.load(_rows(SINGLES))
+    Ladder(DOUBLES, do_games_doubles).load(_rows(DOUBLES))
+
+    monkeypatch.setattr("singles.RATING_PERIOD_DAYS", 7)
+    _rows_new = _rows(SINGLES) + [{k.lower(): v for k, v in NEW_GAME.items()}]
+    expected, _, _ = build_ratings(rows=_rows_new[:-1])
+    assert {x.username: x.rating_singles.mu for x in expected} == {
+        x.username: x.rating_singles.mu for x in ladder.players.values()
+    }
+
+    # A submitted game re-rates its period
+    _service = Service({SINGLES: ladder})
+    _service.handle("POST", "/games?mode=singles", json.dumps(NEW_GAME).encode())
+    expected, _, _ = build_ratings(rows=_rows_new)
+    assert {x.username: x.rating_singles.mu for x in expected} == {
+        x.username: x.rating_singles.mu for x in ladder.players.values()
+    }
+
+
+def test_errors(service: Service) -> None:
+    """Bad requests get an error status, and the ladder is left alone"""
+    _version = service.ladders[SINGLES].version
+    _doubles_version = service.ladders[DOUBLES].version
+
+    assert service.handle("GET", "/players/nobody")[0] == 404
+    assert service.handle("GET", "/nowhere")[0] == 404
+    assert service.handle("GET", "/games")[0] == 405
+    assert service.handle("GET", "/odds?players=benji")[0] == 400
+    assert service.handle("GET", "/rankings?mode=triples")[0] == 400
+    assert service.handle("GET", "/matchups?n_top=0")[0] == 400
+    assert service.handle("GET", "/matchups?mode=doubles&n_top=-1")[0] == 400
+    assert service.handle("POST", "/games", b"[1, 2]")[0] == 400
+    assert service.handle("POST", "/games", b'{"winner": "benji"}')[0] == 400
+    _bad = dict(NEW_GAME, Outcome="1-2")
+    assert service.handle("POST", "/games", json.dumps(_bad).encode())[0] == 400
+    _bad = dict(NEW_GAME, Loser="norm")
+    assert service.handle("POST", "/games", json.dumps(_bad).encode())[0] == 400
+    _bad = {
+        "date": "2026-10-17",
+        "winner 1": "benji",
+        "winner 2": "mal",
+        "loser 1": "shane",
+        "loser 2": "benji",
+        "outcome": "2-1",
+        "location": "Norm's",
+    }
+    assert service.handle("POST", "/games?mode=doubles", json.dumps(_bad).encode()) == (
+        400,
+        {"error": "A player is named twice: benji, mal, shane, benji"},
+    )
+
+    assert service.ladders[SINGLES].version == _version
+    assert service.ladders[DOUBLES].version == _doubles_version
+
+
+@pytest.fixture(name="port")
+def fixture_port(service: Service) -> Iterator[int]:
+    """Serves on a free local port, from a background event loop"""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(start_server(service))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield server.sockets[0].getsockname()[1]
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+
+def test_http(port: int) -> None:
+    """Several requests over one (keep-alive) connection"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+
+    connection.request("GET", "/rankings?mode=doubles")
+    response = connection.getresponse()
+    assert response.status == 200
+    assert json.loads(response.read())["mode"] == DOUBLES
+
+    connection.request("POST", "/games?mode=singles", body=json.dumps(NEW_GAME))
+    response = connection.getresponse()
+    assert response.status == 201
+    assert json.loads(response.read())["players"][0]["username"] == "norm"
+
+    connection.request("GET", "/players/nobody")
+    response = connection.getresponse()
+    assert response.status == 404
+    assert "nobody" in json.loads(response.read())["error"]
+
+    connection.close()
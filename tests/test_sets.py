@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 11∶36∶04 AM EDT
+
+@author: shane
+Rating a whole set at once (alternate=False), versus game by game
+"""
+from typing import Dict
+
+import pytest
+
+from doubles import do_games as do_games_doubles
+from pong import DOUBLES, SINGLES
+from pong.glicko2 import glicko2
+from pong.models import DoublesGames, Player, PlayerRecord, SinglesGames
+from singles import GLICKO
+from singles import do_games as do_games_singles
+
+DOUBLES_SETS = ["2-1", "3-0", "3-2", "2-0", "1-1"]
+
+
+def _doubles_games(outcome: str) -> DoublesGames:
+    return DoublesGames(
+        {
+            "date": "2026-10-19",
+            "winner 1": "benji",
+            "winner 2": "mal",
+            "loser 1": "thomas",
+            "loser 2": "shane",
+            "outcome": outcome,
+            "location": "Norm's",
+        }
+    )
+
+
+def _singles_games(outcome: str) -> SinglesGames:
+    return SinglesGames(
+        {
+            "date": "2026-10-19",
+            "winner": "shane",
+            "loser": "patrick",
+            "outcome": outcome,
+            "location": "Norm's",
+        }
+    )
+
+
+def _play_doubles(alternate: bool) -> Dict[str, Player]:
+    """Plays the same sets, in order, with fresh players"""
+    players = [Player(x) for x in ("benji", "mal", "thomas", "shane")]
+    for outcome in DOUBLES_SETS:
+        do_games_doubles(
+            players[0],
+            players[1],
+            players[2],
+            players[3],
+            _doubles_games(outcome),
+            alternate,
+        )
+    return {x.username: x for x in players}
+
+
+def test_doubles_set_matches_game_by_game() -> None:
+    """Same final ratings, wins, losses, partner & opponent aggregates"""
+    by_game, by_set = _play_doubles(alternate=True), _play_doubles(alternate=False)
+
+    for username, player in by_game.items():
+        record, _record = player.record(DOUBLES), by_set[username].record(DOUBLES)
+        assert _record.rating.mu == pytest.approx(record.rating.mu)
+        assert _record.rating.sigma == pytest.approx(record.rating.sigma)
+
+        for name in PlayerRecord.AGGREGATES:
+            assert getattr(_record, name) == pytest.approx(getattr(record, name)), name
+
+        # One entry per set (not per game)
+        assert len(_record.history_mu) == len(DOUBLES_SETS) + 1
+
+
+def test_singles_set_is_one_rating_period() -> None:
+    """The whole set is one Glicko-2 rating period, same as the scalar engine"""
+    player1, player2 = Player("shane"), Player("patrick")
+
+    for outcome in ["2-1", "3-0", "3-2"]:
+        games = _singles_games(outcome)
+        wins, losses = games.winner_score(), games.loser_score()
+        rating1, rating2 = player1.rating_singles, player2.rating_singles
+        series1 = [(glicko2.WIN, rating2)] * wins + [(glicko2.LOSS, rating2)] * losses
+        series2 = [(glicko2.WIN, rating1)] * losses + [(glicko2.LOSS, rating1)] * wins
+        expected = [GLICKO.rate(rating1, series1), GLICKO.rate(rating2, series2)]
+        do_games_singles(player1, player2, games, alternate=False)
+
+        for player, rating in zip([player1, player2], expected):
+            assert player.rating_singles.mu == pytest.approx(rating.mu)
+            assert player.rating_singles.phi == pytest.approx(rating.phi)
+            assert player.rating_singles.sigma == pytest.approx(rating.sigma)
+
+    # Wins & losses counted per game, same as game by game
+    _player1, _player2 = Player("shane"), Player("patrick")
+    for outcome in ["2-1", "3-0", "3-2"]:
+        do_games_singles(_player1, _player2, _singles_games(outcome), alternate=True)
+    for player, _player in [(player1, _player1), (player2, _player2)]:
+        record, _record = player.record(SINGLES), _player.record(SINGLES)
+        assert (record.n_won, record.n_lost) == (_record.n_won, _record.n_lost)
+        assert len(record.history_mu) == 4
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun 18 Oct 2026 03∶58∶21 AM EDT
+
+@author: shane
+"""
+import shutil
+from pathlib import Path
+from typing import Iterator, List, Type, Union
+
+import numpy as np
+import pytest
+
+from pong import CSV_GAMES_FILE_PATHS, DOUBLES, SINGLES, checkpoint, fetch, store
+from pong.checkpoint import hash_rows, load_checkpoint
+from pong.core import csv_reader, load_games
+from pong.models import DoublesGames, SinglesGames
+from pong.store import GameStore
+from singles import CHECKPOINT_OPTIONS, build_ratings
+
+
+@pytest.fixture(name="cache")
+def fixture_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """A copy of the cached CSV files, with the stores alongside (in tmp_path)"""
+    for mode in (SINGLES, DOUBLES):
+        _csv_path = tmp_path / f"games_{mode}.csv"
+        shutil.copy(CSV_GAMES_FILE_PATHS[mode], _csv_path)
+        monkeypatch.setitem(store.CSV_GAMES_FILE_PATHS, mode, str(_csv_path))
+        monkeypatch.setitem(
+            store.GAMES_STORE_FILE_PATHS, mode, str(tmp_path / f"games_{mode}.bin")
+        )
+    return tmp_path
+
+
+def _rows(mode: str) -> List[dict]:
+    """Reads the (copied) cached games CSV"""
+    with open(CSV_GAMES_FILE_PATHS[mode], encoding="utf-8") as _f:
+        return list(csv_reader(_f))
+
+
+@pytest.mark.usefixtures("cache")
+@pytest.mark.parametrize(
+    "mode, cls", [(SINGLES, SinglesGames), (DOUBLES, DoublesGames)]
+)
+def test_round_trip(mode: str, cls: Type[Union[SinglesGames, DoublesGames]]) -> None:
+    """The same games come back, from the memory mapped columns"""
+    rows = _rows(mode)
+    sets = [cls(x) for x in rows]
+    GameStore.from_games(mode, sets, digest=hash_rows(rows)).save()
+
+    loaded = GameStore.load(mode)
+    assert loaded is not None
+    assert isinstance(loaded.player.base, np.memmap)
+    assert loaded.player.shape == (len(rows), 2 if mode == SINGLES else 4)
+    assert loaded.digest == hash_rows(rows)
+
+    for games, _games in zip(sets, loaded.games(cls)):
+        assert str(_games) == str(games)
+        assert _games.location == games.location
+        assert _games.usernames() == games.usernames()
+    assert len(loaded) == len(sets)
+
+
+def test_stale(cache: Path) -> None:
+    """Only loaded for the CSV file it was built from"""
+    rows = _rows(SINGLES)
+    GameStore.from_games(SINGLES, [SinglesGames(x) for x in rows], "x").save()
+    assert GameStore.load(SINGLES) is not None
+
+    with open(cache / "games_singles.csv", "a", encoding="utf-8") as _f:
+        _f.write("2026-10-17,norm,benji,2-0,Norm's\n")
+    assert GameStore.load(SINGLES) is None
+
+    (cache / "games_singles.bin").write_bytes(b"garbage")
+    assert GameStore.load(SINGLES) is None
+
+
+@pytest.mark.usefixtures("cache")
+def test_load_games_offline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Unreachable sheet => the store if it's current, otherwise the cached rows"""
+    monkeypatch.setenv("PONG_SHEET_URL_SINGLES", "http://127.0.0.1:9/")
+    monkeypatch.setattr(fetch, "FETCH_RETRIES", 0)
+    fetch.session.cache_clear()
+
+    try:
+        _store, rows = load_games(SINGLES)
+        assert _store is None
+        sets = [SinglesGames(x) for x in rows]
+        assert len(sets) == len(_rows(SINGLES))
+
+        GameStore.from_games(SINGLES, sets, digest=hash_rows(_rows(SINGLES))).save()
+        _store, rows = load_games(SINGLES)
+        assert _store is not None and len(_store) == len(sets)
+        assert not list(rows)
+    finally:
+        fetch.session.cache_clear()
+
+
+def test_download_interrupted(cache: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A dropped download starts over from the cached CSV, nothing is half rated"""
+    monkeypatch.setenv("PONG_SHEET_URL_SINGLES", "http://127.0.0.1:9/")
+    monkeypatch.setattr(
+        checkpoint,
+        "CHECKPOINT_FILE_PATHS",
+        {SINGLES: str(cache / "checkpoint_singles.json")},
+    )
+    rows = _rows(SINGLES)
+    csv_bytes = Path(CSV_GAMES_FILE_PATHS[SINGLES]).read_bytes()
+
+    expected, _, _ = build_ratings(rows)
+    build_ratings(rows[:100])
+
+    def _open_sheet(*_: object) -> Iterator[bytes]:
+        """Drops half way, after the checkpointed rows (some new ones are rated)"""
+
+        def _chunks() -> Iterator[bytes]:
+            yield csv_bytes[: len(csv_bytes) // 2]
+            raise fetch.requests.exceptions.ChunkedEncodingError("Connection broken")
+
+        return fetch.tee_to_cache(_chunks(), SINGLES)
+
+    monkeypatch.setattr("pong.core.open_sheet", _open_sheet)
+    players, sets, _ = build_ratings()
+
+    assert len(sets) == len(rows)
+    assert {x.username: list(x.record(SINGLES).history_mu) for x in players} == {
+        x.username: list(x.record(SINGLES).history_mu) for x in expected
+    }
+    assert Path(CSV_GAMES_FILE_PATHS[SINGLES]).read_bytes() == csv_bytes
+    assert load_checkpoint(rows, SINGLES, options=CHECKPOINT_OPTIONS)[1] == len(rows)
+
+
+def test_resume_from_store(
+    cache: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    """A store with rows appended since the checkpoint resumes, it doesn't replay"""
+    monkeypatch.setenv("PONG_SHEET_URL_SINGLES", "http://127.0.0.1:9/")
+    monkeypatch.setattr(fetch, "FETCH_RETRIES", 0)
+    monkeypatch.setattr(
+        checkpoint,
+        "CHECKPOINT_FILE_PATHS",
+        {SINGLES: str(cache / "checkpoint_singles.json")},
+    )
+    rows = _rows(SINGLES)
+
+    _checkpoint = checkpoint.StreamingCheckpoint(SINGLES)
+    for row in rows:
+        _checkpoint.push(row)
+    GameStore.from_games(
+        SINGLES,
+        [SinglesGames(x) for x in rows],
+        digest=_checkpoint.digest,
+        prefix=_checkpoint.prefix_digests,
+    ).save()
+    _store = GameStore.load(SINGLES)
+    assert _store is not None and _store.prefix_digest(100) == hash_rows(rows[:100])
+
+    expected, _, _ = build_ratings(rows)
+    build_ratings(rows[:100])
+    capsys.readouterr()
+
+    fetch.session.cache_clear()
+    try:
+        players, sets, _ = build_ratings()
+    finally:
+        fetch.session.cache_clear()
+
+    assert len(sets) == len(rows)
+    assert "stale" not in capsys.readouterr().out
+    assert {x.username: list(x.record(SINGLES).history_mu) for x in players} == {
+        x.username: list(x.record(SINGLES).history_mu) for x in expected
+    }
+    assert load_checkpoint(rows, SINGLES, options=CHECKPOINT_OPTIONS)[1] == len(rows)
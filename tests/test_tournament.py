@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 10∶05∶31 PM EDT
+
+@author: shane
+"""
+import numpy as np
+import pytest
+
+from pong import probs
+from pong.tournament import (
+    ROUND_ROBIN,
+    SINGLE_ELIMINATION,
+    bracket_order,
+    iter_simulations,
+    p_match_matrix,
+)
+
+# pylint: disable=invalid-name
+
+
+def _p_match(n: int, seed: int = 0) -> np.ndarray:
+    """Random (but consistent) P(match) matrix, entrants ordered strongest first"""
+    strength = np.sort(np.random.default_rng(seed).normal(0.0, 1.0, n))[::-1]
+    p_game = 1 / (1 + np.exp(-(strength[:, None] - strength[None, :])))
+    return p_match_matrix(p_game, m=2)
+
+
+def test_bracket_order() -> None:
+    """Seeds 1 & 2 are in opposite halves, and every first round sums to n + 1"""
+    assert bracket_order(1) == [0]
+    assert bracket_order(8) == [0, 7, 3, 4, 1, 6, 2, 5]
+
+    order = bracket_order(32)
+    assert sorted(order) == list(range(32))
+    assert all(order[i] + order[i + 1] == 31 for i in range(0, 32, 2))
+    assert 0 in order[:16] and 1 in order[16:]
+
+
+def test_single_elimination_exact() -> None:
+    """4 entrants: P(win) matches the closed form"""
+    p = _p_match(4)
+    *_, estimate = iter_simulations(p, SINGLE_ELIMINATION, n_sims=200000)
+
+    # Semis are 1v4 & 2v3 (by seed), then the final against the other semi
+    p_semi = {0: p[0, 3], 3: p[3, 0], 1: p[1, 2], 2: p[2, 1]}
+    other = {0: (1, 2), 3: (1, 2), 1: (0, 3), 2: (0, 3)}
+    p_win = np.array(
+        [p_semi[i] * sum(p_semi[j] * p[i, j] for j in other[i]) for i in range(4)]
+    )
+
+    # ~4 standard errors, at 200k tournaments
+    np.testing.assert_allclose(estimate.p_top(1), p_win, atol=0.005)
+    lo, hi = estimate.ci_top(1)
+    assert np.all((lo < estimate.p_top(1)) & (estimate.p_top(1) < hi))
+    assert np.all(hi - lo < 0.005)
+    assert estimate.p_top(1).sum() == pytest.approx(1.0)
+    assert np.all(estimate.p_top(4) == 1.0)
+
+
+def test_single_elimination_byes() -> None:
+    """Top seeds get the byes, and a sure favourite always wins"""
+    p = np.where(np.arange(5)[:, None] < np.arange(5)[None, :], 1.0, 0.0)
+    np.fill_diagonal(p, 0.5)
+    *_, estimate = iter_simulations(p, SINGLE_ELIMINATION, n_sims=1000)
+
+    # 8 slots, seeds 4 & 5 play the only first round match
+    assert estimate.place_counts[:, 0].tolist() == [1000, 0, 0, 0, 0]
+    assert estimate.place_counts[:, 1].tolist() == [0, 1000, 0, 0, 0]
+    assert estimate.place_counts[2:, 2].tolist() == [1000, 1000, 0]
+    assert estimate.place_counts[4, 4] == 1000
+
+
+def test_round_robin() -> None:
+    """Even odds spread the places evenly, and places are a permutation"""
+    p = np.full((6, 6), 0.5)
+    *_, estimate = iter_simulations(p, ROUND_ROBIN, n_sims=60000, chunk_size=7000)
+
+    assert estimate.n_sims == 60000
+    assert np.all(estimate.place_counts.sum(axis=0) == 60000)
+    lo, hi = estimate.ci_top(1)
+    assert np.all((lo < 1 / 6) & (1 / 6 < hi))
+
+    # A stronger field finishes higher
+    *_, estimate = iter_simulations(_p_match(6), ROUND_ROBIN, n_sims=20000)
+    assert np.all(np.diff(estimate.p_top(3)) < 0)
+
+
+def test_parallel_matches_serial() -> None:
+    """Chunks have their own random streams, so workers don't change the result"""
+    p = _p_match(9, seed=3)
+    *_, serial = iter_simulations(p, SINGLE_ELIMINATION, n_sims=5000, chunk_size=1000)
+    estimates = list(
+        iter_simulations(
+            p, SINGLE_ELIMINATION, n_sims=5000, chunk_size=1000, n_workers=2
+        )
+    )
+    assert [x.n_sims for x in estimates] == [1000, 2000, 3000, 4000, 5000]
+    assert np.array_equal(estimates[-1].place_counts, serial.place_counts)
+
+
+def test_p_match_matrix() -> None:
+    """P(match) is the pong.probs match model, and complementary"""
+    p_game = np.array([[0.5, 0.6, 0.9], [0.4, 0.5, 0.7], [0.1, 0.3, 0.5]])
+    p = p_match_matrix(p_game, m=3)
+
+    assert np.allclose(p + p.T, 1.0)
+    for i in range(3):
+        for j in range(3):
+            if i != j:
+                assert p[i, j] == pytest.approx(probs.p_match(p_game[i, j], 3))
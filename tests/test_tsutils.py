@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 11∶26∶08 AM EDT
+
+@author: shane
+"""
+import numpy as np
+import pytest
+import trueskill
+
+from pong import DRAW_PROB_DOUBLES
+from pong.tsutils import quality_2v2, rate_2v2, win_probability, win_probability_2v2
+
+# pylint: disable=invalid-name
+
+
+@pytest.mark.parametrize("draw_probability", [DRAW_PROB_DOUBLES, 0.1])
+def test_rate_2v2_parity(draw_probability: float) -> None:
+    """Tests the closed-form 2v2 update against the factor graph in trueskill.rate"""
+    env = trueskill.TrueSkill(draw_probability=draw_probability)
+
+    rng = np.random.default_rng(seed=0)
+    mu = rng.uniform(10.0, 40.0, size=(200, 4))
+    sigma = rng.uniform(1.0, 8.4, size=(200, 4))
+
+    # Batch of games
+    new_mu, new_sigma = rate_2v2(mu, sigma, env=env)
+
+    for i in range(len(mu)):
+        ratings = [trueskill.Rating(mu=m, sigma=s) for m, s in zip(mu[i], sigma[i])]
+        team1, team2 = env.rate([ratings[:2], ratings[2:]])
+
+        expected = team1 + team2
+        assert new_mu[i] == pytest.approx([r.mu for r in expected], abs=1e-9)
+        assert new_sigma[i] == pytest.approx([r.sigma for r in expected], abs=1e-9)
+
+
+def test_rate_2v2_single_game() -> None:
+    """Tests a single game (1d arrays), with the default doubles environment"""
+    new_mu, new_sigma = rate_2v2(np.full(4, 25.0), np.full(4, 25 / 3))
+
+    assert new_mu[0] == new_mu[1] > 25.0 > new_mu[2] == new_mu[3]
+    assert new_mu[0] - 25.0 == pytest.approx(25.0 - new_mu[2])
+    assert all(new_sigma < 25 / 3)
+
+
+def test_quality_and_win_probability_2v2_parity() -> None:
+    """Tests the batched 2v2 quality & P(w) against trueskill and win_probability"""
+    rng = np.random.default_rng(seed=1)
+    mu = rng.uniform(10.0, 40.0, size=(200, 4))
+    sigma = rng.uniform(1.0, 8.4, size=(200, 4))
+
+    delta_mu = mu[:, 0] + mu[:, 1] - mu[:, 2] - mu[:, 3]
+    sum_sigma_2 = np.sum(sigma**2, axis=1)
+    quality = quality_2v2(delta_mu, sum_sigma_2)
+    p_win = win_probability_2v2(delta_mu, sum_sigma_2)
+
+    for i in range(len(mu)):
+        ratings = [trueskill.Rating(mu=m, sigma=s) for m, s in zip(mu[i], sigma[i])]
+        teams = [tuple(ratings[:2]), tuple(ratings[2:])]
+
+        assert quality[i] == pytest.approx(trueskill.quality(teams), abs=1e-9)
+        assert p_win[i] == pytest.approx(win_probability(*teams), abs=1e-9)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat 17 Oct 2026 09∶48∶05 PM EDT
+
+@author: shane
+Forecasts a tournament (each player's chance to win, make the final, etc.)
+by playing it out many times, with the current ratings.
+"""
+import os
+import shlex
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+from tabulate import tabulate
+
+from pong.core import print_title
+from pong.env import BEST_OF, MODE_SINGLES, N_SIMULATIONS, N_WORKERS, TOURNAMENT_FORMAT
+from pong.glickoutils import SinglesMatrix
+from pong.matchups import build_players
+from pong.tournament import (
+    ROUND_ROBIN,
+    SINGLE_ELIMINATION,
+    Estimate,
+    count_matches,
+    iter_simulations,
+    p_game_doubles,
+    p_game_singles,
+    p_match_matrix,
+)
+
+
+def build_entrants(entrants: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gets (P(game) matrix, rating) for the entrants, from the ratings CSV files.
+    Singles entrants are usernames, doubles entrants are teams, e.g. "mal+shane"
+    """
+    singles_players, doubles_players = build_players()
+
+    if MODE_SINGLES:
+        _unknown = [x for x in entrants if x not in singles_players]
+        if _unknown:
+            sys.exit(f"No singles rating for: {', '.join(_unknown)}")
+
+        _mu = np.array([singles_players[x].rating_singles.mu for x in entrants])
+        _phi = np.array([singles_players[x].rating_singles.phi for x in entrants])
+        _matrix = SinglesMatrix.from_ratings(entrants, _mu, _phi)
+        return p_game_singles(_matrix.p_win), _mu
+
+    _teams = [x.split("+") for x in entrants]
+    _unknown = [y for x in _teams for y in x if y not in doubles_players]
+    if _unknown:
+        sys.exit(f"No doubles rating for: {', '.join(_unknown)}")
+    if any(len(x) != 2 for x in _teams):
+        sys.exit("Doubles teams must be two players, e.g. mal+shane")
+
+    _mu = np.array([[doubles_players[y].rating_doubles.mu for y in x] for x in _teams])
+    _sigma = np.array(
+        [[doubles_players[y].rating_doubles.sigma for y in x] for x in _teams]
+    )
+    return p_game_doubles(_mu, _sigma), _mu.sum(axis=1)
+
+
+def print_forecast(estimate: Estimate, entrants: List[str], seeds: List[int]) -> None:
+    """Prints each entrant's chances (by seed), e.g. P(win) with its 95% CI"""
+    _p_win = estimate.p_top(1)
+    _lo, _hi = estimate.ci_top(1)
+    _p_top_2 = estimate.p_top(2)
+    _p_top_4 = estimate.p_top(4)
+
+    _table = tabulate(
+        [
+            (
+                i + 1,
+                entrants[x],
+                round(_p_win[x], 3),
+                f"{round(_lo[x], 3)} - {round(_hi[x], 3)}",
+                round(_p_top_2[x], 3),
+                round(_p_top_4[x], 3),
+            )
+            for i, x in enumerate(seeds)
+        ],
+        headers=["Seed", "Entrant", "P(win)", "95% CI", "P(top 2)", "P(top 4)"],
+    )
+    print(_table)
+
+
+def stream_forecast(
+    p_match: np.ndarray, entrants: List[str], seeds: List[int]
+) -> Estimate:
+    """Plays the tournaments, printing the running estimate about every 10%"""
+    estimate = Estimate(len(entrants))
+    _next = 0.0
+
+    for estimate in iter_simulations(
+        p_match,
+        tournament_format=TOURNAMENT_FORMAT,
+        n_sims=N_SIMULATIONS,
+        seeds=seeds,
+        n_workers=N_WORKERS,
+    ):
+        if estimate.n_sims >= _next or estimate.n_sims == N_SIMULATIONS:
+            _leader = int(np.argmax(estimate.p_top(1)))
+            _lo, _hi = estimate.ci_top(1)
+            print(
+                f"  {estimate.n_sims:>8} sims, favourite {entrants[_leader]} "
+                f"P(win)={round(estimate.p_top(1)[_leader], 3)} "
+                f"± {round((_hi[_leader] - _lo[_leader]) / 2, 4)}"
+            )
+            _next = estimate.n_sims + N_SIMULATIONS / 10
+
+    return estimate
+
+
+if __name__ == "__main__":
+    # Parse entrants (player names, or teams for doubles)
+    # NOTE: either pass in on command line or set in .env file
+    _entrants = sys.argv[1:] or shlex.split(os.environ.get("PONG_PLAYERS") or str())
+    if len(_entrants) < 2:
+        sys.exit(f"Need at least 2 entrants, got: {len(_entrants)}")
+    if TOURNAMENT_FORMAT not in {ROUND_ROBIN, SINGLE_ELIMINATION}:
+        sys.exit(f"Unknown format: {TOURNAMENT_FORMAT}")
+
+    _p_game, _ratings = build_entrants(_entrants)
+    _p_match = p_match_matrix(_p_game, m=(BEST_OF + 1) // 2)
+
+    # Seeded by rating, best first
+    _seeds = np.argsort(-_ratings, kind="stable").tolist()
+
+    print_title(
+        f"Forecast: {TOURNAMENT_FORMAT}, {len(_entrants)} entrants, best of {BEST_OF}"
+    )
+
+    t_start = time.time()
+    _estimate = stream_forecast(_p_match, _entrants, _seeds)
+    t_delta = time.time() - t_start
+
+    print()
+    print_forecast(_estimate, _entrants, _seeds)
+
+    print()
+    print(
+        f"Played {_estimate.n_sims} tournaments "
+        f"({count_matches(TOURNAMENT_FORMAT, len(_entrants))} matches each) "
+        f"in {round(t_delta, 2)}s"
+    )